@@ -1,15 +1,206 @@
 import streamlit as st
-import pandas as pd
 import os
-import tempfile
-from resume_parser import parse_resume
-from resume_evaluator import evaluate_resume
-from sentiment_analyzer import analyze_sentiment
-from database import store_resume_evaluation, get_resume_evaluations, store_sentiment_analysis, get_sentiment_analyses
+from resume_parser import parse_resume, ScannedPDFError
+from skill_taxonomy import get_skill_taxonomy
+from database import store_resume_evaluation, get_evaluation_history, store_sentiment_analysis, get_sentiment_history
+from database import get_sentiment_rollups, get_sentiment_score_histogram, get_top_concerns
+from database import enqueue_job, get_job
 import base64
 import json
 import datetime
-import plotly.graph_objects as go
+import io
+import concurrent.futures
+import metrics
+from llm_client import submit_async
+
+# Heavy dependencies (the Gemini SDK, plotly, pandas, numpy/scipy) are imported
+# on first use rather than at startup. Each loader runs once per process and is
+# shared by every session.
+@st.cache_resource(show_spinner=False)
+def load_resume_evaluator():
+    import resume_evaluator
+    return resume_evaluator
+
+@st.cache_resource(show_spinner=False)
+def load_sentiment_analyzer():
+    import sentiment_analyzer
+    return sentiment_analyzer
+
+@st.cache_resource(show_spinner=False)
+def load_survey_sentiment():
+    import survey_sentiment
+    return survey_sentiment
+
+@st.cache_resource(show_spinner=False)
+def load_prescreen():
+    import prescreen
+    return prescreen
+
+@st.cache_resource(show_spinner=False)
+def load_plotly():
+    import plotly.graph_objects as go
+    return go
+
+@st.cache_resource(show_spinner=False)
+def load_pandas():
+    import pandas as pd
+    return pd
+
+@st.cache_resource(show_spinner=False)
+def load_skill_matrix():
+    import skill_matrix
+    return skill_matrix
+
+@st.cache_resource(show_spinner=False)
+def load_candidate_search():
+    import candidate_search
+    return candidate_search
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_endpoint():
+    """Serve Prometheus metrics when METRICS_PORT is set; None if disabled or the port is taken"""
+    try:
+        return metrics.start_metrics_server()
+    except OSError:
+        return None
+
+# Filter choices for the history browsers
+EVALUATION_RECOMMENDATIONS = ["Strong Fit", "Moderate Fit", "Weak Fit", "Pre-screen Reject"]
+ATTRITION_RISKS = ["High", "Medium", "Low"]
+HISTORY_PAGE_SIZES = [5, 10, 25, 50]
+
+# Time windows offered on the analytics dashboard (days; None for all time)
+ANALYTICS_WINDOWS = {"Last 30 days": 30, "Last 90 days": 90, "Last year": 365, "All time": None}
+RISK_COLORS = {"High": "red", "Medium": "orange", "Low": "green"}
+
+# Pipeline order of the stages shown on the diagnostics tab
+DIAGNOSTIC_STAGES = ["parse", "prompt", "llm_queue", "llm_first_chunk", "llm", "decode", "db_write"]
+
+# With USE_JOB_QUEUE set, evaluations and sentiment analyses are handed to
+# worker.py through the jobs table instead of running in the script thread
+USE_JOB_QUEUE = os.environ.get("USE_JOB_QUEUE", "").lower() in ("1", "true", "yes")
+JOB_STATUS_REFRESH_SECONDS = 2
+
+def history_pages(key, filters):
+    """
+    Page-start cursors for a history browser, kept in session state
+
+    The stack is reset to the first page whenever the filters change.
+    """
+    pages = st.session_state.get(key)
+    if pages is None or pages["filters"] != filters:
+        pages = {"filters": filters, "cursors": [None]}
+        st.session_state[key] = pages
+    return pages
+
+def history_navigation(key, pages, next_cursor):
+    """Render Previous / Next buttons that move through keyset-paginated history"""
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    if col_prev.button("Previous", key=f"{key}_previous", disabled=len(pages["cursors"]) == 1):
+        pages["cursors"].pop()
+        st.rerun()
+    col_page.caption(f"Page {len(pages['cursors'])}")
+    if col_next.button("Next", key=f"{key}_next", disabled=next_cursor is None):
+        pages["cursors"].append(next_cursor)
+        st.rerun()
+
+def render_partial_evaluation(partial):
+    """Show the evaluation fields received so far while the response streams in"""
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        if "overall_match_score" in partial:
+            st.metric("Overall Match Score", f"{partial['overall_match_score']}/10")
+        if "recommendation" in partial:
+            st.subheader("Recommendation")
+            st.markdown(f"**{partial['recommendation']}**")
+        if "reasoning" in partial:
+            st.markdown(f"*{partial['reasoning']}*")
+    with col2:
+        if "key_skills_matched" in partial:
+            st.subheader("Key Skills Matched")
+            for skill in partial["key_skills_matched"]:
+                st.markdown(f"✅ {skill}")
+        if "experience_summary" in partial:
+            st.subheader("Experience Summary")
+            st.write(partial["experience_summary"])
+    with col3:
+        if "missing_weak_areas" in partial:
+            st.subheader("Missing/Weak Areas")
+            for area in partial["missing_weak_areas"]:
+                st.markdown(f"❌ {area}")
+
+def render_partial_sentiment(partial):
+    """Show the sentiment fields received so far while the response streams in"""
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        if "sentiment_score" in partial:
+            st.metric("Sentiment Score", f"{partial['sentiment_score']}/10")
+        if "attrition_risk" in partial:
+            st.markdown(f"**Attrition Risk: {partial['attrition_risk']}**")
+        if "summary" in partial:
+            st.write(partial["summary"])
+    with col2:
+        if "key_concerns" in partial:
+            st.subheader("Key Concerns")
+            for concern in partial["key_concerns"]:
+                st.markdown(f"⚠️ {concern}")
+        if "positive_aspects" in partial:
+            st.subheader("Positive Aspects")
+            for aspect in partial["positive_aspects"]:
+                st.markdown(f"✅ {aspect}")
+        if "retention_recommendations" in partial:
+            st.subheader("Retention Recommendations")
+            for recommendation in partial["retention_recommendations"]:
+                st.markdown(f"- {recommendation}")
+
+def submit_job(kind, payload, job_key, done_key):
+    """Enqueue a job and remember it in the session and the URL, so a page reload re-attaches to it"""
+    job_id = enqueue_job(kind, payload)
+    st.session_state[job_key] = job_id
+    st.session_state[done_key] = False
+    st.session_state[f"{job_key}_error"] = None
+    st.query_params[job_key] = str(job_id)
+
+def finish_job(job_key):
+    """Stop tracking a job that has finished"""
+    st.session_state[job_key] = None
+    st.query_params.pop(job_key, None)
+
+def job_status(job_key, result_key, done_key, label):
+    """Show the failure of the last job, or poll the pending one"""
+    if st.session_state.get(f"{job_key}_error"):
+        st.error(st.session_state[f"{job_key}_error"])
+    if st.session_state.get(job_key) is not None:
+        poll_job(job_key, result_key, done_key, label)
+
+@st.fragment(run_every=JOB_STATUS_REFRESH_SECONDS)
+def poll_job(job_key, result_key, done_key, label):
+    """Poll a queued job and move its result into the session once a worker has finished it"""
+    job_id = st.session_state.get(job_key)
+    if job_id is None:
+        return
+    try:
+        job = get_job(job_id)
+    except Exception as e:
+        st.warning(f"Could not check the {label} job: {str(e)}")
+        return
+    if job is None or job["status"] == "succeeded":
+        finish_job(job_key)
+        if job is not None:
+            st.session_state[result_key] = job["result"]
+            st.session_state[done_key] = True
+            st.toast(f"{label.capitalize()} saved to database successfully!")
+        st.rerun()
+    elif job["status"] == "failed":
+        # Shown by job_status from now on; the full rerun drops this fragment and its polling
+        finish_job(job_key)
+        st.session_state[f"{job_key}_error"] = f"The {label} failed after {job['attempts']} attempt(s): {job['error']}"
+        st.rerun()
+    else:
+        retry = f", retrying after: {job['error']}" if job["error"] else ""
+        st.info(f"The {label} is {job['status']} in the background (job #{job['id']}, "
+                f"attempt {max(1, job['attempts'])} of {job['max_attempts']}{retry}). "
+                "You can leave this page and come back.")
 
 st.set_page_config(
     page_title="AI HR Assistant",
@@ -17,12 +208,21 @@ st.set_page_config(
     layout="wide"
 )
 
+start_metrics_endpoint()
+
 # Initialize session state variables
 if 'current_tab' not in st.session_state:
     st.session_state.current_tab = "Resume Evaluator"
 
+# The diagnostics tab is hidden unless the page is opened with ?diagnostics=1
+show_diagnostics = st.query_params.get("diagnostics", "").lower() in ("1", "true", "yes")
+
 # Create tabs
-tab1, tab2 = st.tabs(["Resume Evaluator", "Employee Sentiment Analysis"])
+tab_names = ["Resume Evaluator", "Employee Sentiment Analysis", "Candidate Ranking", "Attrition Analytics"]
+if show_diagnostics:
+    tab_names.append("Diagnostics")
+tabs = st.tabs(tab_names)
+tab1, tab2, tab3, tab4 = tabs[:4]
 
 with tab1:
     st.title("AI Resume Evaluator for Software Engineers")
@@ -40,6 +240,8 @@ if 'evaluation_result' not in st.session_state:
     st.session_state.evaluation_result = None
 if 'evaluation_done' not in st.session_state:
     st.session_state.evaluation_done = False
+if 'evaluation_job' not in st.session_state:
+    st.session_state.evaluation_job = int(st.query_params["evaluation_job"]) if st.query_params.get("evaluation_job", "").isdigit() else None
 # Initialize session state variables for sentiment analysis
 if 'feedback_text' not in st.session_state:
     st.session_state.feedback_text = ""
@@ -47,6 +249,8 @@ if 'sentiment_result' not in st.session_state:
     st.session_state.sentiment_result = None
 if 'sentiment_analysis_done' not in st.session_state:
     st.session_state.sentiment_analysis_done = False
+if 'sentiment_job' not in st.session_state:
+    st.session_state.sentiment_job = int(st.query_params["sentiment_job"]) if st.query_params.get("sentiment_job", "").isdigit() else None
 
 with tab1:
     # Create a two-column layout
@@ -57,42 +261,85 @@ with tab1:
         resume_file = st.file_uploader("Choose a resume file", type=["pdf", "docx", "txt"], key="resume_uploader")
         
         if resume_file is not None:
-            # Create a temporary file to store the uploaded file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{resume_file.name.split('.')[-1]}") as tmp_file:
-                tmp_file.write(resume_file.getvalue())
-                tmp_file_path = tmp_file.name
-            
             try:
-                # Parse the resume
-                resume_text = parse_resume(tmp_file_path)
+                # Parse straight from the upload buffer; reruns with the same
+                # upload are served from the parse cache. Line breaks are kept
+                # so the evaluator can find the resume's sections.
+                file_extension = os.path.splitext(resume_file.name)[1].lower()
+                resume_text = parse_resume(resume_file.getvalue(), file_format=file_extension, preserve_lines=True)
                 st.session_state.resume_text = resume_text
                 
                 # Display the parsed resume
                 with st.expander("Parsed Resume", expanded=False):
                     st.text_area("Resume Content", resume_text, height=400, key="resume_text_area")
-                    
-                # Remove the temporary file
-                os.unlink(tmp_file_path)
                 
+            except ScannedPDFError:
+                st.error("This PDF looks like a scanned image and has no selectable text. "
+                         "Upload a text-based PDF, a DOCX or a TXT version, or run it through OCR first.")
             except Exception as e:
                 st.error(f"Error parsing resume: {str(e)}")
-                if os.path.exists(tmp_file_path):
-                    os.unlink(tmp_file_path)
 
     with col2:
         st.header("Enter Job Description")
         job_description = st.text_area("Paste the Software Engineer job description here", height=300, key="job_desc_area")
         st.session_state.job_description = job_description
 
+    with st.expander("Skill Pre-screen", expanded=False):
+        use_prescreen = st.checkbox(
+            "Skip the AI evaluation when the resume's skill overlap with the job description is too low",
+            key="use_prescreen"
+        )
+        prescreen_threshold = st.slider(
+            "Minimum skill match (%)", min_value=0, max_value=100,
+            value=int(load_prescreen().PRESCREEN_THRESHOLD), key="prescreen_threshold"
+        )
+
     # Single evaluation button with conditional behavior
     evaluate_button = st.button("Evaluate Resume", key="evaluate_resume_button")
-    if evaluate_button:
+    if evaluate_button and USE_JOB_QUEUE:
+        if st.session_state.resume_text and st.session_state.job_description:
+            payload = {"resume_text": st.session_state.resume_text, "job_description": st.session_state.job_description}
+            if use_prescreen:
+                payload["prescreen_threshold"] = prescreen_threshold
+            try:
+                submit_job("resume_evaluation", payload, "evaluation_job", "evaluation_done")
+            except Exception as e:
+                st.error(f"Error queuing evaluation: {str(e)}")
+        else:
+            st.warning("Please upload a resume and enter a job description to proceed with evaluation.")
+    elif evaluate_button:
         if st.session_state.resume_text and st.session_state.job_description:
             with st.spinner("Evaluating resume against job description..."):
                 try:
-                    evaluation_result = evaluate_resume(st.session_state.resume_text, st.session_state.job_description)
+                    # Filled by the evaluator with the compression report of the prompt it sends
+                    prompt_report = {}
+                    if use_prescreen:
+                        # Rejects are stored below together with regular evaluations
+                        evaluation_stream = load_prescreen().evaluate_resume_with_prescreen_stream(
+                            st.session_state.resume_text,
+                            st.session_state.job_description,
+                            threshold=prescreen_threshold,
+                            store_rejects=False,
+                            prompt_report=prompt_report
+                        )
+                    else:
+                        evaluation_stream = load_resume_evaluator().evaluate_resume_stream(
+                            st.session_state.resume_text, st.session_state.job_description, prompt_report=prompt_report
+                        )
+                    # Render fields as they arrive; the full results panel below replaces them
+                    live_panel = st.empty()
+                    for evaluation_result, final in evaluation_stream:
+                        if not final:
+                            with live_panel.container():
+                                render_partial_evaluation(evaluation_result)
+                    live_panel.empty()
                     st.session_state.evaluation_result = evaluation_result
                     st.session_state.evaluation_done = True
+                    if prompt_report.get("tokens_saved"):
+                        removed = prompt_report["dropped"] + [f"{name} (trimmed)" for name in prompt_report["trimmed"]]
+                        st.caption(f"Prompt compression saved {prompt_report['tokens_saved']} of "
+                                   f"{prompt_report['original_tokens']} resume tokens"
+                                   + (f" — removed: {', '.join(removed)}" if removed else ""))
                     
                     # Store in database
                     try:
@@ -102,6 +349,8 @@ with tab1:
                             result=evaluation_result
                         )
                         st.success("Evaluation saved to database successfully!")
+                        if evaluation_result.get("prescreen"):
+                            st.info("The resume did not pass the skill pre-screen, so the AI evaluation was skipped.")
                     except Exception as db_error:
                         st.warning(f"Evaluation completed but could not be saved to database: {str(db_error)}")
                         
@@ -109,6 +358,7 @@ with tab1:
                     st.error(f"Error during evaluation: {str(e)}")
         else:
             st.warning("Please upload a resume and enter a job description to proceed with evaluation.")
+    job_status("evaluation_job", "evaluation_result", "evaluation_done", "evaluation")
 
     # Display evaluation results
     if st.session_state.evaluation_done and st.session_state.evaluation_result:
@@ -121,6 +371,7 @@ with tab1:
         
         with col1:
             # Display overall match score with a gauge chart
+            go = load_plotly()
             fig = go.Figure(go.Indicator(
                 mode="gauge+number",
                 value=result["overall_match_score"],
@@ -189,18 +440,34 @@ with tab1:
         href = f'<a href="data:file/txt;base64,{b64}" download="resume_evaluation_report.txt">Download Report</a>'
         st.markdown(href, unsafe_allow_html=True)
         
-    # Show previous evaluations from database
+    # Browse previous evaluations from database
     st.header("Previous Evaluations")
+    filter_col1, filter_col2, filter_col3 = st.columns([2, 2, 1])
+    with filter_col1:
+        eval_score_range = st.slider("Match score", 0.0, 10.0, (0.0, 10.0), step=0.5, key="eval_history_score")
+    with filter_col2:
+        eval_recommendations = st.multiselect("Recommendation", EVALUATION_RECOMMENDATIONS, key="eval_history_recommendations")
+    with filter_col3:
+        eval_page_size = st.selectbox("Per page", HISTORY_PAGE_SIZES, key="eval_history_page_size")
     try:
-        evaluations = get_resume_evaluations(limit=5)
+        pages = history_pages("eval_history_pages", (eval_score_range, tuple(eval_recommendations), eval_page_size))
+        evaluations, next_cursor = get_evaluation_history(
+            limit=eval_page_size,
+            cursor=pages["cursors"][-1],
+            # Open-ended bounds also keep rows without a score
+            min_score=eval_score_range[0] if eval_score_range[0] > 0 else None,
+            max_score=eval_score_range[1] if eval_score_range[1] < 10 else None,
+            recommendations=eval_recommendations
+        )
         if evaluations:
-            for i, eval_record in enumerate(evaluations):
-                with st.expander(f"Evaluation #{eval_record.id} - {eval_record.recommendation} ({eval_record.overall_match_score}/10) - {eval_record.timestamp.strftime('%Y-%m-%d %H:%M')}"):
-                    result = eval_record.result
+            for eval_record in evaluations:
+                result = eval_record["result"]
+                with st.expander(f"Evaluation #{eval_record['id']} - {eval_record['recommendation']} ({eval_record['overall_match_score']}/10) - {eval_record['timestamp'].strftime('%Y-%m-%d %H:%M')}"):
                     st.write(f"**Match Score:** {result.get('overall_match_score', 'N/A')}/10")
                     st.write(f"**Recommendation:** {result.get('recommendation', 'N/A')}")
                     st.write(f"**Skills Matched:** {', '.join(result.get('key_skills_matched', ['N/A']))}")
                     st.write(f"**Missing Areas:** {', '.join(result.get('missing_weak_areas', ['N/A']))}")
+            history_navigation("eval_history", pages, next_cursor)
         else:
             st.info("No previous resume evaluations found.")
     except Exception as e:
@@ -224,11 +491,25 @@ with tab2:
     
     # Analysis button
     analyze_button = st.button("Analyze Sentiment", key="analyze_sentiment_button")
-    if analyze_button:
+    if analyze_button and USE_JOB_QUEUE:
+        if st.session_state.feedback_text:
+            try:
+                submit_job("sentiment_analysis", {"feedback_text": st.session_state.feedback_text},
+                           "sentiment_job", "sentiment_analysis_done")
+            except Exception as e:
+                st.error(f"Error queuing sentiment analysis: {str(e)}")
+        else:
+            st.warning("Please enter employee feedback to proceed with sentiment analysis.")
+    elif analyze_button:
         if st.session_state.feedback_text:
             with st.spinner("Analyzing employee sentiment..."):
                 try:
-                    sentiment_result = analyze_sentiment(st.session_state.feedback_text)
+                    live_panel = st.empty()
+                    for sentiment_result, final in load_sentiment_analyzer().analyze_sentiment_stream(st.session_state.feedback_text):
+                        if not final:
+                            with live_panel.container():
+                                render_partial_sentiment(sentiment_result)
+                    live_panel.empty()
                     st.session_state.sentiment_result = sentiment_result
                     st.session_state.sentiment_analysis_done = True
                     
@@ -246,6 +527,7 @@ with tab2:
                     st.error(f"Error during sentiment analysis: {str(e)}")
         else:
             st.warning("Please enter employee feedback to proceed with sentiment analysis.")
+    job_status("sentiment_job", "sentiment_result", "sentiment_analysis_done", "sentiment analysis")
     
     # Display sentiment analysis results
     if st.session_state.sentiment_analysis_done and st.session_state.sentiment_result:
@@ -258,6 +540,7 @@ with tab2:
         
         with col1:
             # Display sentiment score with a gauge chart
+            go = load_plotly()
             fig = go.Figure(go.Indicator(
                 mode="gauge+number",
                 value=result["sentiment_score"],
@@ -331,23 +614,355 @@ with tab2:
         href = f'<a href="data:file/txt;base64,{b64}" download="employee_sentiment_report.txt">Download Report</a>'
         st.markdown(href, unsafe_allow_html=True)
         
-    # Show previous sentiment analyses from database
+    # Analyze a whole survey export at once
+    st.header("Batch Survey Analysis")
+    st.markdown("Upload a CSV or Parquet export of survey answers. Short answers are packed several to a request and every result is saved to the database.")
+    survey_file = st.file_uploader("Upload survey responses", type=["csv", "parquet"], key="survey_file")
+    if survey_file is not None:
+        survey_format = survey_file.name.rsplit('.', 1)[-1].lower()
+        try:
+            pd = load_pandas()
+            survey_bytes = survey_file.getvalue()
+            if survey_format == "parquet":
+                survey_columns = list(pd.read_parquet(io.BytesIO(survey_bytes)).columns)
+            else:
+                survey_columns = list(pd.read_csv(io.BytesIO(survey_bytes), nrows=0).columns)
+        except Exception as e:
+            st.error(f"Error reading survey file: {str(e)}")
+            survey_columns = []
+
+        if survey_columns:
+            survey_module = load_survey_sentiment()
+            lowered_columns = [str(column).lower() for column in survey_columns]
+            guessed_column = next((lowered_columns.index(name) for name in survey_module.TEXT_COLUMN_CANDIDATES
+                                   if name in lowered_columns), 0)
+            col1, col2 = st.columns(2)
+            with col1:
+                survey_text_column = st.selectbox("Response column", survey_columns, index=guessed_column, key="survey_text_column")
+            with col2:
+                survey_id_column = st.selectbox("Respondent ID column", ["(row number)"] + survey_columns, key="survey_id_column")
+
+            if st.button("Analyze Survey", key="analyze_survey_button"):
+                try:
+                    responses = survey_module.load_survey_responses(
+                        survey_bytes,
+                        text_column=survey_text_column,
+                        id_column=None if survey_id_column == "(row number)" else survey_id_column,
+                        file_format=survey_format
+                    )
+                    survey_progress = st.progress(0.0, text=f"Analyzing {len(responses)} responses...")
+
+                    # The batch runs on the shared model event loop's thread, which
+                    # cannot draw on the page; it records progress for this thread to show
+                    survey_done = [0]
+
+                    def update_survey_progress(completed, total):
+                        survey_done[0] = completed
+
+                    async def collect_survey_results():
+                        results = [None] * len(responses)
+                        async for index, result in survey_module.analyze_survey_batch(
+                                responses, progress_callback=update_survey_progress):
+                            results[index] = result
+                        return results
+
+                    survey_results = []
+                    if responses:
+                        survey_future = submit_async(collect_survey_results())
+                        while not survey_future.done():
+                            try:
+                                survey_future.result(timeout=0.25)
+                            except concurrent.futures.TimeoutError:
+                                survey_progress.progress(survey_done[0] / len(responses),
+                                                         text=f"Analyzed {survey_done[0]} of {len(responses)} responses")
+                        survey_results = survey_future.result()
+                    st.session_state.survey_results = [
+                        {
+                            "Respondent": response_id,
+                            "Sentiment Score": result.get("sentiment_score") if isinstance(result, dict) else None,
+                            "Attrition Risk": result.get("attrition_risk") if isinstance(result, dict) else None,
+                            "Key Concerns": ", ".join(result.get("key_concerns", [])) if isinstance(result, dict) else "",
+                            "Summary": result.get("summary", "") if isinstance(result, dict) else "",
+                            "Error": str(result) if isinstance(result, Exception) else "",
+                        }
+                        for (response_id, _), result in zip(responses, survey_results)
+                    ]
+                except Exception as e:
+                    st.error(f"Error analyzing survey: {str(e)}")
+
+    if st.session_state.get("survey_results"):
+        survey_frame = load_pandas().DataFrame(st.session_state.survey_results)
+        analyzed = survey_frame[survey_frame["Error"] == ""]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Responses", len(survey_frame))
+        col2.metric("Average Sentiment", f"{analyzed['Sentiment Score'].mean():.1f}/10" if len(analyzed) else "N/A")
+        col3.metric("High Attrition Risk", int((analyzed["Attrition Risk"] == "High").sum()))
+        col4.metric("Failed", len(survey_frame) - len(analyzed))
+        st.dataframe(survey_frame, use_container_width=True, hide_index=True)
+        st.download_button("Download Results (CSV)", survey_frame.to_csv(index=False),
+                           file_name="survey_sentiment_results.csv", mime="text/csv", key="survey_download")
+
+    # Browse previous sentiment analyses from database
     st.header("Previous Sentiment Analyses")
+    filter_col1, filter_col2, filter_col3 = st.columns([2, 2, 1])
+    with filter_col1:
+        sentiment_score_range = st.slider("Sentiment score", 0.0, 10.0, (0.0, 10.0), step=0.5, key="sentiment_history_score")
+    with filter_col2:
+        sentiment_risks = st.multiselect("Attrition risk", ATTRITION_RISKS, key="sentiment_history_risks")
+    with filter_col3:
+        sentiment_page_size = st.selectbox("Per page", HISTORY_PAGE_SIZES, key="sentiment_history_page_size")
     try:
-        sentiments = get_sentiment_analyses(limit=5)
+        pages = history_pages("sentiment_history_pages", (sentiment_score_range, tuple(sentiment_risks), sentiment_page_size))
+        sentiments, next_cursor = get_sentiment_history(
+            limit=sentiment_page_size,
+            cursor=pages["cursors"][-1],
+            min_score=sentiment_score_range[0] if sentiment_score_range[0] > 0 else None,
+            max_score=sentiment_score_range[1] if sentiment_score_range[1] < 10 else None,
+            risks=sentiment_risks
+        )
         if sentiments:
-            for i, sentiment_record in enumerate(sentiments):
-                with st.expander(f"Analysis #{sentiment_record.id} - {sentiment_record.attrition_risk} Risk ({sentiment_record.sentiment_score}/10) - {sentiment_record.timestamp.strftime('%Y-%m-%d %H:%M')}"):
-                    result = sentiment_record.result
+            for sentiment_record in sentiments:
+                result = sentiment_record["result"]
+                with st.expander(f"Analysis #{sentiment_record['id']} - {sentiment_record['attrition_risk']} Risk ({sentiment_record['sentiment_score']}/10) - {sentiment_record['timestamp'].strftime('%Y-%m-%d %H:%M')}"):
                     st.write(f"**Sentiment Score:** {result.get('sentiment_score', 'N/A')}/10")
                     st.write(f"**Attrition Risk:** {result.get('attrition_risk', 'N/A')}")
                     st.write(f"**Key Concerns:** {', '.join(result.get('key_concerns', ['N/A']))}")
                     st.write(f"**Positive Aspects:** {', '.join(result.get('positive_aspects', ['N/A']))}")
                     st.write(f"**Summary:** {result.get('summary', 'N/A')}")
+            history_navigation("sentiment_history", pages, next_cursor)
         else:
             st.info("No previous sentiment analyses found.")
     except Exception as e:
         st.error(f"Error loading previous sentiment analyses: {str(e)}")
 
+with tab3:
+    st.title("Candidate Pool Ranking")
+    st.markdown("""
+    Rank a pool of resumes against a job description by skill coverage. This runs locally 
+    on the extracted skills and does not call the AI model.
+    """)
+
+    pool_files = st.file_uploader(
+        "Upload candidate resumes", type=["pdf", "docx", "txt"],
+        accept_multiple_files=True, key="pool_uploader"
+    )
+    pool_job_description = st.text_area("Paste the job description here", height=200, key="pool_job_desc_area")
+
+    job_skill_options = sorted(skill["name"] for skill in get_skill_taxonomy().skills.values())
+    detected_skills = [
+        get_skill_taxonomy().skills[skill]["name"]
+        for skill in get_skill_taxonomy().extract(pool_job_description)
+    ] if pool_job_description else []
+
+    if detected_skills:
+        st.caption(f"Skills detected in the job description: {', '.join(detected_skills)}")
+
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        required_skills = st.multiselect(
+            "Required skills (defaults to the detected skills)", job_skill_options, key="pool_required"
+        ) or detected_skills
+    with col2:
+        nice_to_have_skills = st.multiselect("Nice-to-have skills", job_skill_options, key="pool_nice_to_have")
+    with col3:
+        top_k = st.number_input("Show top", min_value=1, max_value=1000, value=20, key="pool_top_k")
+
+    if st.button("Rank Candidates", key="rank_candidates_button"):
+        if pool_files and required_skills:
+            with st.spinner("Ranking candidates..."):
+                candidates = []
+                for pool_file in pool_files:
+                    try:
+                        file_extension = os.path.splitext(pool_file.name)[1].lower()
+                        candidates.append((pool_file.name, parse_resume(pool_file.getvalue(), file_format=file_extension)))
+                    except ScannedPDFError:
+                        st.warning(f"Skipped {pool_file.name}: scanned PDF with no selectable text (needs OCR)")
+                    except Exception as e:
+                        st.warning(f"Skipped {pool_file.name}: {str(e)}")
+
+                matrix = load_skill_matrix().CandidateSkillMatrix.from_texts(candidates)
+                ranking = matrix.rank(required_skills, nice_to_have_skills, top_k=int(top_k))
+
+            st.subheader(f"Top {len(ranking)} of {len(candidates)} Candidates")
+            st.dataframe(ranking, use_container_width=True, hide_index=True)
+            with st.expander("Most Common Skills in the Pool", expanded=False):
+                st.dataframe(matrix.skill_frequency().head(30), use_container_width=True, hide_index=True)
+        else:
+            st.warning("Please upload resumes and choose at least one required skill.")
+
+    # Search resumes stored by earlier evaluations
+    st.header("Search Previously Evaluated Candidates")
+    st.markdown("Find the best matches for the job description above among every resume already in the database.")
+    search_k = st.number_input("Number of results", min_value=1, max_value=200, value=10, key="search_k")
+    if st.button("Search Candidates", key="search_candidates_button"):
+        if pool_job_description:
+            try:
+                with st.spinner("Searching stored resumes..."):
+                    matches = load_candidate_search().search_candidates(pool_job_description, k=int(search_k))
+                if matches:
+                    st.dataframe(load_pandas().DataFrame([
+                        {
+                            "Evaluation #": match["evaluation_id"],
+                            "Relevance": match["score"],
+                            "Times Evaluated": len(match["evaluation_ids"]),
+                            "Resume Preview": match["preview"],
+                        }
+                        for match in matches
+                    ]), use_container_width=True, hide_index=True)
+                else:
+                    st.info("No stored resumes match this job description.")
+            except Exception as e:
+                st.error(f"Error searching candidates: {str(e)}")
+        else:
+            st.warning("Please enter a job description to search for candidates.")
+
+with tab4:
+    st.title("Attrition Analytics")
+    st.markdown("Trends across every stored sentiment analysis. Charts read pre-aggregated rollups, so they load just as fast however many analyses are stored.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        analytics_period = st.radio("Group by", ["day", "week"], format_func=str.title, horizontal=True, key="analytics_period")
+    with col2:
+        analytics_window = st.selectbox("Time window", list(ANALYTICS_WINDOWS), index=1, key="analytics_window")
+
+    try:
+        window_days = ANALYTICS_WINDOWS[analytics_window]
+        since = datetime.date.today() - datetime.timedelta(days=window_days) if window_days else None
+        rollups = get_sentiment_rollups(period=analytics_period, since=since)
+        if rollups:
+            pd = load_pandas()
+            go = load_plotly()
+            rollup_frame = pd.DataFrame(rollups)
+            rollup_frame["score_sum"] = rollup_frame["average_score"] * rollup_frame["count"]
+
+            total_analyses = int(rollup_frame["count"].sum())
+            high_risk = int(rollup_frame.loc[rollup_frame["attrition_risk"] == "High", "count"].sum())
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Analyses", total_analyses)
+            col2.metric("Average Sentiment", f"{rollup_frame['score_sum'].sum() / total_analyses:.1f}/10")
+            col3.metric("High Attrition Risk", f"{high_risk / total_analyses:.0%}")
+
+            counts = rollup_frame.pivot_table(index="period_start", columns="attrition_risk", values="count",
+                                              aggfunc="sum", fill_value=0)
+            risk_fig = go.Figure([
+                go.Bar(name=risk, x=counts.index, y=counts[risk], marker_color=RISK_COLORS.get(risk, "gray"))
+                for risk in counts.columns
+            ])
+            risk_fig.update_layout(barmode="stack", title=f"Analyses per {analytics_period} by attrition risk", height=350)
+            st.plotly_chart(risk_fig, use_container_width=True)
+
+            per_period = rollup_frame.groupby("period_start")[["score_sum", "count"]].sum()
+            score_fig = go.Figure(go.Scatter(x=per_period.index, y=per_period["score_sum"] / per_period["count"],
+                                             mode="lines+markers"))
+            score_fig.update_layout(title=f"Average sentiment score per {analytics_period}", yaxis_range=[1, 10], height=300)
+            st.plotly_chart(score_fig, use_container_width=True)
+        else:
+            st.info("No sentiment analyses stored in this time window.")
+
+        # The histogram and concern counts cover every stored analysis
+        col1, col2 = st.columns(2)
+        with col1:
+            histogram = get_sentiment_score_histogram()
+            if any(histogram.values()):
+                histogram_fig = load_plotly().Figure(load_plotly().Bar(x=list(histogram), y=list(histogram.values())))
+                histogram_fig.update_layout(title="Sentiment score distribution (all time)", xaxis_title="Score",
+                                            yaxis_title="Analyses", height=400)
+                st.plotly_chart(histogram_fig, use_container_width=True)
+        with col2:
+            top_concerns = get_top_concerns(limit=15)
+            if top_concerns:
+                concerns_fig = load_plotly().Figure(load_plotly().Bar(
+                    x=[count for _, count in reversed(top_concerns)],
+                    y=[concern for concern, _ in reversed(top_concerns)],
+                    orientation="h"
+                ))
+                concerns_fig.update_layout(title="Most common concerns (all time)", xaxis_title="Analyses", height=400)
+                st.plotly_chart(concerns_fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error loading attrition analytics: {str(e)}")
+
+if show_diagnostics:
+    with tabs[4]:
+        st.title("Diagnostics")
+        if metrics.METRICS_PORT:
+            if start_metrics_endpoint() is not None:
+                st.caption(f"Prometheus metrics: http://{metrics.METRICS_HOST}:{metrics.METRICS_PORT}/metrics")
+            else:
+                st.warning(f"Metrics endpoint could not listen on port {metrics.METRICS_PORT}.")
+        else:
+            st.caption("Set METRICS_PORT to also serve these metrics to Prometheus.")
+        st.markdown("Per-stage latency for this server process. Percentiles cover the most recent "
+                    f"{metrics.METRICS_RECENT_SAMPLES} calls of each stage.")
+
+        col1, col2 = st.columns([1, 5])
+        with col1:
+            st.button("Refresh", key="diagnostics_refresh")
+        with col2:
+            if st.button("Reset", key="diagnostics_reset"):
+                metrics.registry.reset()
+
+        histograms = metrics.registry.histograms()
+        values = metrics.registry.values()
+        errors = {tuple(sorted(labels.items())): value for name, _, labels, value in values if name == "stage_errors_total"}
+        series = {}
+        for histogram in histograms:
+            if histogram["name"] == "stage_duration_seconds":
+                labels = dict(histogram["labels"])
+                stage = labels.pop("stage")
+            elif histogram["name"] == "llm_queue_seconds":
+                labels = dict(histogram["labels"])
+                stage = "llm_queue"
+            else:
+                continue
+            detail = ", ".join(f"{name}={value}" for name, value in sorted(labels.items()))
+            series[f"{stage} ({detail})" if detail else stage] = (stage, detail, histogram)
+
+        if series:
+            pd = load_pandas()
+            ordered_series = sorted(series.values(), key=lambda item: (
+                DIAGNOSTIC_STAGES.index(item[0]) if item[0] in DIAGNOSTIC_STAGES else len(DIAGNOSTIC_STAGES), item[1]))
+            st.dataframe(pd.DataFrame([
+                {
+                    "Stage": stage,
+                    "Labels": detail,
+                    "Calls": histogram["count"],
+                    "Errors": int(errors.get(tuple(sorted(histogram["labels"].items())), 0)),
+                    "Mean (ms)": round(histogram["sum"] / histogram["count"] * 1000, 2),
+                    "p50 (ms)": round(histogram["p50"] * 1000, 2),
+                    "p99 (ms)": round(histogram["p99"] * 1000, 2),
+                }
+                for stage, detail, histogram in ordered_series
+            ]), use_container_width=True, hide_index=True)
+
+            selected_series = st.selectbox("Recent latency distribution", list(series), key="diagnostics_series")
+            go = load_plotly()
+            recent_ms = [value * 1000 for value in series[selected_series][2]["recent"]]
+            latency_fig = go.Figure(go.Histogram(x=recent_ms, nbinsx=40))
+            latency_fig.update_layout(xaxis_title="Latency (ms)", yaxis_title="Calls", height=350)
+            st.plotly_chart(latency_fig, use_container_width=True)
+        else:
+            st.info("No calls recorded yet in this process.")
+
+        counter_values = {(name, tuple(sorted(labels.items()))): value for name, _, labels, value in values}
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Prompt tokens", int(sum(value for (name, labels), value in counter_values.items()
+                                             if name == "llm_tokens_total" and ("kind", "prompt") in labels)))
+        col2.metric("Response tokens", int(sum(value for (name, labels), value in counter_values.items()
+                                               if name == "llm_tokens_total" and ("kind", "response") in labels)))
+        for column, cache in ((col3, "llm"), (col4, "parse")):
+            hits = counter_values.get(("cache_requests_total", (("cache", cache), ("result", "hit"))), 0)
+            misses = counter_values.get(("cache_requests_total", (("cache", cache), ("result", "miss"))), 0)
+            column.metric(f"{cache.upper() if cache == 'llm' else cache.title()} cache hit rate",
+                          f"{hits / (hits + misses):.0%}" if hits + misses else "n/a",
+                          help=f"{int(hits)} hits, {int(misses)} misses")
+
+        with st.expander("All counters and gauges"):
+            st.dataframe(load_pandas().DataFrame([
+                {"Metric": name, "Labels": ", ".join(f"{key}={value}" for key, value in sorted(labels.items())),
+                 "Value": value}
+                for name, _, labels, value in values
+            ]), use_container_width=True, hide_index=True)
+
 st.markdown("---")
 st.markdown("© 2024 AI HR Assistant | Powered by Google Gemini AI")
@@ -0,0 +1,133 @@
+"""
+Concurrent load benchmark for the database helpers
+
+Runs store_* / get_* calls from many threads at once (one thread per
+simulated Streamlit session) and reports p50/p99 latency per operation and
+the pool status. Run from the repository root:
+
+    python benchmarks/bench_db.py --threads 32 --ops 50
+
+Uses DATABASE_URL when set (e.g. a local Postgres); otherwise a throwaway
+SQLite file stands in. Tables are created with database.migrate().
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.environ.get("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_db_'), 'bench.db')}"
+
+import database
+
+RESUME_TEXT = "Senior software engineer with Python, Django, PostgreSQL and AWS experience. " * 40
+JOB_DESCRIPTION = "We are hiring a backend engineer familiar with Python, Kubernetes and Postgres. " * 20
+FEEDBACK_TEXT = "I like my team but the workload has been heavy and growth has stalled. " * 10
+
+EVALUATION_RESULT = {
+    "overall_match_score": 7,
+    "key_skills_matched": ["Python", "PostgreSQL"],
+    "missing_weak_areas": ["Kubernetes"],
+    "experience_summary": "Backend services in Python.",
+    "recommendation": "Moderate Fit",
+    "reasoning": "Strong Python, limited Kubernetes.",
+}
+SENTIMENT_RESULT = {
+    "sentiment_score": 5,
+    "attrition_risk": "Medium",
+    "key_concerns": ["Workload"],
+    "positive_aspects": ["Team"],
+    "retention_recommendations": ["Rebalance workload"],
+    "summary": "Mixed sentiment.",
+}
+
+OPERATIONS = {
+    "store_resume_evaluation": lambda: database.store_resume_evaluation(RESUME_TEXT, JOB_DESCRIPTION, EVALUATION_RESULT),
+    "get_resume_evaluations": lambda: database.get_resume_evaluations(limit=5),
+    "store_sentiment_analysis": lambda: database.store_sentiment_analysis(FEEDBACK_TEXT, SENTIMENT_RESULT),
+    "get_sentiment_analyses": lambda: database.get_sentiment_analyses(limit=5),
+}
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def worker(ops, latencies, errors, lock, barrier):
+    local = defaultdict(list)
+    local_errors = defaultdict(int)
+    barrier.wait()
+    for i in range(ops):
+        for name, operation in OPERATIONS.items():
+            start = time.perf_counter()
+            try:
+                operation()
+            except Exception:
+                local_errors[name] += 1
+                continue
+            local[name].append(time.perf_counter() - start)
+    with lock:
+        for name, samples in local.items():
+            latencies[name].extend(samples)
+        for name, count in local_errors.items():
+            errors[name] += count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16, help="concurrent sessions")
+    parser.add_argument("--ops", type=int, default=25, help="iterations of every operation per thread")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    database.migrate()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+    threads = [threading.Thread(target=worker, args=(args.ops, latencies, errors, lock, barrier))
+               for _ in range(args.threads)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    results = {
+        name: {
+            "calls": len(latencies[name]),
+            "errors": errors[name],
+            "p50_ms": round(percentile(latencies[name], 0.50) * 1000, 2) if latencies[name] else None,
+            "p99_ms": round(percentile(latencies[name], 0.99) * 1000, 2) if latencies[name] else None,
+        }
+        for name in OPERATIONS
+    }
+    total_calls = sum(result["calls"] for result in results.values())
+    summary = {
+        "backend": database.get_engine().url.get_backend_name(),
+        "threads": args.threads,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_ops_s": round(total_calls / elapsed, 1),
+        "pool": database.get_engine().pool.status(),
+    }
+
+    if args.json:
+        print(json.dumps({"summary": summary, "operations": results}, indent=2))
+        return
+
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    print()
+    print(f"{'operation':<28}{'calls':>8}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['calls']:>8}{result['errors']:>8}{str(result['p50_ms']):>10}{str(result['p99_ms']):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+DOCX extraction microbenchmark: streaming extractor vs docx2txt
+
+Builds large synthetic DOCX files (paragraphs plus tables) with python-docx
+and times resume_parser.parse_docx against the docx2txt-based extraction it
+replaced, reporting median time, throughput over the uncompressed
+word/document.xml and peak traced memory. Run from the repository root:
+
+    python benchmarks/bench_docx.py --paragraphs 20000 --repeat 5
+
+Needs python-docx and docx2txt.
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import zipfile
+import argparse
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docx
+import docx2txt
+from resume_parser import parse_docx
+
+WORDS = ("engineer python distributed systems latency kubernetes postgres design review mentoring "
+         "pipeline throughput reliability migration observability api service cloud data team").split()
+
+def build_document(paragraphs, table_every, seed):
+    """DOCX bytes with `paragraphs` paragraphs and a 4x3 table after every `table_every` of them"""
+    rng = random.Random(seed)
+    document = docx.Document()
+    for index in range(paragraphs):
+        if index % 50 == 0:
+            document.add_heading(rng.choice(["Experience", "Projects", "Publications"]), level=2)
+        document.add_paragraph(' '.join(rng.choices(WORDS, k=rng.randint(8, 40))))
+        if table_every and index % table_every == table_every - 1:
+            table = document.add_table(rows=4, cols=3)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = ' '.join(rng.choices(WORDS, k=3))
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def extract_docx2txt(data):
+    """The previous parse_docx: docx2txt followed by a whitespace pass"""
+    return ' '.join(docx2txt.process(io.BytesIO(data)).split())
+
+EXTRACTORS = {
+    "docx2txt": extract_docx2txt,
+    "streaming": lambda data: parse_docx(data),
+    "streaming (lines)": lambda data: parse_docx(data, preserve_lines=True),
+}
+
+def measure(extract, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(data)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    extract(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[1000, 20000],
+                        help="document sizes to test, in paragraphs")
+    parser.add_argument("--table-every", type=int, default=25, help="add a table after every N paragraphs (0 for none)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per extractor")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for paragraphs in args.paragraphs:
+        data = build_document(paragraphs, args.table_every, args.seed)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            xml_bytes = archive.getinfo("word/document.xml").file_size
+        # The flat outputs should match word for word (the documents have no headers or footers)
+        identical = EXTRACTORS["streaming"](data) == extract_docx2txt(data)
+        for name, extract in EXTRACTORS.items():
+            seconds, peak = measure(extract, data, args.repeat)
+            results.append({
+                "paragraphs": paragraphs,
+                "docx_kb": round(len(data) / 1024, 1),
+                "xml_mb": round(xml_bytes / 1024 ** 2, 2),
+                "extractor": name,
+                "median_ms": round(seconds * 1000, 2),
+                "xml_mb_s": round(xml_bytes / 1024 ** 2 / seconds, 1),
+                "peak_mb": round(peak / 1024 ** 2, 2),
+                "identical_text": identical,
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'paragraphs':>10}{'xml MB':>9}  {'extractor':<19}{'median ms':>11}{'XML MB/s':>10}{'peak MB':>9}")
+    for result in results:
+        print(f"{result['paragraphs']:>10}{result['xml_mb']:>9}  {result['extractor']:<19}{result['median_ms']:>11}"
+              f"{result['xml_mb_s']:>10}{result['peak_mb']:>9}")
+    if not all(result["identical_text"] for result in results):
+        print("\nwarning: streaming and docx2txt text differ")
+
+if __name__ == "__main__":
+    main()
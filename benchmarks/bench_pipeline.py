@@ -0,0 +1,196 @@
+"""
+End-to-end throughput benchmark for the resume evaluation pipeline
+
+Pushes a synthetic corpus (benchmarks/corpus.py) through every stage a real
+evaluation goes through, parse -> prompt -> LLM -> decode -> DB write, from
+a pool of worker threads, and reports throughput plus p50/p99 latency per
+stage and end to end. Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --resumes 500 --workers 16 --latency lognormal:800:0.5
+
+The LLM is the local fake backend (fake_llm.py) unless LLM_BACKEND is set
+to something else, so no API key is needed; --error-rate, --quota-rate and
+--malformed-rate inject failures. Quota limits default to effectively
+unlimited; set LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE /
+LLM_MAX_CONCURRENCY to reproduce a real account. Uses DATABASE_URL when set;
+otherwise a throwaway SQLite file stands in.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from collections import defaultdict, Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.environ.get("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_pipeline_'), 'bench.db')}"
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "1000000000")
+
+import database
+import llm_client
+import metrics
+from corpus import synthetic_resumes, synthetic_job_descriptions
+from resume_parser import parse_resume
+from resume_evaluator import EVALUATION_SCHEMA, GENERATION_CONFIG, build_evaluation_prompt, _get_model
+from llm_decoder import DecodeError, DEFAULT_DECODE_RETRIES, decode_response, stats as decoder_stats
+from llm_scheduler import get_scheduler, estimate_tokens
+
+STAGES = ("parse", "prompt", "llm", "decode", "db", "total")
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def process(item, job_description, writer, timings):
+    """Run one resume through the pipeline, recording each stage's duration in timings"""
+    name, data, file_format = item
+    start = time.perf_counter()
+    resume_text = parse_resume(data, file_format=file_format, use_cache=False, preserve_lines=True)
+    timings["parse"] = time.perf_counter() - start
+
+    mark = time.perf_counter()
+    prompt = build_evaluation_prompt(resume_text, job_description)
+    timings["prompt"] = time.perf_counter() - mark
+
+    llm_seconds = decode_seconds = 0.0
+    for attempt in range(DEFAULT_DECODE_RETRIES + 1):
+        # A stage only gets a timing once it has succeeded
+        timings.pop("llm", None)
+        mark = time.perf_counter()
+        response = get_scheduler().call(_get_model().generate_content, prompt, generation_config=GENERATION_CONFIG,
+                                        lane="batch", tokens=estimate_tokens(prompt))
+        llm_seconds += time.perf_counter() - mark
+        timings["llm"] = llm_seconds
+        mark = time.perf_counter()
+        try:
+            result = decode_response(response.text, EVALUATION_SCHEMA)
+            break
+        except DecodeError:
+            if attempt == DEFAULT_DECODE_RETRIES:
+                raise
+            decoder_stats.increment("retries")
+        finally:
+            decode_seconds += time.perf_counter() - mark
+    timings["decode"] = decode_seconds
+
+    mark = time.perf_counter()
+    if writer is not None:
+        writer.add(resume_text=resume_text, job_description=job_description, result=result)
+    else:
+        database.store_resume_evaluation(resume_text, job_description, result)
+    timings["db"] = time.perf_counter() - mark
+    timings["total"] = time.perf_counter() - start
+
+def worker(queue, queue_lock, job_descriptions, writer, latencies, errors, lock):
+    local = defaultdict(list)
+    local_errors = Counter()
+    while True:
+        with queue_lock:
+            if not queue:
+                break
+            index, item = queue.pop()
+        timings = {}
+        try:
+            process(item, job_descriptions[index % len(job_descriptions)], writer, timings)
+        except Exception as e:
+            # The stage that failed is the first one without a timing
+            stage = next(stage for stage in STAGES if stage not in timings)
+            local_errors[f"{stage}: {type(e).__name__}"] += 1
+            continue
+        for stage, seconds in timings.items():
+            local[stage].append(seconds)
+    with lock:
+        for stage, samples in local.items():
+            latencies[stage].extend(samples)
+        errors.update(local_errors)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=200, help="resumes in the corpus")
+    parser.add_argument("--jobs", type=int, default=5, help="job descriptions in the corpus")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent pipeline threads")
+    parser.add_argument("--docx-share", type=float, default=0.5, help="fraction of resumes generated as DOCX")
+    parser.add_argument("--seed", type=int, default=42, help="corpus and fake backend seed")
+    parser.add_argument("--latency", default="lognormal:800:0.5", help="fake LLM latency distribution (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake LLM server error rate")
+    parser.add_argument("--quota-rate", type=float, default=0.0, help="fake LLM 429 rate")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fake LLM near-JSON response rate")
+    parser.add_argument("--bulk", type=int, default=0, metavar="N",
+                        help="buffer DB writes through a BulkWriter of N rows instead of one insert per resume")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if llm_client.LLM_BACKEND == "fake":
+        llm_client.set_backend("fake", latency=args.latency, error_rate=args.error_rate,
+                               quota_error_rate=args.quota_rate, malformed_rate=args.malformed_rate, seed=args.seed)
+    database.migrate()
+    corpus = synthetic_resumes(args.resumes, seed=args.seed, docx_share=args.docx_share)
+    job_descriptions = synthetic_job_descriptions(args.jobs, seed=args.seed)
+    queue = list(enumerate(corpus))[::-1]
+    queue_lock = threading.Lock()
+    writer = database.BulkWriter(database.store_resume_evaluations_bulk, batch_size=args.bulk) if args.bulk else None
+    latencies = defaultdict(list)
+    errors = Counter()
+    lock = threading.Lock()
+    threads = [threading.Thread(target=worker, args=(queue, queue_lock, job_descriptions, writer, latencies, errors, lock))
+               for _ in range(args.workers)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if writer is not None:
+        writer.flush()
+    elapsed = time.perf_counter() - start
+
+    results = {
+        stage: {
+            "calls": len(latencies[stage]),
+            "p50_ms": round(percentile(latencies[stage], 0.50) * 1000, 2) if latencies[stage] else None,
+            "p99_ms": round(percentile(latencies[stage], 0.99) * 1000, 2) if latencies[stage] else None,
+        }
+        for stage in STAGES
+    }
+    completed = len(latencies["total"])
+    decoded = decoder_stats.snapshot()
+    saved = [histogram for histogram in metrics.registry.histograms() if histogram["name"] == "prompt_tokens_saved"]
+    summary = {
+        "llm_backend": llm_client.LLM_BACKEND,
+        "db_backend": database.get_engine().url.get_backend_name(),
+        "resumes": args.resumes,
+        "workers": args.workers,
+        "completed": completed,
+        "failed": sum(errors.values()),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_resumes_s": round(completed / elapsed, 2),
+        "quota_errors": get_scheduler().quota_errors,
+        "repair_rate": round(decoded["repair_rate"], 3),
+        "retry_rate": round(decoded["retry_rate"], 3),
+        "avg_prompt_tokens_saved": round(sum(h["sum"] for h in saved) / max(1, sum(h["count"] for h in saved)), 1),
+    }
+
+    if args.json:
+        print(json.dumps({"summary": summary, "stages": results, "errors": dict(errors)}, indent=2))
+        return
+
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    print()
+    print(f"{'stage':<10}{'calls':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for stage, result in results.items():
+        print(f"{stage:<10}{result['calls']:>8}{str(result['p50_ms']):>10}{str(result['p99_ms']):>10}")
+    if errors:
+        print()
+        for error, count in errors.most_common():
+            print(f"{error}: {count}")
+
+if __name__ == "__main__":
+    main()
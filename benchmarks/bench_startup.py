@@ -0,0 +1,104 @@
+"""
+Startup-time benchmark for the Streamlit app
+
+Measures, in fresh interpreters, how long it takes to import each app module
+and to run the first script execution of app.py (the cold start a new
+Streamlit worker pays). Run from the repository root:
+
+    python benchmarks/bench_startup.py --repeat 5
+
+DATABASE_URL defaults to a throwaway SQLite file so no Postgres is needed.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "resume_parser",
+    "database",
+    "resume_evaluator",
+    "sentiment_analyzer",
+    "utils",
+    "skill_matrix",
+    "candidate_search",
+]
+
+_IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+_APP_SNIPPET = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file({app_path!r}, default_timeout=120).run()
+print(time.perf_counter() - start)
+"""
+
+def _run(snippet, env):
+    output = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=REPO_ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+def _summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(ordered) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+        "min_ms": round(ordered[0] * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--skip-app", action="store_true", help="only measure module imports")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    scratch_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(scratch_dir, 'bench.db')}")
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    subprocess.run([sys.executable, "database.py", "migrate"], cwd=REPO_ROOT, env=env,
+                   capture_output=True, check=True)
+
+    results = {}
+    for module in MODULES:
+        try:
+            results[f"import {module}"] = _summarize(
+                [_run(_IMPORT_SNIPPET.format(module=module), env) for _ in range(args.repeat)])
+        except subprocess.CalledProcessError as e:
+            results[f"import {module}"] = {"error": e.stderr.strip().splitlines()[-1]}
+
+    if not args.skip_app:
+        app_path = os.path.join(REPO_ROOT, "app.py")
+        try:
+            results["app.py first run"] = _summarize(
+                [_run(_APP_SNIPPET.format(app_path=app_path), env) for _ in range(args.repeat)])
+        except subprocess.CalledProcessError as e:
+            results["app.py first run"] = {"error": e.stderr.strip().splitlines()[-1]}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'measurement':<28}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for name, summary in results.items():
+        if "error" in summary:
+            print(f"{name:<28}  error: {summary['error']}")
+        else:
+            print(f"{name:<28}{summary['median_ms']:>12}{summary['min_ms']:>10}{summary['max_ms']:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Synthetic resume / job description corpus for the benchmarks
+
+Everything is generated from a seed, so every run (and every machine) sees
+the same documents. Resumes come back as file bytes in TXT or DOCX form so
+the parser is exercised the same way as for uploads.
+"""
+import io
+import random
+
+SKILLS = [
+    "Python", "Java", "Go", "TypeScript", "JavaScript", "C++", "Rust", "SQL", "PostgreSQL", "MySQL",
+    "Redis", "Kafka", "Django", "Flask", "FastAPI", "Spring Boot", "React", "Node.js", "GraphQL", "REST",
+    "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Terraform", "CI/CD", "Linux", "Git", "Microservices",
+    "Machine Learning", "PyTorch", "TensorFlow", "Pandas", "Spark", "Airflow", "Elasticsearch", "gRPC",
+]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Backend Engineer", "Full Stack Developer",
+          "Data Engineer", "Platform Engineer", "Site Reliability Engineer", "Machine Learning Engineer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Vandelay Industries", "Stark Systems",
+             "Wayne Analytics", "Soylent Cloud", "Tyrell Software"]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Nguyen", "Garcia", "Smith", "Kowalski", "Okafor", "Tanaka", "Silva", "Müller", "Haddad", "Patel"]
+ACHIEVEMENTS = [
+    "Designed and shipped {skill} services handling {n}k requests per second",
+    "Cut p99 latency by {n}% by profiling and reworking {skill} hot paths",
+    "Led a team of {n} engineers migrating legacy systems to {skill}",
+    "Built {skill} data pipelines processing {n} million events per day",
+    "Introduced {skill} tooling that reduced deployment time by {n}%",
+    "Mentored {n} junior engineers and ran {skill} design reviews",
+]
+
+def _resume_sections(rng, index):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(6, 14))
+    sections = [
+        (None, [name, f"{rng.choice(TITLES)} | candidate{index}@example.com | +1 555 {index:04d}"]),
+        ("Summary", [f"Engineer with {rng.randint(1, 15)} years of experience building production systems "
+                     f"with {', '.join(skills[:3])}."]),
+        ("Skills", [', '.join(skills)]),
+    ]
+    experience = []
+    for _ in range(rng.randint(2, 5)):
+        start = rng.randint(2008, 2021)
+        experience.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        for _ in range(rng.randint(2, 5)):
+            experience.append("- " + rng.choice(ACHIEVEMENTS).format(skill=rng.choice(skills), n=rng.randint(2, 90)))
+    sections.append(("Experience", experience))
+    sections.append(("Education", [f"B.Sc. Computer Science, State University ({rng.randint(2000, 2018)})"]))
+    return sections
+
+def _to_txt(sections):
+    lines = []
+    for heading, body in sections:
+        if heading:
+            lines.extend(["", heading.upper()])
+        lines.extend(body)
+    return '\n'.join(lines).encode('utf-8')
+
+def _to_docx(sections):
+    import docx
+
+    document = docx.Document()
+    for heading, body in sections:
+        if heading:
+            document.add_heading(heading, level=2)
+        for line in body:
+            document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def synthetic_resumes(count, seed=42, docx_share=0.5):
+    """
+    Generate resume files
+
+    Args:
+        count (int): Number of resumes
+        seed (int): Random seed
+        docx_share (float): Fraction of resumes produced as DOCX (the rest are TXT)
+
+    Returns:
+        list: (file name, file bytes, format) tuples, format being "txt" or "docx"
+    """
+    rng = random.Random(seed)
+    resumes = []
+    for index in range(count):
+        sections = _resume_sections(rng, index)
+        if rng.random() < docx_share:
+            resumes.append((f"resume_{index:05d}.docx", _to_docx(sections), "docx"))
+        else:
+            resumes.append((f"resume_{index:05d}.txt", _to_txt(sections), "txt"))
+    return resumes
+
+def synthetic_job_descriptions(count=5, seed=42):
+    """
+    Generate job descriptions
+
+    Args:
+        count (int): Number of job descriptions
+        seed (int): Random seed
+
+    Returns:
+        list: Job description texts
+    """
+    rng = random.Random(seed + 1)
+    descriptions = []
+    for _ in range(count):
+        required = rng.sample(SKILLS, 6)
+        nice = rng.sample([skill for skill in SKILLS if skill not in required], 3)
+        descriptions.append(
+            f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)}\n\n"
+            f"We are looking for an engineer with {rng.randint(2, 8)}+ years of experience to build and operate "
+            f"our core platform.\n\nRequirements:\n" + '\n'.join(f"- {skill}" for skill in required) +
+            "\n\nNice to have:\n" + '\n'.join(f"- {skill}" for skill in nice)
+        )
+    return descriptions
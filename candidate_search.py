@@ -0,0 +1,253 @@
+import os
+import re
+import gzip
+import json
+import math
+import heapq
+import hashlib
+import tempfile
+import threading
+from collections import Counter
+
+# Where the search index is persisted between runs
+CANDIDATE_INDEX_PATH = os.environ.get("CANDIDATE_INDEX_PATH", "candidate_index.json.gz")
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Rows fetched per database round-trip when catching the index up
+SYNC_BATCH_SIZE = 500
+
+PREVIEW_CHARS = 200
+
+# Keeps skill-like tokens intact: "c++", "c#", "node.js", "ci/cd" split on "/"
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[+#]+|(?:\.[a-z0-9]+)+)?")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the to was were will with
+we you your our us they their this these those i me my he she his her them who what which
+""".split())
+
+def tokenize(text):
+    """
+    Split text into lower-case search terms
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list: Terms with stopwords removed
+    """
+    return [token for token in _TOKEN_PATTERN.findall((text or '').lower()) if token not in _STOPWORDS]
+
+def content_hash(text):
+    """SHA-256 of whitespace-normalized text, used to deduplicate resumes"""
+    return hashlib.sha256(' '.join((text or '').split()).encode('utf-8')).hexdigest()
+
+class CandidateIndex:
+    """
+    Incrementally maintained inverted index with BM25 ranking
+
+    Each distinct resume (by normalized content hash) is indexed once; repeat
+    evaluations of the same resume are recorded against the existing document.
+    """
+
+    def __init__(self):
+        self.postings = {}  # term -> {doc id: term frequency}
+        self.documents = []  # doc id -> {"hash", "length", "evaluation_ids", "preview"}
+        self.hashes = {}  # content hash -> doc id
+        self.total_length = 0
+        self.last_evaluation_id = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add_document(self, evaluation_id, text):
+        """
+        Add a stored resume to the index
+
+        Args:
+            evaluation_id (int): Id of the evaluation row the text came from
+            text (str): Resume text
+
+        Returns:
+            bool: True if the text was new, False if it was a duplicate
+        """
+        with self._lock:
+            self.last_evaluation_id = max(self.last_evaluation_id, evaluation_id)
+            digest = content_hash(text)
+            doc_id = self.hashes.get(digest)
+            if doc_id is not None:
+                self.documents[doc_id]["evaluation_ids"].append(evaluation_id)
+                return False
+
+            terms = tokenize(text)
+            doc_id = len(self.documents)
+            self.hashes[digest] = doc_id
+            self.documents.append({
+                "hash": digest,
+                "length": len(terms),
+                "evaluation_ids": [evaluation_id],
+                "preview": ' '.join((text or '').split())[:PREVIEW_CHARS],
+            })
+            self.total_length += len(terms)
+            for term, frequency in Counter(terms).items():
+                self.postings.setdefault(term, {})[doc_id] = frequency
+            return True
+
+    def search(self, query, k=10):
+        """
+        Rank indexed resumes against a query with BM25
+
+        Args:
+            query (str): Query text, typically a job description
+            k (int): Number of results to return
+
+        Returns:
+            list: Result dicts with score, evaluation ids and a text preview, best first
+        """
+        with self._lock:
+            if not self.documents:
+                return []
+            document_count = len(self.documents)
+            average_length = self.total_length / document_count or 1.0
+            scores = {}
+
+            for term, query_frequency in Counter(tokenize(query)).items():
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.documents[doc_id]["length"] / average_length)
+                    term_score = idf * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + query_frequency * term_score
+
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [
+                {
+                    "score": round(score, 3),
+                    "evaluation_id": self.documents[doc_id]["evaluation_ids"][-1],
+                    "evaluation_ids": list(self.documents[doc_id]["evaluation_ids"]),
+                    "preview": self.documents[doc_id]["preview"],
+                }
+                for doc_id, score in best
+            ]
+
+    def sync(self, batch_size=SYNC_BATCH_SIZE):
+        """
+        Index evaluations stored since the last sync
+
+        Args:
+            batch_size (int): Rows fetched per database query
+
+        Returns:
+            int: Number of evaluation rows processed
+        """
+        from database import get_resume_texts_after
+
+        processed = 0
+        with self._lock:
+            while True:
+                rows = get_resume_texts_after(self.last_evaluation_id, limit=batch_size)
+                for evaluation_id, text in rows:
+                    self.add_document(evaluation_id, text)
+                processed += len(rows)
+                if len(rows) < batch_size:
+                    return processed
+
+    def save(self, path=CANDIDATE_INDEX_PATH):
+        """
+        Persist the index as gzip-compressed JSON
+
+        Args:
+            path (str): Destination file
+        """
+        with self._lock:
+            data = {
+                "last_evaluation_id": self.last_evaluation_id,
+                "total_length": self.total_length,
+                # Copies, so writing the file outside the lock sees a consistent snapshot
+                "documents": [dict(document, evaluation_ids=list(document["evaluation_ids"]))
+                              for document in self.documents],
+                # JSON object keys must be strings
+                "postings": {term: {str(doc_id): tf for doc_id, tf in docs.items()} for term, docs in self.postings.items()},
+            }
+        # A unique temp file per save, so concurrent saves (other sessions or
+        # processes) never write into the same file before it is renamed
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".candidate_index_")
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as file:
+                json.dump(data, file, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path=CANDIDATE_INDEX_PATH):
+        """
+        Load a persisted index, or return an empty one if the file is missing
+
+        Args:
+            path (str): Index file
+
+        Returns:
+            CandidateIndex: The loaded index
+        """
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            data = json.load(file)
+        index.last_evaluation_id = data["last_evaluation_id"]
+        index.total_length = data["total_length"]
+        index.documents = data["documents"]
+        index.hashes = {document["hash"]: doc_id for doc_id, document in enumerate(index.documents)}
+        index.postings = {term: {int(doc_id): tf for doc_id, tf in docs.items()} for term, docs in data["postings"].items()}
+        return index
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_candidate_index():
+    """
+    Get the process-wide candidate index, loading it from disk on first use
+
+    Returns:
+        CandidateIndex: The shared index
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = CandidateIndex.load()
+                except Exception:
+                    # A corrupt index file is rebuilt from the database
+                    _index = CandidateIndex()
+    return _index
+
+def search_candidates(job_description, k=10):
+    """
+    Rank previously evaluated candidates against a job description
+
+    The index is first caught up with evaluations stored since the last
+    search, then queried locally; no LLM calls are made.
+
+    Args:
+        job_description (str): The job description text
+        k (int): Number of candidates to return
+
+    Returns:
+        list: Result dicts with score, evaluation ids and a text preview, best first
+    """
+    try:
+        index = get_candidate_index()
+        if index.sync():
+            index.save()
+        return index.search(job_description, k)
+    except Exception as e:
+        raise Exception(f"Error searching candidates: {str(e)}")
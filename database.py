@@ -1,24 +1,66 @@
 import os
+import sys
 import datetime
 import json
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Text, MetaData, Table
+import threading
+import time
+import zlib
+import hashlib
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import create_engine, insert, inspect, text, bindparam, tuple_, Column, Index, Integer, String, Date, DateTime, Float, Text, LargeBinary, MetaData, Table
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
+import metrics
 
 # Get database URL from environment variables
 DATABASE_URL = os.environ.get("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable not found.")
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Connection pool settings (per process)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))  # seconds before a connection is replaced
+DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", "10"))
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+# Rows written per transaction by the bulk store helpers
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", "500"))
+
+# Background jobs: seconds a claimed job stays invisible to other workers
+# without a heartbeat, and attempts before a job is marked failed
+JOB_VISIBILITY_TIMEOUT = int(os.environ.get("JOB_VISIBILITY_TIMEOUT", "300"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+
 Base = declarative_base()
 
+# Define Document model: each distinct text is stored once, compressed
+class Document(Base):
+    __tablename__ = 'documents'
+    
+    sha256 = Column(String(64), primary_key=True)  # SHA-256 of the UTF-8 text
+    content = Column(LargeBinary)  # zlib-compressed UTF-8 text
+    size = Column(Integer)  # Uncompressed length in bytes
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Document(sha256={self.sha256[:12]}, size={self.size})>"
+    
+    @property
+    def text(self):
+        """Decompress the stored text"""
+        return _decompress_text(self.content)
+
 # Define Resume Evaluation model
 class ResumeEvaluation(Base):
     __tablename__ = 'resume_evaluations'
     
     id = Column(Integer, primary_key=True)
+    resume_sha256 = Column(String(64), index=True)  # documents.sha256 of the resume text
+    job_description_sha256 = Column(String(64), index=True)  # documents.sha256 of the job description
+    # Legacy full-text copies; emptied by `python database.py migrate`
     resume_text = Column(Text)
     job_description = Column(Text)
     result_json = Column(Text)  # Store the full result as JSON
@@ -26,6 +68,12 @@ class ResumeEvaluation(Base):
     recommendation = Column(String(20))  # Strong/Moderate/Weak Fit
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
     
+    # Keyset pagination of the history, newest first, optionally by recommendation
+    __table_args__ = (
+        Index('ix_resume_evaluations_timestamp_id', 'timestamp', 'id'),
+        Index('ix_resume_evaluations_recommendation_timestamp_id', 'recommendation', 'timestamp', 'id'),
+    )
+    
     def __repr__(self):
         return f"<ResumeEvaluation(id={self.id}, score={self.overall_match_score}, recommendation='{self.recommendation}')>"
     
@@ -47,6 +95,12 @@ class EmployeeSentiment(Base):
     attrition_risk = Column(String(10))  # High/Medium/Low
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
     
+    # Keyset pagination of the history, newest first, optionally by risk
+    __table_args__ = (
+        Index('ix_employee_sentiments_timestamp_id', 'timestamp', 'id'),
+        Index('ix_employee_sentiments_attrition_risk_timestamp_id', 'attrition_risk', 'timestamp', 'id'),
+    )
+    
     def __repr__(self):
         return f"<EmployeeSentiment(id={self.id}, score={self.sentiment_score}, risk='{self.attrition_risk}')>"
     
@@ -57,11 +111,311 @@ class EmployeeSentiment(Base):
             return json.loads(self.result_json)
         return {}
 
-# Create tables if they don't exist
-Base.metadata.create_all(engine)
+# Define LLM result cache model
+class LLMResultCache(Base):
+    __tablename__ = 'llm_result_cache'
+    
+    cache_key = Column(String(64), primary_key=True)  # SHA-256 of normalized inputs, model and prompt version
+    kind = Column(String(30), index=True)  # resume_evaluation / sentiment_analysis
+    model_name = Column(String(50))
+    prompt_version = Column(String(20))
+    result_json = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+    
+    def __repr__(self):
+        return f"<LLMResultCache(key={self.cache_key[:12]}, kind='{self.kind}', model='{self.model_name}')>"
+
+# Attrition analytics rollups, updated in the same transaction as each sentiment insert
+class SentimentRollup(Base):
+    __tablename__ = 'sentiment_rollups'
+    
+    period = Column(String(4), primary_key=True)  # day / week
+    period_start = Column(Date, primary_key=True)  # the day, or the Monday of the week
+    attrition_risk = Column(String(10), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<SentimentRollup({self.period} {self.period_start}, risk='{self.attrition_risk}', count={self.count})>"
+
+class SentimentScoreBucket(Base):
+    __tablename__ = 'sentiment_score_histogram'
+    
+    bucket = Column(Integer, primary_key=True)  # sentiment score rounded to 1-10
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<SentimentScoreBucket(bucket={self.bucket}, count={self.count})>"
+
+class SentimentConcernCount(Base):
+    __tablename__ = 'sentiment_concern_counts'
+    
+    concern = Column(String(200), primary_key=True)  # lower-cased, whitespace-normalized concern
+    label = Column(String(200))  # the concern as first written
+    count = Column(Integer, nullable=False, default=0, index=True)
+    
+    def __repr__(self):
+        return f"<SentimentConcernCount(concern='{self.concern}', count={self.count})>"
+
+# Durable background job queue, drained by worker.py
+class Job(Base):
+    __tablename__ = 'jobs'
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)  # resume_evaluation / sentiment_analysis
+    payload_json = Column(Text)
+    status = Column(String(20), nullable=False, default="queued")  # queued / running / succeeded / failed
+    result_json = Column(Text)
+    error = Column(Text)  # Last failure message
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=JOB_MAX_ATTEMPTS)
+    # Queued: earliest time the job may run; running: when the worker's lease expires
+    available_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    locked_by = Column(String(100))  # Worker holding the lease
+    record_id = Column(Integer)  # Id of the stored evaluation / sentiment row
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    
+    # Claim scan: runnable jobs in order
+    __table_args__ = (
+        Index('ix_jobs_status_available_at', 'status', 'available_at'),
+    )
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}', attempts={self.attempts})>"
+
+def document_hash(text):
+    """
+    Content address of a text
+    
+    Args:
+        text (str): The text
+        
+    Returns:
+        str: Hex SHA-256 of the UTF-8 encoded text
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
-# Create a session factory
-Session = sessionmaker(bind=engine)
+def _compress_text(text):
+    return zlib.compress(text.encode('utf-8'), 6)
+
+def _decompress_text(content):
+    if content is None:
+        return None
+    return zlib.decompress(content).decode('utf-8')
+
+# Session factory; bound to the engine when it is first created.
+# Objects stay readable after the session closes since helpers return them.
+Session = sessionmaker(expire_on_commit=False)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def _engine_options(database_url):
+    """Pool and timeout options appropriate for the database backend"""
+    options = {
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    backend = make_url(database_url).get_backend_name()
+    if backend == "postgresql":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            connect_args={
+                "connect_timeout": DB_CONNECT_TIMEOUT,
+                "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}",
+            },
+        )
+    elif backend == "sqlite":
+        # SQLite has no statement timeout; wait on locks instead of failing immediately
+        options["connect_args"] = {"timeout": DB_CONNECT_TIMEOUT}
+    return options
+
+def get_engine():
+    """
+    Get the process-wide SQLAlchemy engine, creating it on first use
+    
+    Returns:
+        sqlalchemy.engine.Engine: The shared pooled engine
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if not DATABASE_URL:
+                    raise ValueError("DATABASE_URL environment variable not found.")
+                _engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+                Session.configure(bind=_engine)
+    return _engine
+
+def get_session():
+    """Create a new session bound to the shared engine"""
+    get_engine()
+    return Session()
+
+@contextmanager
+def session_scope():
+    """
+    Provide a transactional session that commits on success
+    
+    The transaction is rolled back if the block raises, and the session is
+    always closed so its connection goes back to the pool.
+    
+    Yields:
+        sqlalchemy.orm.Session: The session
+    """
+    session = get_session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def _upgrade_table(engine, model):
+    """Add columns and indexes missing from an existing table (create_all only creates new tables)"""
+    table = model.__table__
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    missing = [column for column in table.columns if column.name not in existing]
+    if missing:
+        with engine.begin() as connection:
+            for column in missing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    for index in table.indexes:
+        index.create(engine, checkfirst=True)
+
+def _backfill_evaluation_documents(batch_size=BULK_CHUNK_SIZE):
+    """
+    Move legacy inline resume / job description texts into the documents table
+    
+    Rows are converted in id order, one transaction per batch, so the
+    migration can be interrupted and re-run.
+    
+    Returns:
+        int: Number of evaluations converted
+    """
+    converted = 0
+    last_id = 0
+    while True:
+        with session_scope() as session:
+            rows = session.query(
+                ResumeEvaluation.id, ResumeEvaluation.resume_text, ResumeEvaluation.job_description
+            ).filter(
+                ResumeEvaluation.id > last_id,
+                (ResumeEvaluation.resume_text.isnot(None)) | (ResumeEvaluation.job_description.isnot(None))
+            ).order_by(ResumeEvaluation.id).limit(batch_size).all()
+            if not rows:
+                return converted
+            hashes = _store_documents(session, [
+                value for row in rows for value in (row.resume_text, row.job_description)
+            ])
+            session.execute(
+                ResumeEvaluation.__table__.update().where(
+                    ResumeEvaluation.id == bindparam("row_id")
+                ).values(
+                    resume_sha256=bindparam("resume_hash"),
+                    job_description_sha256=bindparam("job_description_hash"),
+                    resume_text=None,
+                    job_description=None
+                ),
+                [
+                    {
+                        "row_id": row.id,
+                        "resume_hash": hashes.get(row.resume_text),
+                        "job_description_hash": hashes.get(row.job_description),
+                    }
+                    for row in rows
+                ]
+            )
+            last_id = rows[-1].id
+            converted += len(rows)
+
+def migrate():
+    """
+    Create any missing tables and columns and convert legacy rows
+    
+    Schema changes are applied by this explicit step (run
+    `python database.py migrate` before starting the app) rather than on import.
+    Sentiment rollups are built from existing analyses the first time, and
+    the jobs table used by worker.py is created with the rest.
+    Evaluations stored before the documents table existed have their texts
+    moved into it; on Postgres run VACUUM afterwards to reclaim the space.
+    """
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    _upgrade_table(engine, ResumeEvaluation)
+    _upgrade_table(engine, EmployeeSentiment)
+    _backfill_evaluation_documents()
+    with session_scope() as session:
+        needs_rollups = session.query(SentimentRollup.period).first() is None and \
+            session.query(EmployeeSentiment.id).first() is not None
+    if needs_rollups:
+        rebuild_sentiment_rollups()
+
+def _dialect_insert(session):
+    """The backend's INSERT ... ON CONFLICT construct, or None if it has none"""
+    backend = session.get_bind().dialect.name
+    if backend == "postgresql":
+        return postgresql.insert
+    if backend == "sqlite":
+        return sqlite.insert
+    return None
+
+def _store_documents(session, texts):
+    """
+    Store texts in the documents table, skipping ones already present
+    
+    Args:
+        session (sqlalchemy.orm.Session): Session whose transaction the insert joins
+        texts (iterable): Texts to store; None entries are ignored
+        
+    Returns:
+        dict: Text -> SHA-256 for every stored text
+    """
+    hashes = {}
+    rows = {}
+    for value in texts:
+        if value is None or value in hashes:
+            continue
+        digest = document_hash(value)
+        hashes[value] = digest
+        if digest not in rows:
+            rows[digest] = {"sha256": digest, "content": _compress_text(value), "size": len(value.encode('utf-8'))}
+    if not rows:
+        return hashes
+
+    dialect_insert = _dialect_insert(session)
+    if dialect_insert is not None:
+        session.execute(dialect_insert(Document).on_conflict_do_nothing(index_elements=["sha256"]), list(rows.values()))
+    else:
+        existing = {digest for (digest,) in session.query(Document.sha256).filter(Document.sha256.in_(list(rows)))}
+        missing = [row for digest, row in rows.items() if digest not in existing]
+        if missing:
+            session.execute(insert(Document), missing)
+    return hashes
+
+def get_document_text(sha256):
+    """
+    Get a stored text by its content address
+    
+    Args:
+        sha256 (str): The document hash
+        
+    Returns:
+        str: The text, or None if no such document exists
+    """
+    try:
+        with session_scope() as session:
+            document = session.get(Document, sha256)
+            return document.text if document is not None else None
+    except Exception as e:
+        raise Exception(f"Error retrieving document: {str(e)}")
 
 def store_resume_evaluation(resume_text, job_description, result):
     """
@@ -76,28 +430,11 @@ def store_resume_evaluation(resume_text, job_description, result):
         ResumeEvaluation: The stored evaluation record
     """
     try:
-        session = Session()
-        
-        # Create a new evaluation record
-        evaluation = ResumeEvaluation(
-            resume_text=resume_text,
-            job_description=job_description,
-            result_json=json.dumps(result),
-            overall_match_score=result.get('overall_match_score', 0),
-            recommendation=result.get('recommendation', 'Unknown')
-        )
-        
-        # Add and commit to database
-        session.add(evaluation)
-        session.commit()
-        
+        with metrics.span("db_write", operation="resume_evaluation"), session_scope() as session:
+            evaluation = _add_resume_evaluation(session, resume_text, job_description, result)
         return evaluation
-        
     except Exception as e:
-        session.rollback()
         raise Exception(f"Error storing resume evaluation: {str(e)}")
-    finally:
-        session.close()
 
 def get_resume_evaluations(limit=10):
     """
@@ -110,15 +447,120 @@ def get_resume_evaluations(limit=10):
         list: List of ResumeEvaluation objects
     """
     try:
-        session = Session()
-        evaluations = session.query(ResumeEvaluation).order_by(
-            ResumeEvaluation.timestamp.desc()
-        ).limit(limit).all()
-        return evaluations
+        with session_scope() as session:
+            return session.query(ResumeEvaluation).order_by(
+                ResumeEvaluation.timestamp.desc()
+            ).limit(limit).all()
     except Exception as e:
         raise Exception(f"Error retrieving resume evaluations: {str(e)}")
-    finally:
-        session.close()
+
+def get_resume_texts_after(after_id=0, limit=500):
+    """
+    Get stored resume texts in id order, for incremental indexing
+    
+    Args:
+        after_id (int): Only return evaluations with a larger id
+        limit (int): Maximum number of rows to return
+        
+    Returns:
+        list: List of (evaluation id, resume text) tuples
+    """
+    try:
+        with session_scope() as session:
+            rows = session.query(
+                ResumeEvaluation.id, ResumeEvaluation.resume_text, Document.content
+            ).outerjoin(
+                Document, Document.sha256 == ResumeEvaluation.resume_sha256
+            ).filter(
+                ResumeEvaluation.id > after_id
+            ).order_by(ResumeEvaluation.id).limit(limit).all()
+            # Rows not yet converted by migrate() still carry the text inline
+            return [(row.id, _decompress_text(row.content) if row.content is not None else row.resume_text)
+                    for row in rows]
+    except Exception as e:
+        raise Exception(f"Error retrieving resume texts: {str(e)}")
+
+def get_evaluations_for_resume(resume_text, job_description=None, limit=10):
+    """
+    Get previous evaluations of exactly this resume text
+    
+    Args:
+        resume_text (str): The resume text
+        job_description (str): Only return evaluations against this job description
+        limit (int): Maximum number of records to retrieve
+        
+    Returns:
+        list: List of ResumeEvaluation objects, newest first
+    """
+    try:
+        with session_scope() as session:
+            query = session.query(ResumeEvaluation).filter(
+                ResumeEvaluation.resume_sha256 == document_hash(resume_text)
+            )
+            if job_description is not None:
+                query = query.filter(ResumeEvaluation.job_description_sha256 == document_hash(job_description))
+            return query.order_by(ResumeEvaluation.timestamp.desc()).limit(limit).all()
+    except Exception as e:
+        raise Exception(f"Error retrieving resume evaluations: {str(e)}")
+
+def _history_page(session, model, columns, filters, cursor, limit):
+    """
+    One page of a history table, newest first, using keyset pagination
+    
+    Rows are ordered by (timestamp, id) and the page starts strictly after the
+    cursor, so each page is an index range scan however deep it is.
+    
+    Returns:
+        tuple: (list of dicts with the result JSON decoded, cursor for the next page or None)
+    """
+    query = session.query(model.id, model.timestamp, *columns, model.result_json).filter(*filters)
+    if cursor is not None:
+        query = query.filter(tuple_(model.timestamp, model.id) < tuple_(*cursor))
+    rows = query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1).all()
+
+    items = []
+    for row in rows[:limit]:
+        item = row._asdict()
+        result_json = item.pop("result_json")
+        item["result"] = json.loads(result_json) if result_json else {}
+        items.append(item)
+    next_cursor = (rows[limit - 1].timestamp, rows[limit - 1].id) if len(rows) > limit else None
+    return items, next_cursor
+
+def get_evaluation_history(limit=20, cursor=None, min_score=None, max_score=None, recommendations=None):
+    """
+    Get a page of resume evaluation summaries, newest first
+    
+    Only the summary columns and the result JSON are read; the resume and job
+    description texts are not loaded.
+    
+    Args:
+        limit (int): Page size
+        cursor (tuple): next_cursor returned for the previous page (None for the first page)
+        min_score (float): Only include evaluations scoring at least this
+        max_score (float): Only include evaluations scoring at most this
+        recommendations (list): Only include these recommendations
+        
+    Returns:
+        tuple: (list of dicts with id, timestamp, overall_match_score, recommendation
+        and the decoded result, cursor for the next page or None)
+    """
+    filters = []
+    if min_score is not None:
+        filters.append(ResumeEvaluation.overall_match_score >= min_score)
+    if max_score is not None:
+        filters.append(ResumeEvaluation.overall_match_score <= max_score)
+    if recommendations:
+        filters.append(ResumeEvaluation.recommendation.in_(list(recommendations)))
+    try:
+        with session_scope() as session:
+            return _history_page(
+                session, ResumeEvaluation,
+                (ResumeEvaluation.overall_match_score, ResumeEvaluation.recommendation),
+                filters, cursor, limit
+            )
+    except Exception as e:
+        raise Exception(f"Error retrieving evaluation history: {str(e)}")
 
 def store_sentiment_analysis(feedback_text, result):
     """
@@ -132,27 +574,11 @@ def store_sentiment_analysis(feedback_text, result):
         EmployeeSentiment: The stored sentiment record
     """
     try:
-        session = Session()
-        
-        # Create a new sentiment record
-        sentiment = EmployeeSentiment(
-            feedback_text=feedback_text,
-            result_json=json.dumps(result),
-            sentiment_score=result.get('sentiment_score', 0),
-            attrition_risk=result.get('attrition_risk', 'Unknown')
-        )
-        
-        # Add and commit to database
-        session.add(sentiment)
-        session.commit()
-        
+        with metrics.span("db_write", operation="sentiment_analysis"), session_scope() as session:
+            sentiment = _add_sentiment_analysis(session, feedback_text, result)
         return sentiment
-        
     except Exception as e:
-        session.rollback()
         raise Exception(f"Error storing sentiment analysis: {str(e)}")
-    finally:
-        session.close()
 
 def get_sentiment_analyses(limit=10):
     """
@@ -165,12 +591,758 @@ def get_sentiment_analyses(limit=10):
         list: List of EmployeeSentiment objects
     """
     try:
-        session = Session()
-        sentiments = session.query(EmployeeSentiment).order_by(
-            EmployeeSentiment.timestamp.desc()
-        ).limit(limit).all()
-        return sentiments
+        with session_scope() as session:
+            return session.query(EmployeeSentiment).order_by(
+                EmployeeSentiment.timestamp.desc()
+            ).limit(limit).all()
     except Exception as e:
         raise Exception(f"Error retrieving sentiment analyses: {str(e)}")
-    finally:
-        session.close()
\ No newline at end of file
+
+def _add_resume_evaluation(session, resume_text, job_description, result):
+    """Add an evaluation, and its documents, to the session's transaction"""
+    hashes = _store_documents(session, [resume_text, job_description])
+    evaluation = ResumeEvaluation(**_evaluation_row(resume_text, job_description, result, hashes))
+    session.add(evaluation)
+    return evaluation
+
+def _add_sentiment_analysis(session, feedback_text, result):
+    """Add a sentiment analysis, and its rollup increments, to the session's transaction"""
+    sentiment = EmployeeSentiment(**_sentiment_row(feedback_text, result))
+    session.add(sentiment)
+    _update_sentiment_rollups(session, [(sentiment.timestamp, sentiment.sentiment_score,
+                                         sentiment.attrition_risk, result)])
+    return sentiment
+
+def _evaluation_row(resume_text, job_description, result, hashes):
+    return {
+        "resume_sha256": hashes.get(resume_text),
+        "job_description_sha256": hashes.get(job_description),
+        "result_json": json.dumps(result),
+        "overall_match_score": result.get('overall_match_score', 0),
+        "recommendation": result.get('recommendation', 'Unknown'),
+    }
+
+def _sentiment_row(feedback_text, result):
+    return {
+        # Set here rather than by the column default so the rollups use the same time
+        "timestamp": datetime.datetime.utcnow(),
+        "feedback_text": feedback_text,
+        "result_json": json.dumps(result),
+        "sentiment_score": result.get('sentiment_score', 0),
+        "attrition_risk": result.get('attrition_risk', 'Unknown'),
+    }
+
+def _bulk_insert(model, items, chunk_size, to_rows):
+    """
+    Insert items in chunks, one transaction per chunk
+    
+    Each chunk is a single executemany INSERT ... RETURNING, which SQLAlchemy
+    sends as batched multi-row VALUES statements on Postgres and SQLite.
+    
+    Args:
+        model: Mapped class to insert into
+        items (iterable): Items to store
+        chunk_size (int): Items per transaction
+        to_rows (callable): (session, chunk of items) -> list of row dicts
+    
+    Returns:
+        list: Generated ids in input order
+    """
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    ids = []
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            with session_scope() as session:
+                ids.extend(session.scalars(statement, to_rows(session, chunk)).all())
+            chunk = []
+    if chunk:
+        with session_scope() as session:
+            ids.extend(session.scalars(statement, to_rows(session, chunk)).all())
+    return ids
+
+def _as_kwargs(item, names):
+    return item if isinstance(item, dict) else dict(zip(names, item))
+
+def store_resume_evaluations_bulk(evaluations, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Store many resume evaluation results with batched inserts
+    
+    Args:
+        evaluations (iterable): Dicts with resume_text, job_description and result
+            keys, or (resume_text, job_description, result) tuples
+        chunk_size (int): Rows per INSERT / transaction
+        
+    Returns:
+        list: Ids of the stored evaluations, in input order
+    """
+    names = ("resume_text", "job_description", "result")
+
+    def to_rows(session, chunk):
+        hashes = _store_documents(session, [
+            value for item in chunk for value in (item["resume_text"], item["job_description"])
+        ])
+        return [_evaluation_row(hashes=hashes, **item) for item in chunk]
+
+    try:
+        with metrics.span("db_write", operation="resume_evaluations_bulk"):
+            return _bulk_insert(
+                ResumeEvaluation,
+                (_as_kwargs(item, names) for item in evaluations),
+                chunk_size,
+                to_rows
+            )
+    except Exception as e:
+        raise Exception(f"Error storing resume evaluations: {str(e)}")
+
+def store_sentiment_analyses_bulk(analyses, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Store many sentiment analysis results with batched inserts
+    
+    Args:
+        analyses (iterable): Dicts with feedback_text and result keys,
+            or (feedback_text, result) tuples
+        chunk_size (int): Rows per INSERT / transaction
+        
+    Returns:
+        list: Ids of the stored sentiment records, in input order
+    """
+    names = ("feedback_text", "result")
+
+    def to_rows(session, chunk):
+        rows = [_sentiment_row(**item) for item in chunk]
+        _update_sentiment_rollups(session, [
+            (row["timestamp"], row["sentiment_score"], row["attrition_risk"], item["result"])
+            for row, item in zip(rows, chunk)
+        ])
+        return rows
+
+    try:
+        with metrics.span("db_write", operation="sentiment_analyses_bulk"):
+            return _bulk_insert(
+                EmployeeSentiment,
+                (_as_kwargs(item, names) for item in analyses),
+                chunk_size,
+                to_rows
+            )
+    except Exception as e:
+        raise Exception(f"Error storing sentiment analyses: {str(e)}")
+
+class BulkWriter:
+    """
+    Buffered sink that batch pipelines can stream results into
+    
+    Items are buffered and written with one of the bulk store helpers when
+    the buffer reaches batch_size, when the oldest buffered item is older
+    than flush_interval seconds (a background timer flushes it even if no
+    further item arrives), on flush(), and when used as a context manager,
+    on exit. Safe to share between threads.
+    
+    Example:
+        with BulkWriter(store_sentiment_analyses_bulk) as writer:
+            for feedback_text, result in results:
+                writer.add(feedback_text=feedback_text, result=result)
+        stored_ids = writer.ids
+    """
+
+    def __init__(self, store_bulk, batch_size=BULK_CHUNK_SIZE, flush_interval=None):
+        """
+        Args:
+            store_bulk (callable): store_resume_evaluations_bulk or store_sentiment_analyses_bulk
+            batch_size (int): Buffered items that trigger a write
+            flush_interval (float): Maximum seconds an item may wait in the buffer (None to disable)
+        """
+        self.store_bulk = store_bulk
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ids = []
+        self._buffer = []
+        self._oldest = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, *args, **kwargs):
+        """
+        Buffer one item, writing the buffer if it is due
+        
+        Accepts the same arguments as the matching single-row store_* helper,
+        either all positional or all by keyword.
+        
+        Returns:
+            list: Ids written by this call (empty if the item was only buffered)
+        """
+        if args and kwargs:
+            raise TypeError("BulkWriter.add() takes positional or keyword arguments, not both")
+        with self._lock:
+            self._buffer.append(kwargs if kwargs else args)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = len(self._buffer) >= self.batch_size or (
+                self.flush_interval is not None and time.monotonic() - self._oldest >= self.flush_interval
+            )
+            if due:
+                return self._flush_locked()
+            if self.flush_interval is not None and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_expired)
+                self._timer.daemon = True
+                self._timer.start()
+            return []
+
+    def flush(self):
+        """
+        Write everything currently buffered
+        
+        Returns:
+            list: Ids of the written rows
+        """
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self):
+        written = []
+        while self._buffer:
+            # One transaction per chunk; rows leave the buffer only once their
+            # chunk is stored, so after a failed write the next flush retries them
+            chunk = self._buffer[:self.batch_size]
+            ids = self.store_bulk(chunk, chunk_size=self.batch_size)
+            del self._buffer[:len(chunk)]
+            self.ids.extend(ids)
+            written.extend(ids)
+        self._oldest = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return written
+
+    def _flush_expired(self):
+        with self._lock:
+            self._timer = None
+            try:
+                self._flush_locked()
+            except Exception:
+                # Nobody is waiting on a timer flush; the rows stay buffered and
+                # the next add() or flush() retries them and raises to its caller
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
+
+def get_sentiment_history(limit=20, cursor=None, min_score=None, max_score=None, risks=None):
+    """
+    Get a page of sentiment analysis summaries, newest first
+    
+    Only the summary columns and the result JSON are read; the feedback text
+    is not loaded.
+    
+    Args:
+        limit (int): Page size
+        cursor (tuple): next_cursor returned for the previous page (None for the first page)
+        min_score (float): Only include analyses scoring at least this
+        max_score (float): Only include analyses scoring at most this
+        risks (list): Only include these attrition risk levels
+        
+    Returns:
+        tuple: (list of dicts with id, timestamp, sentiment_score, attrition_risk
+        and the decoded result, cursor for the next page or None)
+    """
+    filters = []
+    if min_score is not None:
+        filters.append(EmployeeSentiment.sentiment_score >= min_score)
+    if max_score is not None:
+        filters.append(EmployeeSentiment.sentiment_score <= max_score)
+    if risks:
+        filters.append(EmployeeSentiment.attrition_risk.in_(list(risks)))
+    try:
+        with session_scope() as session:
+            return _history_page(
+                session, EmployeeSentiment,
+                (EmployeeSentiment.sentiment_score, EmployeeSentiment.attrition_risk),
+                filters, cursor, limit
+            )
+    except Exception as e:
+        raise Exception(f"Error retrieving sentiment history: {str(e)}")
+
+def _rollup_risk(attrition_risk):
+    return str(attrition_risk or 'Unknown')[:10]
+
+def _score_bucket(score):
+    try:
+        return max(1, min(10, int(round(float(score)))))
+    except (TypeError, ValueError):
+        return None
+
+def _normalize_concern(concern):
+    label = ' '.join(str(concern).split()).rstrip('.')[:200]
+    return label.lower(), label
+
+def _upsert_counts(session, model, rows, keys, increments):
+    """
+    Add rows' increment columns onto existing rollup rows, inserting missing ones
+    
+    Rows are written in primary key order, on every backend.
+    
+    Args:
+        session (sqlalchemy.orm.Session): Session whose transaction the upsert joins
+        model: Rollup mapped class
+        rows (list): Row dicts with key and increment columns
+        keys (list): Primary key column names
+        increments (list): Column names added to on conflict
+    """
+    if not rows:
+        return
+    # Every transaction locks rollup rows in primary key order, so concurrent
+    # writers (app sessions, job workers) cannot deadlock on each other
+    rows = sorted(rows, key=lambda row: tuple(row[key] for key in keys))
+    dialect_insert = _dialect_insert(session)
+    if dialect_insert is not None:
+        statement = dialect_insert(model)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: getattr(model, column) + getattr(statement.excluded, column) for column in increments}
+        )
+        session.execute(statement, rows)
+        return
+    for row in rows:
+        existing = session.get(model, tuple(row[key] for key in keys))
+        if existing is None:
+            session.add(model(**row))
+        else:
+            for column in increments:
+                setattr(existing, column, getattr(existing, column) + row[column])
+
+def _update_sentiment_rollups(session, analyses):
+    """
+    Fold new sentiment analyses into the rollup tables
+    
+    Deltas are aggregated first so each rollup row is written once per call.
+    
+    Args:
+        session (sqlalchemy.orm.Session): Session of the transaction storing the analyses
+        analyses (list): (timestamp, sentiment score, attrition risk, result dict) tuples
+    """
+    periods = Counter()
+    score_sums = Counter()
+    buckets = Counter()
+    concerns = Counter()
+    labels = {}
+    for timestamp, score, attrition_risk, result in analyses:
+        day = (timestamp or datetime.datetime.utcnow()).date()
+        risk = _rollup_risk(attrition_risk)
+        for key in (("day", day, risk), ("week", day - datetime.timedelta(days=day.weekday()), risk)):
+            periods[key] += 1
+            score_sums[key] += float(score or 0)
+        bucket = _score_bucket(score)
+        if bucket is not None:
+            buckets[bucket] += 1
+        # A concern repeated within one analysis counts once
+        mentioned = dict(_normalize_concern(c) for c in reversed((result or {}).get('key_concerns') or []) if str(c).strip())
+        for concern, label in mentioned.items():
+            concerns[concern] += 1
+            labels.setdefault(concern, label)
+
+    _upsert_counts(session, SentimentRollup, [
+        {"period": period, "period_start": start, "attrition_risk": risk,
+         "count": count, "score_sum": score_sums[(period, start, risk)]}
+        for (period, start, risk), count in periods.items()
+    ], ["period", "period_start", "attrition_risk"], ["count", "score_sum"])
+    _upsert_counts(session, SentimentScoreBucket, [
+        {"bucket": bucket, "count": count} for bucket, count in buckets.items()
+    ], ["bucket"], ["count"])
+    _upsert_counts(session, SentimentConcernCount, [
+        {"concern": concern, "label": labels[concern], "count": count} for concern, count in concerns.items()
+    ], ["concern"], ["count"])
+
+def rebuild_sentiment_rollups(batch_size=BULK_CHUNK_SIZE):
+    """
+    Recompute the sentiment rollup tables from every stored analysis
+    
+    Used by migrate() to build the rollups for analyses stored before they
+    existed, and to repair them after manual edits to employee_sentiments.
+    
+    Args:
+        batch_size (int): Analyses read per query
+        
+    Returns:
+        int: Number of analyses folded into the rollups
+    """
+    try:
+        with session_scope() as session:
+            for model in (SentimentRollup, SentimentScoreBucket, SentimentConcernCount):
+                session.query(model).delete(synchronize_session=False)
+            processed = 0
+            last_id = 0
+            while True:
+                rows = session.query(
+                    EmployeeSentiment.id, EmployeeSentiment.timestamp, EmployeeSentiment.sentiment_score,
+                    EmployeeSentiment.attrition_risk, EmployeeSentiment.result_json
+                ).filter(EmployeeSentiment.id > last_id).order_by(EmployeeSentiment.id).limit(batch_size).all()
+                if not rows:
+                    return processed
+                _update_sentiment_rollups(session, [
+                    (row.timestamp, row.sentiment_score, row.attrition_risk,
+                     json.loads(row.result_json) if row.result_json else {})
+                    for row in rows
+                ])
+                last_id = rows[-1].id
+                processed += len(rows)
+    except Exception as e:
+        raise Exception(f"Error rebuilding sentiment rollups: {str(e)}")
+
+def get_sentiment_rollups(period="day", since=None):
+    """
+    Get sentiment counts per period and attrition risk from the rollups
+    
+    Args:
+        period (str): "day" or "week"
+        since (datetime.date): Only include periods starting on or after this date
+        
+    Returns:
+        list: Dicts with period_start, attrition_risk, count and average_score, oldest first
+    """
+    try:
+        with session_scope() as session:
+            query = session.query(SentimentRollup).filter(SentimentRollup.period == period)
+            if since is not None:
+                query = query.filter(SentimentRollup.period_start >= since)
+            return [
+                {
+                    "period_start": row.period_start,
+                    "attrition_risk": row.attrition_risk,
+                    "count": row.count,
+                    "average_score": row.score_sum / row.count if row.count else None,
+                }
+                for row in query.order_by(SentimentRollup.period_start, SentimentRollup.attrition_risk)
+            ]
+    except Exception as e:
+        raise Exception(f"Error retrieving sentiment rollups: {str(e)}")
+
+def get_sentiment_score_histogram():
+    """
+    Get the number of analyses per rounded sentiment score
+    
+    Returns:
+        dict: Score bucket (1-10) -> count, including empty buckets
+    """
+    try:
+        with session_scope() as session:
+            counts = dict(session.query(SentimentScoreBucket.bucket, SentimentScoreBucket.count))
+            return {bucket: counts.get(bucket, 0) for bucket in range(1, 11)}
+    except Exception as e:
+        raise Exception(f"Error retrieving sentiment score histogram: {str(e)}")
+
+def get_top_concerns(limit=15):
+    """
+    Get the most frequently recurring key concerns
+    
+    Args:
+        limit (int): Maximum number of concerns to return
+        
+    Returns:
+        list: (concern, count) tuples, most common first
+    """
+    try:
+        with session_scope() as session:
+            rows = session.query(SentimentConcernCount.label, SentimentConcernCount.count).order_by(
+                SentimentConcernCount.count.desc(), SentimentConcernCount.concern
+            ).limit(limit).all()
+            return [(row.label, row.count) for row in rows]
+    except Exception as e:
+        raise Exception(f"Error retrieving top concerns: {str(e)}")
+
+def get_cached_llm_result(cache_key):
+    """
+    Get an unexpired cached LLM result
+    
+    Args:
+        cache_key (str): The cache key
+        
+    Returns:
+        dict: The cached result, or None if missing or expired
+    """
+    try:
+        with session_scope() as session:
+            entry = session.get(LLMResultCache, cache_key)
+            if entry is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at <= datetime.datetime.utcnow():
+                return None
+            return json.loads(entry.result_json)
+    except Exception as e:
+        raise Exception(f"Error retrieving cached LLM result: {str(e)}")
+
+def store_cached_llm_result(cache_key, kind, model_name, prompt_version, result, ttl_seconds=None):
+    """
+    Store (or replace) a cached LLM result
+    
+    Args:
+        cache_key (str): The cache key
+        kind (str): Type of result, e.g. "resume_evaluation"
+        model_name (str): Model that produced the result
+        prompt_version (str): Version of the prompt template used
+        result (dict): The result dictionary
+        ttl_seconds (int): Seconds until the entry expires (None keeps it forever)
+    """
+    try:
+        with metrics.span("db_write", operation="llm_cache"), session_scope() as session:
+            now = datetime.datetime.utcnow()
+            session.merge(LLMResultCache(
+                cache_key=cache_key,
+                kind=kind,
+                model_name=model_name,
+                prompt_version=prompt_version,
+                result_json=json.dumps(result),
+                created_at=now,
+                expires_at=now + datetime.timedelta(seconds=ttl_seconds) if ttl_seconds else None
+            ))
+    except Exception as e:
+        raise Exception(f"Error storing cached LLM result: {str(e)}")
+
+def invalidate_llm_cache(cache_key=None, kind=None, model_name=None, expired_only=False):
+    """
+    Delete cached LLM results matching the given filters
+    
+    Args:
+        cache_key (str): Only delete this entry
+        kind (str): Only delete entries of this type
+        model_name (str): Only delete entries produced by this model
+        expired_only (bool): Only delete entries whose TTL has passed
+        
+    Returns:
+        int: Number of deleted entries
+    """
+    try:
+        with session_scope() as session:
+            query = session.query(LLMResultCache)
+            if cache_key is not None:
+                query = query.filter(LLMResultCache.cache_key == cache_key)
+            if kind is not None:
+                query = query.filter(LLMResultCache.kind == kind)
+            if model_name is not None:
+                query = query.filter(LLMResultCache.model_name == model_name)
+            if expired_only:
+                query = query.filter(LLMResultCache.expires_at <= datetime.datetime.utcnow())
+            return query.delete(synchronize_session=False)
+    except Exception as e:
+        raise Exception(f"Error invalidating LLM cache: {str(e)}")
+
+def _job_dict(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "payload": json.loads(job.payload_json) if job.payload_json else {},
+        "status": job.status,
+        "result": json.loads(job.result_json) if job.result_json else None,
+        "error": job.error,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "record_id": job.record_id,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+def enqueue_job(kind, payload, max_attempts=JOB_MAX_ATTEMPTS):
+    """
+    Add a job to the background queue
+    
+    Args:
+        kind (str): Job kind handled by worker.py, e.g. "resume_evaluation"
+        payload (dict): JSON-serializable job arguments
+        max_attempts (int): Attempts before the job is marked failed
+        
+    Returns:
+        int: The job id
+    """
+    try:
+        with session_scope() as session:
+            job = Job(kind=kind, payload_json=json.dumps(payload), status="queued", max_attempts=max_attempts)
+            session.add(job)
+            session.flush()
+            return job.id
+    except Exception as e:
+        raise Exception(f"Error enqueuing job: {str(e)}")
+
+def claim_jobs(worker_id, limit=1, visibility_timeout=JOB_VISIBILITY_TIMEOUT, kinds=None):
+    """
+    Lease runnable jobs to a worker
+    
+    Runnable jobs are queued ones whose retry delay has passed and running
+    ones whose lease expired (their worker died). On Postgres candidates are
+    locked with FOR UPDATE SKIP LOCKED so concurrent workers never wait on
+    each other; every claim is also a compare-and-set on status and attempts,
+    which keeps backends without SKIP LOCKED (SQLite) from double-claiming.
+    Expired jobs that already used their last attempt are marked failed.
+    
+    Args:
+        worker_id (str): Identifies the worker holding the lease
+        limit (int): Maximum number of jobs to claim
+        visibility_timeout (int): Lease length in seconds
+        kinds (list): Only claim these job kinds (None for all)
+        
+    Returns:
+        list: Claimed jobs as dicts (see get_job), oldest first
+    """
+    try:
+        now = datetime.datetime.utcnow()
+        with session_scope() as session:
+            query = session.query(Job.id, Job.status, Job.attempts, Job.max_attempts).filter(
+                Job.status.in_(("queued", "running")),
+                Job.available_at <= now
+            )
+            if kinds:
+                query = query.filter(Job.kind.in_(list(kinds)))
+            candidates = query.order_by(Job.available_at, Job.id).limit(limit).with_for_update(skip_locked=True).all()
+            claimed = []
+            for candidate in candidates:
+                expected = session.query(Job).filter(
+                    Job.id == candidate.id,
+                    Job.status == candidate.status,
+                    Job.attempts == candidate.attempts
+                )
+                if candidate.status == "running" and candidate.attempts >= candidate.max_attempts:
+                    expected.update({
+                        "status": "failed",
+                        "error": "The worker lease expired on the final attempt",
+                        "locked_by": None,
+                        "updated_at": now,
+                    }, synchronize_session=False)
+                    continue
+                updated = expected.update({
+                    "status": "running",
+                    "attempts": candidate.attempts + 1,
+                    "available_at": now + datetime.timedelta(seconds=visibility_timeout),
+                    "locked_by": worker_id,
+                    "updated_at": now,
+                }, synchronize_session=False)
+                if updated:
+                    claimed.append(candidate.id)
+            if not claimed:
+                return []
+            jobs = session.query(Job).filter(Job.id.in_(claimed)).order_by(Job.id).all()
+            return [_job_dict(job) for job in jobs]
+    except Exception as e:
+        raise Exception(f"Error claiming jobs: {str(e)}")
+
+def _leased_job(session, job_id, worker_id):
+    """Query for a job only while worker_id still holds its lease"""
+    return session.query(Job).filter(Job.id == job_id, Job.status == "running", Job.locked_by == worker_id)
+
+def extend_job_lease(job_id, worker_id, visibility_timeout=JOB_VISIBILITY_TIMEOUT):
+    """
+    Push back the lease expiry of a job the worker is still running
+    
+    Args:
+        job_id (int): The job id
+        worker_id (str): The worker holding the lease
+        visibility_timeout (int): New lease length in seconds, from now
+        
+    Returns:
+        bool: False if the lease was lost (expired and claimed by another worker)
+    """
+    try:
+        now = datetime.datetime.utcnow()
+        with session_scope() as session:
+            return bool(_leased_job(session, job_id, worker_id).update({
+                "available_at": now + datetime.timedelta(seconds=visibility_timeout),
+                "updated_at": now,
+            }, synchronize_session=False))
+    except Exception as e:
+        raise Exception(f"Error extending job lease: {str(e)}")
+
+def complete_job(job_id, worker_id, result):
+    """
+    Mark a job succeeded and store its result
+    
+    Evaluation and sentiment results are also stored as regular history
+    records in the same transaction, so a job never succeeds without its
+    record or leaves a record behind for a retry to duplicate.
+    
+    Args:
+        job_id (int): The job id
+        worker_id (str): The worker holding the lease
+        result (dict): The job result
+        
+    Returns:
+        bool: False if the lease was lost, in which case nothing is stored
+    """
+    try:
+        now = datetime.datetime.utcnow()
+        with metrics.span("db_write", operation="complete_job"), session_scope() as session:
+            if not _leased_job(session, job_id, worker_id).update({
+                "status": "succeeded",
+                "result_json": json.dumps(result),
+                "error": None,
+                "locked_by": None,
+                "updated_at": now,
+            }, synchronize_session=False):
+                return False
+            job = session.get(Job, job_id)
+            payload = json.loads(job.payload_json) if job.payload_json else {}
+            record = None
+            if job.kind == "resume_evaluation":
+                record = _add_resume_evaluation(session, payload["resume_text"], payload["job_description"], result)
+            elif job.kind == "sentiment_analysis":
+                record = _add_sentiment_analysis(session, payload["feedback_text"], result)
+            if record is not None:
+                session.flush()
+                job.record_id = record.id
+            return True
+    except Exception as e:
+        raise Exception(f"Error completing job: {str(e)}")
+
+def fail_job(job_id, worker_id, error, retry_delay=0):
+    """
+    Record a failed attempt, requeueing the job if it has attempts left
+    
+    Args:
+        job_id (int): The job id
+        worker_id (str): The worker holding the lease
+        error (str): Failure message
+        retry_delay (float): Seconds before the job may be claimed again
+        
+    Returns:
+        str: The new status ("queued" or "failed"), or None if the lease was lost
+    """
+    try:
+        now = datetime.datetime.utcnow()
+        with session_scope() as session:
+            job = _leased_job(session, job_id, worker_id).with_for_update().first()
+            if job is None:
+                return None
+            job.status = "failed" if job.attempts >= job.max_attempts else "queued"
+            job.error = error
+            job.locked_by = None
+            job.available_at = now + datetime.timedelta(seconds=retry_delay)
+            job.updated_at = now
+            return job.status
+    except Exception as e:
+        raise Exception(f"Error failing job: {str(e)}")
+
+def get_job(job_id):
+    """
+    Get a job's status and result
+    
+    Args:
+        job_id (int): The job id
+        
+    Returns:
+        dict: id, kind, payload, status, result (None until succeeded), error,
+            attempts, max_attempts, record_id, created_at and updated_at;
+            None if no such job exists
+    """
+    try:
+        with session_scope() as session:
+            job = session.get(Job, job_id)
+            return _job_dict(job) if job is not None else None
+    except Exception as e:
+        raise Exception(f"Error retrieving job: {str(e)}")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] != "migrate":
+        sys.exit("Usage: python database.py migrate")
+    migrate()
+    print("Database schema is up to date.")
@@ -0,0 +1,268 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+from types import SimpleNamespace
+
+# Local stand-in for the Gemini API, selected with LLM_BACKEND=fake. Responses
+# are schema-valid JSON built from the prompt's format block (and the
+# response_schema, when one is sent), so the app and the benchmarks run end to
+# end without a GOOGLE_API_KEY or network access.
+
+# Latency per request, "<distribution>:<params in ms>":
+#     fixed:800, uniform:200:1500, lognormal:800:0.5 (median, sigma), exponential:800 (mean)
+FAKE_LLM_LATENCY = os.environ.get("FAKE_LLM_LATENCY", "lognormal:800:0.5")
+# Fractions of requests that fail with a server error / a 429 quota error, or
+# return near-JSON that needs local repair
+FAKE_LLM_ERROR_RATE = float(os.environ.get("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_QUOTA_RATE = float(os.environ.get("FAKE_LLM_QUOTA_RATE", "0"))
+FAKE_LLM_MALFORMED_RATE = float(os.environ.get("FAKE_LLM_MALFORMED_RATE", "0"))
+# Seed for reproducible runs (unset for a different sequence every run)
+FAKE_LLM_SEED = os.environ.get("FAKE_LLM_SEED")
+
+# Share of the latency spent before the first streamed chunk, and chunk size
+FIRST_CHUNK_FRACTION = 0.3
+STREAM_CHUNK_CHARS = 48
+
+_FIELD_PATTERN = re.compile(r'^\s*"(\w+)":\s*(.*?),?\s*$', re.MULTILINE)
+_RANGE_PATTERN = re.compile(r"from (-?\d+) to (-?\d+)")
+_WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z+#.-]{3,}")
+_JSON_DECODER = json.JSONDecoder()
+
+class ResourceExhausted(Exception):
+    """Injected 429; named like the SDK's exception so the scheduler treats it as a quota error"""
+
+class InternalServerError(Exception):
+    """Injected 500"""
+
+def parse_latency(spec):
+    """
+    Build a latency sampler from a distribution spec
+
+    Args:
+        spec (str): e.g. "fixed:800", "uniform:200:1500", "lognormal:800:0.5" or "exponential:800"
+
+    Returns:
+        callable: Takes a random.Random and returns a latency in seconds
+    """
+    name, _, params = spec.partition(':')
+    try:
+        values = [float(value) for value in params.split(':') if value]
+        if name == "fixed":
+            (ms,) = values
+            return lambda rng: ms / 1000.0
+        if name == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high) / 1000.0
+        if name == "lognormal":
+            median, sigma = values
+            return lambda rng: median * rng.lognormvariate(0.0, sigma) / 1000.0
+        if name == "exponential":
+            (mean,) = values
+            return lambda rng: rng.expovariate(1.0 / mean) / 1000.0 if mean > 0 else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+def _prompt_fields(prompt):
+    """Field specs from the JSON format block of a prompt, in the order shown"""
+    fields = {}
+    for name, description in _FIELD_PATTERN.findall(prompt):
+        if name in fields:
+            continue
+        if description.startswith('('):
+            low, high = (int(value) for value in _RANGE_PATTERN.search(description).groups()) \
+                if _RANGE_PATTERN.search(description) else (0, 10)
+            fields[name] = {"type": "integer", "minimum": low, "maximum": high}
+        elif description.startswith('['):
+            fields[name] = {"type": "array"}
+        elif ' / ' in description:
+            fields[name] = {"type": "string", "enum": [choice.strip(' "') for choice in description.split(' / ')]}
+        else:
+            fields[name] = {"type": "string"}
+    return fields
+
+def _schema_fields(response_schema):
+    """Field specs from a Gemini response_schema, and whether it asks for an array"""
+    as_array = response_schema.get("type") == "ARRAY"
+    item = response_schema["items"] if as_array else response_schema
+    fields = {}
+    for name, prop in item.get("properties", {}).items():
+        if prop["type"] == "ARRAY":
+            fields[name] = {"type": "array"}
+        elif "enum" in prop:
+            fields[name] = {"type": "string", "enum": list(prop["enum"])}
+        else:
+            fields[name] = {"type": prop["type"].lower()}
+    return fields, as_array
+
+def _prompt_items(prompt):
+    """Ids of the items in a packed prompt's trailing JSON array"""
+    start = prompt.rfind('[{"id"')
+    if start < 0:
+        return []
+    try:
+        items = _JSON_DECODER.raw_decode(prompt[start:])[0]
+    except ValueError:
+        return []
+    return [item.get("id") for item in items if isinstance(item, dict)]
+
+class FakeModel:
+    """
+    Drop-in for google.generativeai.GenerativeModel backed by random data
+
+    Implements generate_content (optionally streaming) and
+    generate_content_async. Latency, failure rates and malformed output are
+    configurable per instance; defaults come from the FAKE_LLM_* variables.
+    """
+
+    def __init__(self, model_name, latency=FAKE_LLM_LATENCY, error_rate=FAKE_LLM_ERROR_RATE,
+                 quota_error_rate=FAKE_LLM_QUOTA_RATE, malformed_rate=FAKE_LLM_MALFORMED_RATE, seed=FAKE_LLM_SEED):
+        """
+        Args:
+            model_name (str): Name reported by the model (not used otherwise)
+            latency (str): Latency distribution spec, see parse_latency
+            error_rate (float): Fraction of requests failing with InternalServerError
+            quota_error_rate (float): Fraction of requests failing with ResourceExhausted (429)
+            malformed_rate (float): Fraction of responses returned as fenced near-JSON with trailing commas
+            seed (int): Random seed for reproducible runs
+        """
+        self.model_name = model_name
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.quota_error_rate = quota_error_rate
+        self.malformed_rate = malformed_rate
+        self.calls = 0
+        self._random = random.Random(int(seed) if seed is not None else None)
+        self._lock = threading.Lock()
+
+    def _plan(self, prompt, generation_config):
+        """Decide the outcome of one request: (latency, exception or None, response text)"""
+        with self._lock:
+            self.calls += 1
+            rng = random.Random(self._random.random())
+        latency = self.sample_latency(rng)
+        roll = rng.random()
+        if roll < self.quota_error_rate:
+            # Quota rejections come back quickly
+            return latency * 0.1, ResourceExhausted("429 Resource has been exhausted (e.g. check quota)."), None
+        if roll < self.quota_error_rate + self.error_rate:
+            return latency, InternalServerError("500 An internal error has occurred."), None
+        text = self._response_text(rng, prompt, generation_config or {})
+        if rng.random() < self.malformed_rate:
+            text = "```json\n" + re.sub(r'(["\]\d])(\s*[}\]])', r'\1,\2', text) + "\n```"
+        return latency, None, text
+
+    def _response_text(self, rng, prompt, generation_config):
+        fields = _prompt_fields(prompt)
+        as_array = False
+        response_schema = generation_config.get("response_schema")
+        if response_schema:
+            schema_fields, as_array = _schema_fields(response_schema)
+            # Keep the prompt's order and ranges, add anything only the schema names
+            for name, spec in schema_fields.items():
+                fields.setdefault(name, spec)
+            fields = {name: fields[name] for name in fields if name in schema_fields}
+        words = _WORD_PATTERN.findall(prompt) or ["placeholder"]
+        if as_array or "id" in fields:
+            results = [self._result(rng, fields, words, id=item_id) for item_id in _prompt_items(prompt)]
+            return json.dumps(results, indent=2)
+        return json.dumps(self._result(rng, fields, words), indent=2)
+
+    def _result(self, rng, fields, words, **fixed):
+        result = {}
+        for name, spec in fields.items():
+            if name in fixed:
+                result[name] = fixed[name]
+            elif "enum" in spec:
+                result[name] = rng.choice(spec["enum"])
+            elif spec["type"] in ("integer", "number"):
+                result[name] = rng.randint(spec.get("minimum", 0), spec.get("maximum", 10))
+            elif spec["type"] == "boolean":
+                result[name] = rng.random() < 0.5
+            elif spec["type"] == "array":
+                result[name] = rng.sample(words, min(len(words), rng.randint(1, 4)))
+            else:
+                result[name] = ' '.join(rng.choices(words, k=rng.randint(8, 24))).capitalize() + '.'
+        return result
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        """
+        Produce a response after the sampled latency
+
+        Args:
+            prompt (str): Prompt text
+            generation_config (dict): As for Gemini; response_schema shapes the output
+            stream (bool): Return an iterator of chunks instead of a complete response
+
+        Returns:
+            FakeResponse: Complete response, or FakeStreamResponse when streaming
+        """
+        latency, error, text = self._plan(prompt, generation_config)
+        if stream:
+            return FakeStreamResponse(prompt, latency, error, text)
+        time.sleep(latency)
+        if error is not None:
+            raise error
+        return FakeResponse(prompt, text)
+
+    async def generate_content_async(self, prompt, generation_config=None, **kwargs):
+        """
+        Async counterpart of generate_content (without streaming)
+
+        Args:
+            prompt (str): Prompt text
+            generation_config (dict): As for Gemini; response_schema shapes the output
+
+        Returns:
+            FakeResponse: The response
+        """
+        latency, error, text = self._plan(prompt, generation_config)
+        await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+        return FakeResponse(prompt, text)
+
+def _usage(prompt, text):
+    prompt_tokens = len(prompt) // 4
+    candidate_tokens = len(text) // 4
+    return SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=candidate_tokens,
+                           total_token_count=prompt_tokens + candidate_tokens)
+
+class FakeResponse:
+    """Complete response with the text and usage_metadata attributes the app reads"""
+
+    def __init__(self, prompt, text):
+        self.text = text
+        self.usage_metadata = _usage(prompt, text)
+
+class FakeStreamResponse:
+    """
+    Streamed response; iterating yields chunks with a .text attribute
+
+    As with the SDK, usage_metadata is only available once the stream has
+    been consumed.
+    """
+
+    def __init__(self, prompt, latency, error, text):
+        self.usage_metadata = None
+        self._prompt = prompt
+        self._latency = latency
+        self._error = error
+        self._text = text
+
+    def __iter__(self):
+        if self._error is not None:
+            time.sleep(self._latency)
+            raise self._error
+        pieces = [self._text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(self._text), STREAM_CHUNK_CHARS)]
+        time.sleep(self._latency * FIRST_CHUNK_FRACTION)
+        interval = self._latency * (1 - FIRST_CHUNK_FRACTION) / max(1, len(pieces) - 1)
+        for position, piece in enumerate(pieces):
+            if position:
+                time.sleep(interval)
+            yield SimpleNamespace(text=piece)
+        self.usage_metadata = _usage(self._prompt, self._text)
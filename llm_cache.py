@@ -0,0 +1,90 @@
+import os
+import hashlib
+import json
+import metrics
+
+# How long cached LLM results stay valid (seconds); 0 keeps them forever
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Set LLM_CACHE_ENABLED=0 to always call the model
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") != "0"
+
+def normalize_text(text):
+    """Collapse whitespace so formatting-only differences share a cache entry"""
+    return ' '.join((text or '').split())
+
+def make_llm_cache_key(kind, model_name, prompt_version, *inputs):
+    """
+    Build the cache key for an LLM call
+
+    Args:
+        kind (str): Type of result, e.g. "resume_evaluation"
+        model_name (str): Model that produces the result
+        prompt_version (str): Version of the prompt template
+        *inputs (str): Prompt inputs; normalized before hashing
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps([kind, model_name, prompt_version] + [normalize_text(text) for text in inputs])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_cached_result(cache_key):
+    """
+    Look up a cached LLM result
+
+    The cache is an optimization: if the database is unavailable the lookup
+    is treated as a miss instead of failing the evaluation.
+
+    Args:
+        cache_key (str): Key from make_llm_cache_key
+
+    Returns:
+        dict: The cached result, or None on a miss
+    """
+    if not LLM_CACHE_ENABLED:
+        return None
+    try:
+        from database import get_cached_llm_result
+        result = get_cached_llm_result(cache_key)
+    except Exception:
+        result = None
+    metrics.record_cache("llm", result is not None)
+    return result
+
+def store_result(cache_key, kind, model_name, prompt_version, result):
+    """
+    Store an LLM result in the cache, ignoring database errors
+
+    Args:
+        cache_key (str): Key from make_llm_cache_key
+        kind (str): Type of result, e.g. "resume_evaluation"
+        model_name (str): Model that produced the result
+        prompt_version (str): Version of the prompt template
+        result (dict): The result to cache
+    """
+    if not LLM_CACHE_ENABLED:
+        return
+    try:
+        from database import store_cached_llm_result
+        store_cached_llm_result(cache_key, kind, model_name, prompt_version, result,
+                                ttl_seconds=LLM_CACHE_TTL_SECONDS or None)
+    except Exception:
+        pass
+
+def invalidate(cache_key=None, kind=None, model_name=None, expired_only=False):
+    """
+    Explicitly invalidate cached LLM results
+
+    Args:
+        cache_key (str): Only delete this entry
+        kind (str): Only delete entries of this type
+        model_name (str): Only delete entries produced by this model
+        expired_only (bool): Only delete entries whose TTL has passed
+
+    Returns:
+        int: Number of deleted entries
+    """
+    from database import invalidate_llm_cache
+    return invalidate_llm_cache(cache_key=cache_key, kind=kind, model_name=model_name,
+                                expired_only=expired_only)
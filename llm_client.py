@@ -0,0 +1,160 @@
+import os
+import asyncio
+import threading
+
+# Which backend get_model() returns models from: "gemini" (the Google API) or
+# "fake" (local stand-in with synthetic responses, see fake_llm.py)
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "gemini")
+
+_configured = False
+_models = {}
+_lock = threading.Lock()
+_backend = LLM_BACKEND
+_backend_options = {}
+_loop = None
+_loop_lock = threading.Lock()
+
+def _configure():
+    """Import and configure the Gemini SDK on first use"""
+    global _configured
+    import google.generativeai as genai
+
+    if not _configured:
+        # Get Google AI API key from environment variables
+        google_api_key = os.environ.get("GOOGLE_API_KEY")
+        if not google_api_key:
+            raise ValueError("Google API key not found in environment variables.")
+        genai.configure(api_key=google_api_key)
+        _configured = True
+    return genai
+
+def chunk_text(chunk):
+    """
+    Text of one streamed response chunk
+
+    Chunks that carry only metadata (e.g. the finish reason) raise on .text;
+    they contribute no text.
+
+    Args:
+        chunk: A chunk from generate_content(..., stream=True)
+
+    Returns:
+        str: The chunk's text, or "" if it has none
+    """
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+def _gemini_model(model_name, **options):
+    return _configure().GenerativeModel(model_name, **options)
+
+def _fake_model(model_name, **options):
+    from fake_llm import FakeModel
+
+    return FakeModel(model_name, **options)
+
+# Backend name -> factory(model_name, **options). A model must provide
+# generate_content(prompt, generation_config=None, stream=False), returning a
+# response with .text and .usage_metadata (or an iterable of chunks when
+# streaming), and the coroutine generate_content_async(prompt, generation_config=None).
+BACKENDS = {
+    "gemini": _gemini_model,
+    "fake": _fake_model,
+}
+
+def set_backend(name, **options):
+    """
+    Switch the backend that get_model() uses from now on
+
+    Models created for the previous backend are dropped.
+
+    Args:
+        name (str): Key in BACKENDS
+        **options: Keyword arguments for the backend's factory
+            (e.g. latency or error_rate for the fake backend)
+    """
+    global _backend, _backend_options
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {name}")
+    with _lock:
+        _backend = name
+        _backend_options = options
+        _models.clear()
+
+def get_model(model_name):
+    """
+    Get a process-wide model instance from the selected backend
+
+    For Gemini, importing the SDK and validating the API key are deferred
+    until the first model is requested, so importing the app's modules stays
+    cheap. The fake backend needs neither.
+
+    Args:
+        model_name (str): Gemini model name, e.g. "gemini-1.5-pro"
+
+    Returns:
+        google.generativeai.GenerativeModel | fake_llm.FakeModel: The shared model
+    """
+    model = _models.get(model_name)
+    if model is None:
+        with _lock:
+            model = _models.get(model_name)
+            if model is None:
+                if _backend not in BACKENDS:
+                    raise ValueError(f"Unknown LLM backend: {_backend}")
+                model = BACKENDS[_backend](model_name, **_backend_options)
+                _models[model_name] = model
+    return model
+
+def get_event_loop():
+    """
+    Get the process-wide event loop that runs all async model calls
+
+    The Gemini SDK's async client binds its gRPC channel to the loop it was
+    first used on, and the models are cached per process, so every coroutine
+    that calls a model must run on this one long-lived loop (on a daemon
+    thread) rather than on a fresh asyncio.run() loop.
+
+    Returns:
+        asyncio.AbstractEventLoop: The running loop
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+def submit_async(coro):
+    """
+    Schedule a coroutine on the shared event loop
+
+    Args:
+        coro (coroutine): The coroutine to run
+
+    Returns:
+        concurrent.futures.Future: Its eventual result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+def run_async(coro):
+    """
+    Run a coroutine on the shared event loop and wait for its result
+
+    Args:
+        coro (coroutine): The coroutine to run
+
+    Returns:
+        The coroutine's return value
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None and running is _loop:
+        coro.close()
+        raise RuntimeError("run_async() cannot wait on the shared event loop from inside it; await the coroutine")
+    return submit_async(coro).result()
@@ -0,0 +1,396 @@
+import re
+import json
+import threading
+import metrics
+
+# Schemas describe the fields of a JSON object result, e.g.
+#     {"score": {"type": "number", "minimum": 0, "maximum": 10},
+#      "label": {"type": "string", "enum": ["High", "Low"]},
+#      "notes": {"type": "array"}}
+# "array" fields hold strings. Every field is required.
+
+# Regenerations allowed when a response cannot be decoded even after local repair
+DEFAULT_DECODE_RETRIES = 1
+
+_GEMINI_TYPES = {"number": "NUMBER", "integer": "INTEGER", "string": "STRING", "boolean": "BOOLEAN"}
+
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+_NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '‘': "'", '’': "'"})
+_DANGLING_KEY_PATTERN = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_JSON_DECODER = json.JSONDecoder()
+
+class DecodeError(ValueError):
+    """Raised when a response cannot be turned into a valid result, even after repair"""
+
+class DecoderStats:
+    """Thread-safe counters of how responses were decoded"""
+
+    FIELDS = ("responses", "clean", "repaired", "coerced", "retries", "failures")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self):
+        """
+        Current counts plus repair and retry rates
+
+        Returns:
+            dict: Counter values, "repair_rate" and "retry_rate" (per decoded response)
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        responses = counts["responses"] or 1
+        counts["repair_rate"] = counts["repaired"] / responses
+        counts["retry_rate"] = counts["retries"] / responses
+        return counts
+
+stats = DecoderStats()
+
+def _collect_stats():
+    counts = stats.snapshot()
+    return [("decoder_responses_total", "counter", {}, counts["responses"]),
+            ("decoder_retries_total", "counter", {}, counts["retries"])] + \
+        [("decoder_outcomes_total", "counter", {"outcome": name}, counts[name])
+         for name in ("clean", "repaired", "coerced", "failures")]
+
+metrics.registry.register_collector(_collect_stats)
+
+def gemini_schema(schema):
+    """
+    Convert a result schema to a Gemini response_schema
+
+    Args:
+        schema (dict): Field name -> field spec
+
+    Returns:
+        dict: OBJECT schema with every field required
+    """
+    properties = {}
+    for name, spec in schema.items():
+        if spec["type"] == "array":
+            properties[name] = {"type": "ARRAY", "items": {"type": "STRING"}}
+        elif "enum" in spec:
+            properties[name] = {"type": "STRING", "format": "enum", "enum": list(spec["enum"])}
+        else:
+            properties[name] = {"type": _GEMINI_TYPES[spec["type"]]}
+    return {"type": "OBJECT", "properties": properties, "required": list(schema)}
+
+def generation_config(schema=None, as_array=False):
+    """
+    Generation config asking Gemini for native JSON output
+
+    Args:
+        schema (dict): Result schema to enforce (None asks for JSON without a schema)
+        as_array (bool): Expect a JSON array of such objects
+
+    Returns:
+        dict: Value for generate_content(generation_config=...)
+    """
+    config = {"response_mime_type": "application/json"}
+    if schema is not None:
+        response_schema = gemini_schema(schema)
+        config["response_schema"] = {"type": "ARRAY", "items": response_schema} if as_array else response_schema
+    return config
+
+def _json_candidates(response_text):
+    """The response with fences and surrounding prose removed, then without trimming the end"""
+    text = response_text.strip()
+    fenced = _FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+    starts = [index for index in (text.find('{'), text.find('[')) if index >= 0]
+    if not starts:
+        return [text]
+    start = min(starts)
+    end = max(text.rfind('}'), text.rfind(']'))
+    candidates = [text[start:end + 1]] if end > start else []
+    # In a truncated response the last bracket may belong to an inner value
+    candidates.append(text[start:])
+    return candidates
+
+def extract_json_text(response_text):
+    """
+    Cut the JSON value out of a response
+
+    Markdown code fences and any prose before or after the outermost object
+    or array are dropped.
+
+    Args:
+        response_text (str): Raw response text from the model
+
+    Returns:
+        str: The JSON text
+    """
+    return _json_candidates(response_text)[0]
+
+def repair_json(text):
+    """
+    Fix common near-JSON mistakes without another model call
+
+    Handles smart quotes, single-quoted strings, raw newlines inside strings,
+    Python literals (True/False/None), trailing commas, and output truncated
+    mid-string or before its closing brackets.
+
+    Args:
+        text (str): Near-JSON text
+
+    Returns:
+        str: Repaired text (not guaranteed to be valid)
+    """
+    text = text.translate(_SMART_QUOTES)
+    out = []
+    stack = []
+    quote = None
+    escape = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if escape:
+                escape = False
+                if char == "'":
+                    # \' is not a JSON escape
+                    out.pop()
+                out.append(char)
+            elif char == '\\':
+                escape = True
+                out.append(char)
+            elif char == quote:
+                quote = None
+                out.append('"')
+            elif char == '"':
+                # A double quote inside a single-quoted string
+                out.append('\\"')
+            elif char == '\n':
+                out.append('\\n')
+            elif char == '\t':
+                out.append('\\t')
+            elif char != '\r':
+                out.append(char)
+        elif char in '"\'':
+            quote = char
+            out.append('"')
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+            out.append(char)
+        elif char in '}]':
+            _strip_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(char)
+        elif char.isalpha():
+            end = i
+            while end < len(text) and (text[end].isalnum() or text[end] == '_'):
+                end += 1
+            word = text[i:end]
+            rest = text[end:].lstrip()
+            if word not in _PYTHON_LITERALS and rest.startswith(':'):
+                # Unquoted object key
+                out.append(f'"{word}"')
+            else:
+                out.append(_PYTHON_LITERALS.get(word, word))
+            i = end
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    if quote:
+        out.append('"')
+    _strip_trailing_comma(out)
+    repaired = ''.join(out)
+    if stack and stack[-1] == '}':
+        # A truncated key without a value cannot be completed; drop it
+        repaired = _DANGLING_KEY_PATTERN.sub(r'\1', repaired).rstrip().rstrip(',')
+    return repaired + ''.join(reversed(stack))
+
+def _strip_trailing_comma(out):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ',':
+        out.pop()
+
+def parse_json(response_text):
+    """
+    Parse the JSON value in a response, repairing it locally if needed
+
+    Args:
+        response_text (str): Raw response text from the model
+
+    Returns:
+        tuple: (parsed value, whether a repair was needed)
+    """
+    candidates = _json_candidates(response_text)
+    try:
+        # Ignores anything after the first complete value
+        return _JSON_DECODER.raw_decode(candidates[-1])[0], False
+    except ValueError as e:
+        error = e
+    # Prefer the untrimmed text so truncated output keeps as much as possible
+    for text in reversed(candidates):
+        try:
+            return json.loads(repair_json(text)), True
+        except ValueError:
+            continue
+    raise DecodeError(f"Response is not valid JSON: {str(error)}")
+
+def _coerce_number(value, spec):
+    if isinstance(value, bool):
+        raise DecodeError("Expected a number")
+    if isinstance(value, str):
+        # "7", "7.5/10", "Score: 8"
+        match = _NUMBER_PATTERN.search(value)
+        if not match:
+            raise DecodeError(f"Expected a number, got {value!r}")
+        value = float(match.group())
+    if not isinstance(value, (int, float)):
+        raise DecodeError(f"Expected a number, got {value!r}")
+    if spec["type"] == "integer":
+        value = int(round(value))
+    if "minimum" in spec:
+        value = max(spec["minimum"], value)
+    if "maximum" in spec:
+        value = min(spec["maximum"], value)
+    return value
+
+def _coerce_string(value, spec):
+    if isinstance(value, list):
+        value = ' '.join(str(item) for item in value)
+    elif not isinstance(value, str):
+        value = str(value)
+    if "enum" in spec:
+        normalized = ' '.join(value.split()).lower()
+        for choice in spec["enum"]:
+            if normalized == choice.lower():
+                return choice
+        # "Strong" or "strong fit." still name one choice unambiguously
+        candidates = [choice for choice in spec["enum"]
+                      if choice.lower().startswith(normalized.rstrip('.')) or normalized.startswith(choice.lower())]
+        if len(candidates) != 1:
+            raise DecodeError(f"Expected one of {spec['enum']}, got {value!r}")
+        return candidates[0]
+    return value
+
+def _coerce_array(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        items = [item.strip(" -*•") for item in re.split(r"[\n;]", value)]
+        return [item for item in items if item]
+    if not isinstance(value, list):
+        return [str(value)]
+    return [item if isinstance(item, str) else json.dumps(item) if isinstance(item, (dict, list)) else str(item)
+            for item in value]
+
+def coerce_result(result, schema):
+    """
+    Validate a parsed object against a schema, coercing near-miss types
+
+    Args:
+        result (dict): Parsed object
+        schema (dict): Field name -> field spec
+
+    Returns:
+        tuple: (validated dict, whether any value had to be coerced)
+    """
+    if not isinstance(result, dict):
+        raise DecodeError("Expected a JSON object in API response")
+    coerced = False
+    for name, spec in schema.items():
+        if name not in result:
+            raise DecodeError(f"Missing required key in API response: {name}")
+        value = result[name]
+        if spec["type"] in ("number", "integer"):
+            new_value = _coerce_number(value, spec)
+        elif spec["type"] == "array":
+            new_value = _coerce_array(value)
+        elif spec["type"] == "boolean":
+            new_value = value if isinstance(value, bool) else str(value).strip().lower() in ("true", "yes", "1")
+        else:
+            new_value = _coerce_string(value, spec)
+        if new_value != value or type(new_value) is not type(value):
+            coerced = True
+        result[name] = new_value
+    return result, coerced
+
+def decode_response(response_text, schema):
+    """
+    Turn a model response into a validated result
+
+    The JSON is parsed, repaired locally if needed, then checked against the
+    schema with near-miss types coerced. Outcomes are counted in `stats`.
+
+    Args:
+        response_text (str): Raw response text from the model
+        schema (dict): Field name -> field spec
+
+    Returns:
+        dict: The validated result
+    """
+    stats.increment("responses")
+    try:
+        with metrics.span("decode"):
+            value, repaired = parse_json(response_text)
+            result, coerced = coerce_result(value, schema)
+    except DecodeError:
+        stats.increment("failures")
+        raise
+    if repaired:
+        stats.increment("repaired")
+    if coerced:
+        stats.increment("coerced")
+    if not repaired and not coerced:
+        stats.increment("clean")
+    return result
+
+def generate_json(call, schema, retries=DEFAULT_DECODE_RETRIES):
+    """
+    Call the model and decode its response, regenerating only if decoding fails
+
+    Args:
+        call (callable): Makes the request and returns the response text
+        schema (dict): Field name -> field spec
+        retries (int): Regenerations allowed after an undecodable response
+
+    Returns:
+        dict: The validated result
+    """
+    for attempt in range(retries + 1):
+        try:
+            return decode_response(call(), schema)
+        except DecodeError:
+            if attempt == retries:
+                raise
+            stats.increment("retries")
+
+async def generate_json_async(call, schema, retries=DEFAULT_DECODE_RETRIES):
+    """
+    Async counterpart of generate_json
+
+    Args:
+        call (callable): Coroutine function that makes the request and returns the response text
+        schema (dict): Field name -> field spec
+        retries (int): Regenerations allowed after an undecodable response
+
+    Returns:
+        dict: The validated result
+    """
+    for attempt in range(retries + 1):
+        try:
+            response_text = await call()
+            return decode_response(response_text, schema)
+        except DecodeError:
+            if attempt == retries:
+                raise
+            stats.increment("retries")
@@ -0,0 +1,356 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import metrics
+
+# Quota for the shared Gemini project; override to match the account's limits
+LLM_REQUESTS_PER_MINUTE = int(os.environ.get("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", "1000000"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+
+# Priority lanes; lower values are served first
+LANES = {
+    "interactive": 0,
+    "screening": 1,
+    "batch": 2,
+}
+
+# Output tokens reserved per request until the real usage is known
+DEFAULT_RESPONSE_TOKENS = 1024
+
+# How long everyone backs off after a quota error, and how often it is retried
+QUOTA_COOLDOWN_SECONDS = 5.0
+QUOTA_RETRIES = 2
+
+# Polling interval for async waiters
+_ASYNC_POLL_SECONDS = 0.05
+
+def estimate_tokens(prompt, response_tokens=DEFAULT_RESPONSE_TOKENS):
+    """
+    Roughly estimate the tokens a request will consume
+
+    Args:
+        prompt (str): Prompt text
+        response_tokens (int): Tokens reserved for the response
+
+    Returns:
+        int: Estimated prompt plus response tokens (about 4 characters per token)
+    """
+    return len(prompt) // 4 + response_tokens
+
+def is_quota_error(error):
+    """Return True if the exception is a rate-limit / quota rejection (HTTP 429)"""
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "rate limit" in message
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount, now):
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        self._refill(now)
+        # Requests larger than the bucket are allowed once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        """Return (positive) or charge (negative) tokens after the real cost is known"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class RequestScheduler:
+    """
+    Admission control for LLM requests shared by every caller in the process
+
+    Requests are admitted in priority-lane order when both token buckets
+    (requests/minute and tokens/minute) allow it and fewer than the current
+    concurrency limit are in flight. The limit adapts AIMD-style: it grows
+    by roughly one slot per window of successful calls and halves on a
+    quota error, which also pauses admissions for a short cooldown.
+    """
+
+    def __init__(self, requests_per_minute=LLM_REQUESTS_PER_MINUTE, tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                 max_concurrency=LLM_MAX_CONCURRENCY, min_concurrency=1):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.quota_errors = 0
+        self._paused_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    def _try_admit(self, entry, tokens):
+        """
+        Admit the waiter if it is at the head of the queue and capacity allows
+
+        Must be called with the condition held.
+
+        Returns:
+            float: 0 if admitted, otherwise seconds to wait (None to wait for a release)
+        """
+        if self._waiters[0] != entry or self.in_flight >= int(self.concurrency_limit):
+            return None
+        now = time.monotonic()
+        wait = max(
+            self._paused_until - now,
+            self.request_bucket.time_until(1, now),
+            self.token_bucket.time_until(tokens, now),
+        )
+        if wait > 0:
+            return wait
+        heapq.heappop(self._waiters)
+        self.request_bucket.consume(1)
+        self.token_bucket.consume(tokens)
+        self.in_flight += 1
+        # The next waiter may be admissible too
+        self._cond.notify_all()
+        return 0.0
+
+    def _enqueue(self, lane):
+        entry = (LANES.get(lane, LANES["batch"]), next(self._sequence))
+        heapq.heappush(self._waiters, entry)
+        return entry
+
+    def _abandon(self, entry):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._cond.notify_all()
+
+    def acquire(self, lane="interactive", tokens=0):
+        """
+        Block until a request in the given lane may be sent
+
+        Args:
+            lane (str): Priority lane name from LANES
+            tokens (int): Estimated tokens the request will consume
+        """
+        queued = time.perf_counter()
+        with self._cond:
+            entry = self._enqueue(lane)
+            try:
+                while True:
+                    wait = self._try_admit(entry, tokens)
+                    if wait == 0:
+                        metrics.registry.observe("llm_queue_seconds", time.perf_counter() - queued, lane=lane)
+                        return
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._abandon(entry)
+                raise
+
+    async def acquire_async(self, lane="batch", tokens=0):
+        """
+        Wait without blocking the event loop until a request may be sent
+
+        Args:
+            lane (str): Priority lane name from LANES
+            tokens (int): Estimated tokens the request will consume
+        """
+        queued = time.perf_counter()
+        with self._cond:
+            entry = self._enqueue(lane)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(entry, tokens)
+                if wait == 0:
+                    metrics.registry.observe("llm_queue_seconds", time.perf_counter() - queued, lane=lane)
+                    return
+                await asyncio.sleep(min(wait or _ASYNC_POLL_SECONDS, _ASYNC_POLL_SECONDS * 5))
+        except BaseException:
+            with self._cond:
+                self._abandon(entry)
+            raise
+
+    def release(self, tokens=0, tokens_used=None, error=None, abandoned=False):
+        """
+        Report the outcome of an admitted request
+
+        Args:
+            tokens (int): Tokens reserved when the request was admitted
+            tokens_used (int): Actual tokens reported by the API, if known
+            error (Exception): The exception raised by the request, if any
+            abandoned (bool): The caller gave up on the request (cancelled, or
+                closed its stream early); the slot is freed without counting
+                the request as a success or a failure
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if tokens_used is not None:
+                self.token_bucket.adjust(tokens - tokens_used)
+            if error is not None:
+                metrics.registry.increment("llm_errors_total", kind="quota" if is_quota_error(error) else "error")
+            if error is not None and is_quota_error(error):
+                self.quota_errors += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+                self._paused_until = time.monotonic() + QUOTA_COOLDOWN_SECONDS
+            elif error is None and not abandoned:
+                self.concurrency_limit = min(self.max_concurrency,
+                                             self.concurrency_limit + 1.0 / self.concurrency_limit)
+            self._cond.notify_all()
+
+    def call(self, fn, *args, lane="interactive", tokens=0, **kwargs):
+        """
+        Run a blocking LLM request under the scheduler
+
+        Quota errors are retried after the shared cooldown; other errors
+        propagate immediately.
+
+        Args:
+            fn (callable): Function that performs the request
+            *args: Positional arguments for fn
+            lane (str): Priority lane name from LANES
+            tokens (int): Estimated tokens the request will consume
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            The return value of fn
+        """
+        for attempt in range(QUOTA_RETRIES + 1):
+            self.acquire(lane, tokens)
+            try:
+                with metrics.span("llm", lane=lane):
+                    response = fn(*args, **kwargs)
+            except Exception as e:
+                self.release(tokens, error=e)
+                if not is_quota_error(e) or attempt == QUOTA_RETRIES:
+                    raise
+                continue
+            metrics.record_usage(response, lane=lane)
+            self.release(tokens, tokens_used=_usage_tokens(response))
+            return response
+
+    def stream(self, fn, *args, lane="interactive", tokens=0, **kwargs):
+        """
+        Run a streaming LLM request under the scheduler, yielding its chunks
+
+        The request holds its concurrency slot until the stream is exhausted
+        or closed. Quota errors are retried after the shared cooldown only if
+        no chunk has been yielded yet.
+
+        Args:
+            fn (callable): Function that starts the request and returns an iterable of chunks
+            *args: Positional arguments for fn
+            lane (str): Priority lane name from LANES
+            tokens (int): Estimated tokens the request will consume
+            **kwargs: Keyword arguments for fn
+
+        Yields:
+            The chunks produced by the response
+        """
+        for attempt in range(QUOTA_RETRIES + 1):
+            self.acquire(lane, tokens)
+            response = None
+            started = False
+            start = time.perf_counter()
+            try:
+                response = fn(*args, **kwargs)
+                for chunk in response:
+                    if not started:
+                        metrics.registry.observe("stage_duration_seconds", time.perf_counter() - start,
+                                                 stage="llm_first_chunk", lane=lane)
+                    started = True
+                    yield chunk
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    # GeneratorExit from a consumer that stopped reading, or an interrupt
+                    self.release(tokens, abandoned=True)
+                    raise
+                metrics.registry.increment("stage_errors_total", stage="llm", lane=lane)
+                self.release(tokens, error=e)
+                if started or not is_quota_error(e) or attempt == QUOTA_RETRIES:
+                    raise
+                continue
+            metrics.registry.observe("stage_duration_seconds", time.perf_counter() - start, stage="llm", lane=lane)
+            # Usage metadata is filled in on the response once the stream has finished
+            metrics.record_usage(response, lane=lane)
+            self.release(tokens, tokens_used=_usage_tokens(response))
+            return
+
+    async def call_async(self, fn, *args, lane="batch", tokens=0, **kwargs):
+        """
+        Await an async LLM request under the scheduler
+
+        Args:
+            fn (callable): Coroutine function that performs the request
+            *args: Positional arguments for fn
+            lane (str): Priority lane name from LANES
+            tokens (int): Estimated tokens the request will consume
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            The awaited return value of fn
+        """
+        for attempt in range(QUOTA_RETRIES + 1):
+            await self.acquire_async(lane, tokens)
+            try:
+                with metrics.span("llm", lane=lane):
+                    response = await fn(*args, **kwargs)
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    # Cancelled (e.g. the batch was abandoned) or interrupted
+                    self.release(tokens, abandoned=True)
+                    raise
+                self.release(tokens, error=e)
+                if not is_quota_error(e) or attempt == QUOTA_RETRIES:
+                    raise
+                continue
+            metrics.record_usage(response, lane=lane)
+            self.release(tokens, tokens_used=_usage_tokens(response))
+            return response
+
+def _usage_tokens(response):
+    """Total tokens reported in a Gemini response's usage metadata, if present"""
+    usage = getattr(response, "usage_metadata", None)
+    total = getattr(usage, "total_token_count", None)
+    return total if isinstance(total, int) and total > 0 else None
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def _collect_scheduler():
+    if _scheduler is None:
+        return []
+    return [("llm_in_flight", "gauge", {}, _scheduler.in_flight),
+            ("llm_concurrency_limit", "gauge", {}, int(_scheduler.concurrency_limit)),
+            ("llm_quota_errors_total", "counter", {}, _scheduler.quota_errors)]
+
+metrics.registry.register_collector(_collect_scheduler)
+
+def get_scheduler():
+    """
+    Get the process-wide request scheduler
+
+    Returns:
+        RequestScheduler: The shared scheduler
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler()
+    return _scheduler
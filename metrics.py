@@ -0,0 +1,304 @@
+import os
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Serve Prometheus text metrics on this port (0 disables the endpoint)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+# Most recent observations kept per histogram for the diagnostics tab
+METRICS_RECENT_SAMPLES = int(os.environ.get("METRICS_RECENT_SAMPLES", "500"))
+
+METRIC_PREFIX = "hr_assistant"
+
+# Bucket upper bounds, in seconds and in tokens
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+METRIC_HELP = {
+    "stage_duration_seconds": "Time spent in each pipeline stage",
+    "stage_errors_total": "Pipeline stage calls that raised",
+    "llm_queue_seconds": "Time LLM requests waited for the scheduler",
+    "llm_tokens": "Tokens per LLM request, from the response usage metadata",
+    "llm_tokens_total": "Tokens consumed, from the response usage metadata",
+    "llm_errors_total": "Failed LLM requests",
+    "cache_requests_total": "Cache lookups by outcome",
+    "prompt_tokens_saved": "Prompt tokens removed per call by resume compression",
+    "decoder_responses_total": "Model responses decoded",
+    "decoder_retries_total": "Regenerations after an undecodable response",
+    "decoder_outcomes_total": "Decoded responses by outcome (repaired and coerced can overlap)",
+    "llm_in_flight": "LLM requests currently admitted by the scheduler",
+    "llm_concurrency_limit": "Current adaptive concurrency limit of the scheduler",
+    "llm_quota_errors_total": "Quota (429) errors seen by the scheduler",
+    "jobs_total": "Background jobs processed by worker.py, by outcome",
+}
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent observations"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, recent=METRICS_RECENT_SAMPLES):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=recent)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+class MetricsRegistry:
+    """
+    Thread-safe store of histograms and counters, keyed by name and labels
+
+    Collectors registered with register_collector() contribute values owned
+    by other modules (decoder stats, scheduler state) at read time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = []
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        """
+        Record one observation in a histogram
+
+        Args:
+            name (str): Metric name without the prefix
+            value (float): Observed value (seconds for latencies)
+            buckets (tuple): Bucket upper bounds used when the histogram is created
+            **labels: Label values
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, amount=1, **labels):
+        """
+        Add to a counter
+
+        Args:
+            name (str): Metric name without the prefix
+            amount (float): Increment
+            **labels: Label values
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_collector(self, collector):
+        """
+        Add a callable returning (name, "counter" | "gauge", labels dict, value) tuples
+
+        Args:
+            collector (callable): Called every time metrics are read
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def reset(self):
+        """Drop every histogram and counter (collectors stay registered)"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def histograms(self):
+        """
+        Summaries of every histogram
+
+        Returns:
+            list: Dicts with name, labels, count, sum, buckets, counts, p50, p99
+                and recent (latest observations, oldest first)
+        """
+        with self._lock:
+            items = [(name, labels, histogram.buckets, list(histogram.counts), histogram.sum, histogram.count,
+                      list(histogram.recent))
+                     for (name, labels), histogram in self._histograms.items()]
+        summaries = []
+        for name, labels, buckets, counts, total, count, recent in sorted(items, key=lambda item: item[:2]):
+            ordered = sorted(recent)
+            summaries.append({
+                "name": name,
+                "labels": dict(labels),
+                "count": count,
+                "sum": total,
+                "buckets": buckets,
+                "counts": counts,
+                "p50": _percentile(ordered, 0.50),
+                "p99": _percentile(ordered, 0.99),
+                "recent": recent,
+            })
+        return summaries
+
+    def values(self):
+        """
+        Current counter and collector values
+
+        Returns:
+            list: (name, "counter" | "gauge", labels dict, value) tuples
+        """
+        with self._lock:
+            values = [(name, "counter", dict(labels), value)
+                      for (name, labels), value in sorted(self._counters.items())]
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                values.extend(collector())
+            except Exception:
+                # A broken collector must not take the metrics endpoint down
+                continue
+        return values
+
+    def render(self):
+        """
+        Everything in the Prometheus text exposition format
+
+        Returns:
+            str: Metrics text
+        """
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# HELP {METRIC_PREFIX}_{name} {METRIC_HELP.get(name, name.replace('_', ' '))}")
+                lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+        for histogram in self.histograms():
+            name = histogram["name"]
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(histogram["buckets"] + (float("inf"),), histogram["counts"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{METRIC_PREFIX}_{name}_bucket{_labels(histogram['labels'], le=le)} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}_{name}_sum{_labels(histogram['labels'])} {histogram['sum']!r}")
+            lines.append(f"{METRIC_PREFIX}_{name}_count{_labels(histogram['labels'])} {histogram['count']}")
+        for name, kind, labels, value in sorted(self.values(), key=lambda item: item[0]):
+            declare(name, kind)
+            lines.append(f"{METRIC_PREFIX}_{name}{_labels(labels)} {value!r}")
+        return '\n'.join(lines) + '\n'
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def _labels(labels, **extra):
+    pairs = list(labels.items()) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+registry = MetricsRegistry()
+
+@contextmanager
+def span(stage, **labels):
+    """
+    Time a block as one call of a pipeline stage
+
+    Yields the labels dict so the block can add labels it only learns while
+    running. Exceptions are counted in stage_errors_total and re-raised.
+
+    Example:
+        with span("parse") as labels:
+            labels["format"] = ".pdf"
+            text = parse_pdf(data)
+
+    Args:
+        stage (str): Stage name, e.g. "parse", "prompt", "llm", "decode", "db_write"
+        **labels: Extra label values, e.g. operation="resume_evaluation"
+
+    Yields:
+        dict: The labels, including stage
+    """
+    labels["stage"] = stage
+    start = time.perf_counter()
+    try:
+        yield labels
+    except BaseException:
+        registry.increment("stage_errors_total", **labels)
+        raise
+    finally:
+        registry.observe("stage_duration_seconds", time.perf_counter() - start, **labels)
+
+def record_usage(response, **labels):
+    """
+    Record prompt and response token counts from a response's usage metadata
+
+    Args:
+        response: Model response (responses without usage metadata are ignored)
+        **labels: Extra label values, e.g. lane="batch"
+    """
+    usage = getattr(response, "usage_metadata", None)
+    for kind, attribute in (("prompt", "prompt_token_count"), ("response", "candidates_token_count")):
+        tokens = getattr(usage, attribute, None)
+        if isinstance(tokens, int) and tokens >= 0:
+            registry.increment("llm_tokens_total", tokens, kind=kind, **labels)
+            registry.observe("llm_tokens", tokens, buckets=TOKEN_BUCKETS, kind=kind, **labels)
+
+def record_cache(cache, hit):
+    """
+    Count one cache lookup
+
+    Args:
+        cache (str): Cache name, e.g. "parse" or "llm"
+        hit (bool): Whether the lookup found an entry
+    """
+    registry.increment("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """
+    Serve registry.render() at /metrics from a background thread
+
+    Safe to call repeatedly; the server is started once per process.
+
+    Args:
+        port (int): Port to listen on (0 leaves the endpoint disabled)
+        host (str): Interface to bind
+
+    Returns:
+        http.server.ThreadingHTTPServer: The running server, or None when disabled
+    """
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ("/", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            server = ThreadingHTTPServer((host, port), MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+            _server = server
+    return _server
@@ -0,0 +1,192 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# In-process tier size (number of parsed documents kept in memory)
+PARSE_CACHE_SIZE = int(os.environ.get("PARSE_CACHE_SIZE", "256"))
+
+# Optional on-disk tier; disabled unless a directory is configured
+PARSE_CACHE_DIR = os.environ.get("PARSE_CACHE_DIR")
+PARSE_CACHE_MAX_BYTES = int(os.environ.get("PARSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def make_cache_key(data, namespace=""):
+    """
+    Build a content-addressed cache key
+
+    Args:
+        data (bytes): Raw document bytes
+        namespace (str): Extra key material such as parser version and file format
+
+    Returns:
+        str: Hex digest identifying the content within the namespace
+    """
+    digest = hashlib.sha256()
+    digest.update(namespace.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Two-tier cache of parsed resume text keyed by content hash
+
+    The memory tier is a bounded LRU. The optional disk tier stores one file
+    per key and evicts the least recently used files once the directory grows
+    past its byte budget.
+    """
+
+    def __init__(self, max_entries=PARSE_CACHE_SIZE, disk_dir=None, disk_max_bytes=PARSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def get(self, key):
+        """
+        Look up parsed text by key, promoting disk hits into memory
+
+        Args:
+            key (str): Cache key from make_cache_key
+
+        Returns:
+            str: Cached text, or None on a miss
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        text = self._disk_get(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._memory_set(key, text)
+        return text
+
+    def set(self, key, text):
+        """
+        Store parsed text in both tiers
+
+        Args:
+            key (str): Cache key from make_cache_key
+            text (str): Parsed text to cache
+        """
+        with self._lock:
+            self._memory_set(key, text)
+        self._disk_set(key, text)
+
+    def clear(self):
+        """Drop every entry from the memory tier"""
+        with self._lock:
+            self._entries.clear()
+
+    def _memory_set(self, key, text):
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.txt")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                text = file.read()
+            # Refresh the mtime so eviction treats this entry as recently used
+            os.utime(path)
+            return text
+        except OSError:
+            return None
+
+    def _disk_set(self, key, text):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # An existing entry for the key is overwritten, so only the difference is added
+            replaced_bytes = os.path.getsize(path)
+        except OSError:
+            replaced_bytes = 0
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The disk tier is best effort; the memory tier already has the entry
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_bytes += os.path.getsize(path) - replaced_bytes
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _disk_entries(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.txt'):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict_disk(self):
+        # Re-scan so entries written by other processes are accounted for
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% of the budget so we don't rescan on every write
+        target = self.disk_max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                continue
+        self._disk_bytes = total
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """
+    Get the process-wide parse cache configured from environment variables
+
+    Returns:
+        ParseCache: The shared cache instance
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ParseCache(disk_dir=PARSE_CACHE_DIR)
+    return _default_cache
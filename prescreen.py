@@ -0,0 +1,162 @@
+import os
+import asyncio
+from utils import extract_skills, calculate_match_percentage
+from resume_evaluator import evaluate_resume, evaluate_resume_stream, evaluate_resumes_batch
+from database import store_resume_evaluation
+
+# Recommendation recorded for resumes rejected without an LLM call
+PRESCREEN_REJECT = "Pre-screen Reject"
+
+# Minimum percentage of job skills a resume must mention to reach the LLM
+PRESCREEN_THRESHOLD = float(os.environ.get("PRESCREEN_THRESHOLD", "20"))
+
+def prescreen_resume(resume_text, job_description, job_skills=None, threshold=PRESCREEN_THRESHOLD):
+    """
+    Compute a deterministic skill overlap between a resume and a job description
+
+    Args:
+        resume_text (str): The parsed text from the candidate's resume
+        job_description (str): The job description text
+        job_skills (list): Pre-extracted job skills, to avoid re-extracting per resume
+        threshold (float): Minimum match percentage required to pass
+
+    Returns:
+        dict: Match percentage, matched/missing skills and whether the resume passed
+    """
+    if job_skills is None:
+        job_skills = extract_skills(job_description)
+    resume_skills = extract_skills(resume_text)
+    match_percentage = calculate_match_percentage(resume_skills, job_skills)
+
+    return {
+        "match_percentage": match_percentage,
+        "matched_skills": sorted(set(resume_skills) & set(job_skills)),
+        "missing_skills": sorted(set(job_skills) - set(resume_skills)),
+        # Without recognizable job skills there is nothing to screen on, so let the LLM decide
+        "passed": not job_skills or match_percentage >= threshold,
+        "threshold": threshold,
+    }
+
+def build_prescreen_reject_result(prescreen):
+    """
+    Build an evaluation result for a resume rejected by the pre-screen
+
+    The result has the same keys as an LLM evaluation so it can be displayed
+    and stored the same way, plus a "prescreen" marker.
+
+    Args:
+        prescreen (dict): Output of prescreen_resume
+
+    Returns:
+        dict: Evaluation result labelled as a pre-screen reject
+    """
+    return {
+        "overall_match_score": round(prescreen["match_percentage"] / 10, 1),
+        "key_skills_matched": prescreen["matched_skills"],
+        "missing_weak_areas": prescreen["missing_skills"],
+        "experience_summary": "Not assessed: the resume was rejected by the automated skill pre-screen.",
+        "recommendation": PRESCREEN_REJECT,
+        "reasoning": (
+            f"Only {prescreen['match_percentage']:.0f}% of the skills in the job description were found "
+            f"in the resume (threshold {prescreen['threshold']:.0f}%), so no AI evaluation was run."
+        ),
+        "prescreen": True,
+    }
+
+def _reject(resume_text, job_description, prescreen, store):
+    result = build_prescreen_reject_result(prescreen)
+    if store:
+        store_resume_evaluation(resume_text=resume_text, job_description=job_description, result=result)
+    return result
+
+def evaluate_resume_with_prescreen(resume_text, job_description, threshold=PRESCREEN_THRESHOLD, store_rejects=True,
+                                   **kwargs):
+    """
+    Evaluate a resume, skipping the Gemini call when the skill overlap is too low
+
+    Args:
+        resume_text (str): The parsed text from the candidate's resume
+        job_description (str): The job description text
+        threshold (float): Minimum skill match percentage required to call the LLM
+        store_rejects (bool): Store pre-screen rejects with store_resume_evaluation
+        **kwargs: Options passed to evaluate_resume
+
+    Returns:
+        dict: The evaluation result (a pre-screen reject result if below the threshold)
+    """
+    prescreen = prescreen_resume(resume_text, job_description, threshold=threshold)
+    if not prescreen["passed"]:
+        return _reject(resume_text, job_description, prescreen, store_rejects)
+    return evaluate_resume(resume_text, job_description, **kwargs)
+
+def evaluate_resume_with_prescreen_stream(resume_text, job_description, threshold=PRESCREEN_THRESHOLD,
+                                          store_rejects=True, **kwargs):
+    """
+    Streaming counterpart of evaluate_resume_with_prescreen
+
+    Args:
+        resume_text (str): The parsed text from the candidate's resume
+        job_description (str): The job description text
+        threshold (float): Minimum skill match percentage required to call the LLM
+        store_rejects (bool): Store pre-screen rejects with store_resume_evaluation
+        **kwargs: Options passed to evaluate_resume_stream
+
+    Yields:
+        tuple: (result dict, final flag) as from evaluate_resume_stream; a
+        pre-screen reject is yielded once as the final result
+    """
+    prescreen = prescreen_resume(resume_text, job_description, threshold=threshold)
+    if not prescreen["passed"]:
+        yield _reject(resume_text, job_description, prescreen, store_rejects), True
+        return
+    yield from evaluate_resume_stream(resume_text, job_description, **kwargs)
+
+async def screen_resumes_batch(resumes, job_description, threshold=PRESCREEN_THRESHOLD, mode="skip",
+                               store_rejects=True, **kwargs):
+    """
+    Batch evaluation with a local skill pre-screen in front of the LLM
+
+    In "skip" mode resumes below the threshold are rejected without an LLM
+    call. In "deprioritize" mode they are still evaluated, but only after the
+    passing resumes and in the lowest-priority scheduler lane.
+
+    Args:
+        resumes (list): Resume texts to evaluate
+        job_description (str): The job description text
+        threshold (float): Minimum skill match percentage for the first pass
+        mode (str): "skip" or "deprioritize"
+        store_rejects (bool): Store pre-screen rejects with store_resume_evaluation
+        **kwargs: Options passed to evaluate_resumes_batch
+
+    Yields:
+        tuple: (index into resumes, result dict or Exception)
+    """
+    if mode not in ("skip", "deprioritize"):
+        raise ValueError(f"Unknown pre-screen mode: {mode}")
+
+    resumes = list(resumes)
+    job_skills = extract_skills(job_description)
+    passed, below = [], []
+    for index, resume_text in enumerate(resumes):
+        prescreen = prescreen_resume(resume_text, job_description, job_skills=job_skills, threshold=threshold)
+        (passed if prescreen["passed"] else below).append((index, prescreen))
+
+    if mode == "skip":
+        for index, prescreen in below:
+            try:
+                # The reject is written to the database, so keep it off the event loop
+                yield index, await asyncio.to_thread(_reject, resumes[index], job_description, prescreen,
+                                                     store_rejects)
+            except Exception as e:
+                yield index, e
+        below = []
+
+    kwargs.setdefault("lane", "screening")
+    for group in (passed, below):
+        if not group:
+            continue
+        async for position, result in evaluate_resumes_batch(
+            [resumes[index] for index, _ in group], job_description, **kwargs
+        ):
+            yield group[position][0], result
+        kwargs["lane"] = "batch"
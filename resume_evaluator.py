@@ -1,91 +1,484 @@
 import os
-import json
-import google.generativeai as genai
+import re
+import asyncio
+import random
+import llm_cache
+import metrics
+from resume_parser import structure_resume
+from llm_client import get_model, chunk_text, run_async
+from llm_decoder import (DecodeError, DEFAULT_DECODE_RETRIES, decode_response, generate_json, generate_json_async,
+                         generation_config, stats as decoder_stats)
+from streaming_json import StreamingJSONParser
+from llm_scheduler import get_scheduler, estimate_tokens
 
-# Get Google AI API key from environment variables
-GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("Google API key not found in environment variables.")
+MODEL_NAME = 'gemini-1.5-pro'
 
-# Configure the Gemini API
-genai.configure(api_key=GOOGLE_API_KEY)
+# Bump whenever the prompt or result format changes so cached results are not reused
+PROMPT_VERSION = "3"
 
-def evaluate_resume(resume_text, job_description):
+# Defaults for batch evaluation
+DEFAULT_BATCH_CONCURRENCY = 5
+DEFAULT_BATCH_RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+# Prompt tokens allowed for the resume; lower-priority sections are trimmed to fit
+RESUME_PROMPT_TOKEN_BUDGET = int(os.environ.get("RESUME_PROMPT_TOKEN_BUDGET", "1200"))
+
+# Base weight of each section when choosing what fits the budget; overlap with
+# the job description adds up to JD_RELEVANCE_WEIGHT on top
+SECTION_PRIORITY = {
+    "experience": 3.0, "skills": 3.0, "projects": 2.0, "summary": 2.0, "other": 2.0, "education": 1.5,
+    "certifications": 1.0, "contact": 1.0, "awards": 0.5, "publications": 0.5, "volunteering": 0.5,
+    "languages": 0.5, "interests": 0.0,
+}
+JD_RELEVANCE_WEIGHT = 5.0
+# Sections that never reach the prompt
+DROPPED_SECTIONS = ("references",)
+# A section is only cut down if at least this many tokens of it would fit
+MIN_TRIMMED_SECTION_TOKENS = 40
+
+_CONTACT_DETAILS = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.-]+"  # email
+    r"|(?:https?://|www\.)\S+"  # URL
+    r"|\+?\d[\d ().-]{7,}\d"  # phone number
+    r"|\b\d+\s+(?:[A-Z][a-z]+\s+)+(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Ln|Lane|Dr|Drive|Way|Ct|Court)\b\.?"
+)
+_SEPARATORS = re.compile(r"\s*[|•·]\s*(?:[|•·]\s*)*")
+_TERM_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in is it of on or our the to we with you your will who this that
+    their they can all any not years year experience work working team role including such using etc
+""".split())
+
+EVALUATION_SCHEMA = {
+    "overall_match_score": {"type": "number", "minimum": 0, "maximum": 10},
+    "recommendation": {"type": "string", "enum": ["Strong Fit", "Moderate Fit", "Weak Fit"]},
+    "reasoning": {"type": "string"},
+    "key_skills_matched": {"type": "array"},
+    "missing_weak_areas": {"type": "array"},
+    "experience_summary": {"type": "string"},
+}
+
+# Native JSON output constrained to the schema. Streamed calls only ask for
+# JSON: the schema makes Gemini emit fields in its own order, which would
+# delay the score and recommendation the prompt asks for first.
+GENERATION_CONFIG = generation_config(EVALUATION_SCHEMA)
+STREAM_GENERATION_CONFIG = generation_config()
+
+def _get_model():
+    """Get the shared Gemini model, creating it on first use"""
+    return get_model(MODEL_NAME)
+
+def _cache_key(resume_text, job_description):
+    return llm_cache.make_llm_cache_key("resume_evaluation", MODEL_NAME, PROMPT_VERSION, resume_text, job_description)
+
+def _terms(text):
+    terms = (term.rstrip('.') for term in _TERM_PATTERN.findall(text.lower()))
+    return {term for term in terms if len(term) > 1 and term not in _STOPWORDS}
+
+def _strip_contact_details(text):
+    lines = []
+    for line in text.split('\n'):
+        line = _CONTACT_DETAILS.sub(' ', line)
+        # Collapse the separators left between removed details
+        line = _SEPARATORS.sub(' | ', line).strip(' |,;')
+        if line:
+            lines.append(' '.join(line.split()))
+    return '\n'.join(lines)
+
+def _truncate_to_tokens(text, tokens):
+    """Cut text to roughly `tokens` tokens, at a line break or else a space"""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    cut = text.rfind('\n', 0, limit)
+    if cut <= 0:
+        cut = text.rfind(' ', 0, limit)
+    return text[:cut if cut > 0 else limit].rstrip()
+
+def compress_resume(resume_text, job_description, token_budget=RESUME_PROMPT_TOKEN_BUDGET):
     """
-    Evaluate a resume against a job description using Google's Gemini API
-    
+    Fit a resume into a prompt token budget, keeping the most relevant sections
+
+    Sections come from resume_parser.structure_resume, so the text needs its
+    line breaks (parse_resume(..., preserve_lines=True)). Text without any
+    recognizable section heading, such as text collapsed onto one line, is
+    returned unchanged: without sections there is no safe way to choose
+    what to cut. Otherwise references are always dropped
+    and contact details (emails, phone numbers, URLs, street addresses) are
+    removed. Sections are then ranked by SECTION_PRIORITY plus their overlap
+    with the job description's terms and kept whole, in that order, while
+    they fit; the leftover budget then goes to the best sections that did
+    not fit, cut at a line break. Kept sections stay in their original order.
+
+    Args:
+        resume_text (str): The parsed resume text
+        job_description (str): The job description text
+        token_budget (int): Tokens allowed for the resume
+
+    Returns:
+        tuple: (compressed text, report dict with original_tokens,
+            compressed_tokens, tokens_saved and the kept, trimmed and dropped
+            section names)
+    """
+    structured = structure_resume(resume_text)
+    if not any(section.heading for section in structured.sections):
+        original_tokens = estimate_tokens(resume_text, response_tokens=0)
+        return resume_text, {
+            "original_tokens": original_tokens,
+            "compressed_tokens": original_tokens,
+            "tokens_saved": 0,
+            "kept": [section.name for section in structured.sections],
+            "trimmed": [],
+            "dropped": [],
+        }
+    job_terms = _terms(job_description)
+    candidates = []
+    dropped = []
+    for position, section in enumerate(structured.sections):
+        if section.name in DROPPED_SECTIONS:
+            dropped.append(section.name)
+            continue
+        text = section.text
+        if section.name == "contact":
+            text = _strip_contact_details(text)
+        if not text.strip():
+            continue
+        relevance = len(_terms(text) & job_terms) / len(job_terms) if job_terms else 0.0
+        score = SECTION_PRIORITY.get(section.name, 1.0) + JD_RELEVANCE_WEIGHT * relevance
+        candidates.append((score, position, section.name, text))
+
+    kept = {}
+    skipped = []
+    remaining = token_budget
+    for score, position, name, text in sorted(candidates, key=lambda candidate: (-candidate[0], candidate[1])):
+        tokens = estimate_tokens(text, response_tokens=0)
+        if tokens <= remaining:
+            kept[position] = (name, text)
+            remaining -= tokens
+        else:
+            skipped.append((position, name, text))
+    # Whatever budget is left goes to the best sections that did not fit whole
+    trimmed = []
+    for position, name, text in skipped:
+        if remaining >= MIN_TRIMMED_SECTION_TOKENS:
+            text = _truncate_to_tokens(text, remaining)
+            kept[position] = (name, text)
+            trimmed.append(name)
+            remaining -= estimate_tokens(text, response_tokens=0)
+        else:
+            dropped.append(name)
+
+    compressed = '\n'.join(text for _, text in (kept[position] for position in sorted(kept)))
+    original_tokens = estimate_tokens(resume_text, response_tokens=0)
+    compressed_tokens = estimate_tokens(compressed, response_tokens=0)
+    return compressed, {
+        "original_tokens": original_tokens,
+        "compressed_tokens": compressed_tokens,
+        "tokens_saved": max(0, original_tokens - compressed_tokens),
+        "kept": [name for name, _ in (kept[position] for position in sorted(kept))],
+        "trimmed": trimmed,
+        "dropped": dropped,
+    }
+
+def build_evaluation_prompt(resume_text, job_description, token_budget=RESUME_PROMPT_TOKEN_BUDGET, prompt_report=None):
+    """
+    Build the Gemini prompt for a resume evaluation
+
+    The resume is first fitted into token_budget with compress_resume; the
+    tokens saved are recorded in the prompt_tokens_saved metric.
+
     Args:
         resume_text (str): The parsed text from the candidate's resume
         job_description (str): The job description text
-        
+        token_budget (int): Tokens allowed for the resume (None to include it unchanged)
+        prompt_report (dict): If given, updated with compress_resume's report for this prompt
+
     Returns:
-        dict: A dictionary containing the evaluation results
+        str: The prompt text
     """
-    try:
-        # Configure the model
-        model = genai.GenerativeModel('gemini-1.5-pro')
-        
-        # Prepare the prompt for the LLM
-        prompt = f"""
+    with metrics.span("prompt", operation="resume_evaluation"):
+        if token_budget is not None:
+            resume_text, report = compress_resume(resume_text, job_description, token_budget)
+            if prompt_report is not None:
+                prompt_report.update(report)
+            metrics.registry.observe("prompt_tokens_saved", report["tokens_saved"], buckets=metrics.TOKEN_BUCKETS,
+                                     operation="resume_evaluation")
+        return f"""
         You are a professional HR recruiter and resume screening expert specializing in Software Engineering roles.
         Evaluate the provided resume and compare it to the job description for a Software Engineer position.
         Based on your analysis, provide a structured evaluation according to the specified format.
-        
+
         Please analyze the following resume and job description, then respond using JSON format.
-        
+
         JOB DESCRIPTION:
         {job_description}
-        
+
         CANDIDATE RESUME:
         {resume_text}
-        
+
         Provide your evaluation in the following JSON format:
         {{
             "overall_match_score": (a number from 0 to 10),
+            "recommendation": "Strong Fit / Moderate Fit / Weak Fit",
+            "reasoning": "1-2 sentences explaining why the recommendation was given",
             "key_skills_matched": [array of skills from resume that match the job description],
             "missing_weak_areas": [array of key skills or qualifications not found or weak in the resume],
-            "experience_summary": "summary of the candidate's most relevant experiences to the role",
-            "recommendation": "Strong Fit / Moderate Fit / Weak Fit",
-            "reasoning": "1-2 sentences explaining why the recommendation was given"
+            "experience_summary": "summary of the candidate's most relevant experiences to the role"
         }}
-        
+
         Be honest, objective, and precise in your evaluation.
-        
+        Output the fields in the order shown above.
+
         Make sure to format your response as a valid JSON object.
         """
-        
-        # Call the Gemini API
-        response = model.generate_content(prompt)
-        
-        # Parse the response to extract the JSON object
-        response_text = response.text
-        
-        # Handle potential markdown formatting in the response
-        if "```json" in response_text:
-            # Extract the JSON part from markdown code block
-            json_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            # Extract from generic code block
-            json_text = response_text.split("```")[1].split("```")[0].strip()
-        else:
-            # No code blocks, use the whole text
-            json_text = response_text
-        
-        # Parse the JSON
-        result = json.loads(json_text)
-        
-        # Validate the response structure
-        required_keys = ["overall_match_score", "key_skills_matched", "missing_weak_areas", 
-                         "experience_summary", "recommendation", "reasoning"]
-        
-        for key in required_keys:
-            if key not in result:
-                raise ValueError(f"Missing required key in API response: {key}")
-        
-        # Ensure overall_match_score is within the correct range
-        result["overall_match_score"] = max(0, min(10, result["overall_match_score"]))
-        
+
+def parse_evaluation_response(response_text):
+    """
+    Decode and validate the evaluation JSON from a Gemini response
+
+    Near-JSON is repaired locally and near-miss types (e.g. a score given as
+    "8/10") are coerced; see llm_decoder.
+
+    Args:
+        response_text (str): Raw response text from the model
+
+    Returns:
+        dict: The validated evaluation result
+    """
+    return decode_response(response_text, EVALUATION_SCHEMA)
+
+def _generate_evaluation(prompt, lane, retries=DEFAULT_DECODE_RETRIES):
+    """Call Gemini for a complete evaluation, regenerating only if the response cannot be decoded"""
+    return generate_json(
+        lambda: get_scheduler().call(_get_model().generate_content, prompt, generation_config=GENERATION_CONFIG,
+                                     lane=lane, tokens=estimate_tokens(prompt)).text,
+        EVALUATION_SCHEMA, retries=retries
+    )
+
+def evaluate_resume(resume_text, job_description, use_cache=True, lane="interactive", prompt_report=None):
+    """
+    Evaluate a resume against a job description using Google's Gemini API
+
+    Args:
+        resume_text (str): The parsed text from the candidate's resume
+        job_description (str): The job description text
+        use_cache (bool): Return a cached result for identical inputs when available
+        lane (str): Scheduler priority lane for the API call
+        prompt_report (dict): If given, filled with the compression report of the
+            prompt sent (see compress_resume); left empty when no call is made
+
+    Returns:
+        dict: A dictionary containing the evaluation results
+    """
+    try:
+        cache_key = _cache_key(resume_text, job_description)
+        if use_cache:
+            cached_result = llm_cache.get_cached_result(cache_key)
+            if cached_result is not None:
+                return cached_result
+
+        # Call the Gemini API through the shared rate-limit scheduler
+        prompt = build_evaluation_prompt(resume_text, job_description, prompt_report=prompt_report)
+        result = _generate_evaluation(prompt, lane)
+
+        llm_cache.store_result(cache_key, "resume_evaluation", MODEL_NAME, PROMPT_VERSION, result)
         return result
-        
+
     except Exception as e:
         raise Exception(f"Error evaluating resume: {str(e)}")
+
+def evaluate_resume_stream(resume_text, job_description, use_cache=True, lane="interactive", prompt_report=None):
+    """
+    Evaluate a resume, yielding partial results while the response streams in
+
+    Fields appear in a partial result as soon as their value is complete, and
+    list fields grow item by item, so the score and recommendation can be
+    shown long before the whole response has arrived.
+
+    Args:
+        resume_text (str): The parsed text from the candidate's resume
+        job_description (str): The job description text
+        use_cache (bool): Return a cached result for identical inputs when available
+        lane (str): Scheduler priority lane for the API call
+        prompt_report (dict): If given, filled with the compression report of the
+            prompt sent (see compress_resume); left empty when no call is made
+
+    Yields:
+        tuple: (result dict, final flag); partial dicts hold only the fields
+        received so far, and the last item is the validated result
+    """
+    try:
+        cache_key = _cache_key(resume_text, job_description)
+        if use_cache:
+            cached_result = llm_cache.get_cached_result(cache_key)
+            if cached_result is not None:
+                yield cached_result, True
+                return
+
+        prompt = build_evaluation_prompt(resume_text, job_description, prompt_report=prompt_report)
+        parser = StreamingJSONParser()
+        response_text = []
+        for chunk in get_scheduler().stream(_get_model().generate_content, prompt, stream=True,
+                                            generation_config=STREAM_GENERATION_CONFIG,
+                                            lane=lane, tokens=estimate_tokens(prompt)):
+            text = chunk_text(chunk)
+            response_text.append(text)
+            if parser.feed(text):
+                yield parser.snapshot(), False
+
+        try:
+            result = parse_evaluation_response(''.join(response_text))
+        except DecodeError:
+            # Regenerate without streaming; the partial fields already shown are replaced
+            decoder_stats.increment("retries")
+            result = _generate_evaluation(prompt, lane, retries=DEFAULT_DECODE_RETRIES - 1)
+
+        llm_cache.store_result(cache_key, "resume_evaluation", MODEL_NAME, PROMPT_VERSION, result)
+        yield result, True
+
+    except Exception as e:
+        raise Exception(f"Error evaluating resume: {str(e)}")
+
+async def evaluate_resume_async(resume_text, job_description, use_cache=True, lane="batch"):
+    """
+    Evaluate a resume without blocking the event loop
+
+    Args:
+        resume_text (str): The parsed text from the candidate's resume
+        job_description (str): The job description text
+        use_cache (bool): Return a cached result for identical inputs when available
+        lane (str): Scheduler priority lane for the API call
+
+    Returns:
+        dict: A dictionary containing the evaluation results
+    """
+    try:
+        cache_key = _cache_key(resume_text, job_description)
+        if use_cache:
+            # Cache lookups hit the database, so keep them off the event loop
+            cached_result = await asyncio.to_thread(llm_cache.get_cached_result, cache_key)
+            if cached_result is not None:
+                return cached_result
+
+        prompt = build_evaluation_prompt(resume_text, job_description)
+
+        async def generate():
+            response = await get_scheduler().call_async(_get_model().generate_content_async, prompt,
+                                                        generation_config=GENERATION_CONFIG,
+                                                        lane=lane, tokens=estimate_tokens(prompt))
+            return response.text
+
+        result = await generate_json_async(generate, EVALUATION_SCHEMA, retries=DEFAULT_DECODE_RETRIES)
+
+        await asyncio.to_thread(llm_cache.store_result, cache_key, "resume_evaluation", MODEL_NAME, PROMPT_VERSION, result)
+        return result
+
+    except DecodeError:
+        # Left unwrapped so batch callers can tell it from transient API errors
+        raise
+    except Exception as e:
+        raise Exception(f"Error evaluating resume: {str(e)}")
+
+async def _evaluate_with_retries(resume_text, job_description, retries, use_cache, lane, semaphore):
+    attempt = 0
+    while True:
+        try:
+            # A slot is held per attempt, not across the backoff, so waiting retries don't block other items
+            async with semaphore:
+                return await evaluate_resume_async(resume_text, job_description, use_cache=use_cache, lane=lane)
+        except DecodeError:
+            # generate_json_async already regenerated the response; retrying would only repeat that
+            raise
+        except Exception:
+            if attempt >= retries:
+                raise
+            # Exponential backoff with full jitter so retries from many workers don't align
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt))
+            await asyncio.sleep(random.uniform(0, delay))
+            attempt += 1
+
+async def evaluate_resumes_batch(resumes, job_description, concurrency=DEFAULT_BATCH_CONCURRENCY,
+                                 retries=DEFAULT_BATCH_RETRIES, ordered=False, progress_callback=None,
+                                 use_cache=True, lane="batch"):
+    """
+    Evaluate many resumes against one job description with bounded concurrency
+
+    At most `concurrency` Gemini calls are in flight at once. Each item is
+    retried with jittered exponential backoff; an item that still fails is
+    yielded with its exception so the rest of the batch continues. Responses
+    that cannot be decoded are not retried here, since the decoder has
+    already regenerated them.
+
+    Args:
+        resumes (list): Resume texts to evaluate
+        job_description (str): The job description text
+        concurrency (int): Maximum number of concurrent API calls
+        retries (int): Retries per item after the first failed attempt
+        ordered (bool): Yield results in input order instead of as they complete
+        progress_callback (callable): Called as progress_callback(completed, total) after each item
+        use_cache (bool): Return cached results for identical inputs when available
+        lane (str): Scheduler priority lane for the API calls
+
+    Yields:
+        tuple: (index into resumes, result dict or Exception)
+    """
+    resumes = list(resumes)
+    total = len(resumes)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index, resume_text):
+        try:
+            return index, await _evaluate_with_retries(resume_text, job_description, retries, use_cache, lane,
+                                                       semaphore)
+        except Exception as e:
+            return index, e
+
+    tasks = [asyncio.create_task(run(index, resume_text)) for index, resume_text in enumerate(resumes)]
+    completed = 0
+    pending_results = {}
+    next_index = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, result = await next_done
+            completed += 1
+            if progress_callback is not None:
+                progress_callback(completed, total)
+
+            if not ordered:
+                yield index, result
+                continue
+
+            # Hold back out-of-order results until every earlier item has finished
+            pending_results[index] = result
+            while next_index in pending_results:
+                yield next_index, pending_results.pop(next_index)
+                next_index += 1
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def evaluate_resumes(resumes, job_description, **kwargs):
+    """
+    Synchronous wrapper around evaluate_resumes_batch
+
+    Runs on the shared model event loop (llm_client.run_async), so it can be
+    called any number of times per process.
+
+    Args:
+        resumes (list): Resume texts to evaluate
+        job_description (str): The job description text
+        **kwargs: Options passed to evaluate_resumes_batch
+
+    Returns:
+        list: Result dict or Exception for each resume, in input order
+    """
+    async def collect():
+        results = [None] * len(resumes)
+        async for index, result in evaluate_resumes_batch(resumes, job_description, **kwargs):
+            results[index] = result
+        return results
+
+    resumes = list(resumes)
+    return run_async(collect())
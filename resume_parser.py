@@ -1,100 +1,591 @@
 import PyPDF2
-import docx2txt
+import io
 import os
+import re
+import signal
+import zipfile
+from xml.etree.ElementTree import iterparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from parse_cache import get_parse_cache, make_cache_key
+import metrics
 
-def parse_resume(file_path):
+# Bump whenever extraction output changes so cached text is not reused
+PARSER_VERSION = "3"
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+# WordprocessingML element names (Clark notation) used by the DOCX extractor
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_PARAGRAPH = _W + "p"
+_DOCX_TEXT = _W + "t"
+_DOCX_TAB = _W + "tab"
+_DOCX_BREAKS = (_W + "br", _W + "cr")
+_DOCX_BODY = _W + "body"
+# Legacy copies of text boxes that duplicate their mc:Choice content
+_DOCX_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_DOCX_MAIN_PART = re.compile(r"word/document\d*\.xml")
+
+# Seconds a single file may spend in a bulk-parse worker before it is abandoned
+DEFAULT_PARSE_TIMEOUT = 60
+
+# Extraction limits for long PDFs such as portfolios attached as resumes
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.environ.get("PDF_MAX_CHARS", "100000"))
+
+# A PDF whose first pages yield almost no text is treated as a scanned image
+SCANNED_PDF_PROBE_PAGES = 3
+SCANNED_PDF_MIN_CHARS = 50
+
+class ScannedPDFError(ValueError):
+    """Raised when a PDF has no extractable text layer (e.g. a scanned image)"""
+
+def resume_cache_key(data, file_extension, preserve_lines=False):
+    """
+    Build the parse cache key for a resume's raw bytes
+
+    Args:
+        data (bytes): Raw file content
+        file_extension (str): File extension including the dot, e.g. ".pdf"
+        preserve_lines (bool): Whether the cached text keeps its line breaks
+
+    Returns:
+        str: Cache key tied to the content, format, parser version and normalization
+    """
+    namespace = f"{PARSER_VERSION}:{file_extension.lower()}"
+    return make_cache_key(data, f"{namespace}:lines" if preserve_lines else namespace)
+
+def normalize_whitespace(text):
+    """Collapse all whitespace, including line breaks, into single spaces"""
+    return ' '.join(text.split())
+
+def normalize_lines(text):
+    """Collapse whitespace within each line and drop blank lines, keeping the line breaks"""
+    return '\n'.join(line for line in (' '.join(raw.split()) for raw in text.splitlines()) if line)
+
+def _normalize_format(file_format):
+    file_format = file_format.lower()
+    return file_format if file_format.startswith('.') else f".{file_format}"
+
+def detect_file_format(data):
+    """
+    Detect a resume's format from its leading bytes
+
+    Args:
+        data (bytes): Raw file content
+
+    Returns:
+        str: File extension including the dot (".pdf", ".docx" or ".txt")
+    """
+    head = bytes(data[:1024])
+    # The PDF header may be preceded by junk bytes, so search the first KB
+    if b'%PDF-' in head:
+        return '.pdf'
+    if head.startswith(b'PK\x03\x04'):
+        return '.docx'
+    if b'\0' not in head:
+        return '.txt'
+    raise ValueError("Unsupported file format: could not detect file type")
+
+def _read_source(source):
+    """
+    Load a path, bytes-like object or binary file object into bytes
+
+    Returns:
+        tuple: (raw bytes, extension implied by the path or None)
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            return file.read(), os.path.splitext(os.fspath(source))[1].lower() or None
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source), None
+    if hasattr(source, 'read'):
+        return source.read(), None
+    raise TypeError(f"Unsupported resume source: {type(source).__name__}")
+
+@contextmanager
+def _open_binary(source):
+    """Yield a binary file object for a path, bytes-like object or file object"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            yield file
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    else:
+        yield source
+
+def parse_resume(source, file_format=None, use_cache=True, preserve_lines=False):
     """
     Parse resume content from various file formats (PDF, DOCX, TXT)
     
     Args:
-        file_path (str): Path to the resume file
+        source (str | bytes | BytesIO | memoryview): Path to the resume file or its content in memory
+        file_format (str): Format hint such as "pdf" or ".docx"; detected from
+            the path or the content when omitted
+        use_cache (bool): Reuse previously parsed text for identical file content
+        preserve_lines (bool): Keep one line per extracted line instead of
+            collapsing the text onto a single line (needed by structure_resume)
         
     Returns:
-        str: Extracted text from the resume
+        str: Extracted text from the resume (a PDF without a text layer raises
+            ScannedPDFError rather than a generic parse error)
     """
-    file_extension = os.path.splitext(file_path)[1].lower()
-    
     try:
-        if file_extension == '.pdf':
-            return parse_pdf(file_path)
-        elif file_extension == '.docx':
-            return parse_docx(file_path)
-        elif file_extension == '.txt':
-            return parse_txt(file_path)
-        else:
-            raise ValueError(f"Unsupported file format: {file_extension}")
+        data, file_extension = _read_source(source)
+        if file_format:
+            file_extension = _normalize_format(file_format)
+        elif file_extension is None:
+            file_extension = detect_file_format(data)
+
+        cache_key = None
+        if use_cache:
+            cache_key = resume_cache_key(data, file_extension, preserve_lines=preserve_lines)
+            cached_text = get_parse_cache().get(cache_key)
+            metrics.record_cache("parse", cached_text is not None)
+            if cached_text is not None:
+                return cached_text
+
+        with metrics.span("parse", format=file_extension):
+            if file_extension == '.pdf':
+                text = parse_pdf(data, preserve_lines=preserve_lines)
+            elif file_extension == '.docx':
+                text = parse_docx(data, preserve_lines=preserve_lines)
+            elif file_extension == '.txt':
+                text = parse_txt(data, preserve_lines=preserve_lines)
+            else:
+                raise ValueError(f"Unsupported file format: {file_extension}")
+
+        if cache_key is not None:
+            get_parse_cache().set(cache_key, text)
+        return text
+    except ScannedPDFError:
+        # Kept distinct so callers can suggest OCR instead of reporting a broken file
+        raise
     except Exception as e:
         raise Exception(f"Error parsing file: {str(e)}")
 
-def parse_pdf(pdf_path):
+def iter_pdf_pages(pdf_source, max_pages=PDF_MAX_PAGES, probe_pages=SCANNED_PDF_PROBE_PAGES,
+                   min_probe_chars=SCANNED_PDF_MIN_CHARS, preserve_lines=False):
+    """
+    Stream whitespace-normalized text from a PDF one page at a time
+    
+    Args:
+        pdf_source (str | bytes | BytesIO): Path to the PDF file or its content
+        max_pages (int): Stop after this many pages (None for no limit)
+        probe_pages (int): Number of leading pages checked for a text layer
+        min_probe_chars (int): Minimum characters the probe pages must yield
+        preserve_lines (bool): Keep the page's line breaks
+        
+    Yields:
+        str: Normalized text of each page (empty for pages without text)
+    """
+    with _open_binary(pdf_source) as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        num_pages = len(pdf_reader.pages)
+        if max_pages:
+            num_pages = min(num_pages, max_pages)
+        probe_limit = min(probe_pages, num_pages)
+        probe_chars = 0
+        normalize = normalize_lines if preserve_lines else normalize_whitespace
+        
+        for page_num in range(num_pages):
+            page_text = normalize(pdf_reader.pages[page_num].extract_text() or '')
+            if page_num < probe_limit:
+                probe_chars += len(page_text)
+                # Fail fast instead of walking every page of an image-only document
+                if page_num == probe_limit - 1 and probe_chars < min_probe_chars:
+                    raise ScannedPDFError(
+                        f"PDF appears to be scanned: only {probe_chars} characters of text "
+                        f"in the first {probe_limit} page(s)"
+                    )
+            yield page_text
+
+def parse_pdf(pdf_source, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS, preserve_lines=False):
     """
     Extract text from PDF file
     
     Args:
-        pdf_path (str): Path to the PDF file
+        pdf_source (str | bytes | BytesIO): Path to the PDF file or its content
+        max_pages (int): Maximum number of pages to read (None for no limit)
+        max_chars (int): Maximum number of characters to return (None for no limit)
+        preserve_lines (bool): Keep line breaks (pages are joined by a line break)
         
     Returns:
         str: Extracted text
     """
-    text = ""
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            num_pages = len(pdf_reader.pages)
-            
-            for page_num in range(num_pages):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text()
-                
-        # Clean up text
-        text = ' '.join(text.split())
-        return text
+        parts = []
+        length = 0
+        for page_text in iter_pdf_pages(pdf_source, max_pages=max_pages, preserve_lines=preserve_lines):
+            if not page_text:
+                continue
+            if max_chars and length + len(page_text) >= max_chars:
+                parts.append(page_text[:max_chars - length])
+                break
+            parts.append(page_text)
+            # Account for the separator added by the final join
+            length += len(page_text) + 1
+        return ('\n' if preserve_lines else ' ').join(parts)
+    except ScannedPDFError:
+        raise
     except Exception as e:
         raise Exception(f"Error parsing PDF: {str(e)}")
 
-def parse_docx(docx_path):
+def iter_docx_lines(docx_source):
+    """
+    Stream the text of a DOCX body one line at a time
+    
+    word/document.xml is decompressed straight out of the zip and read with
+    an incremental XML parser, so the document is never held in memory as a
+    whole. Paragraphs, including those inside table cells and text boxes,
+    come out in document order; line breaks inside a paragraph start a new
+    line. Headers, footers and embedded media are not read.
+    
+    Args:
+        docx_source (str | bytes | BytesIO): Path to the DOCX file or its content
+        
+    Yields:
+        str: Whitespace-normalized, non-empty lines
+    """
+    with _open_binary(docx_source) as file, zipfile.ZipFile(file) as archive:
+        names = archive.namelist()
+        part = "word/document.xml" if "word/document.xml" in names else \
+            next((name for name in names if _DOCX_MAIN_PART.fullmatch(name)), None)
+        if part is None:
+            raise ValueError("Not a Word document: word/document.xml is missing")
+        with archive.open(part) as xml_stream:
+            body = None
+            depth = 0
+            skipping = 0
+            # Text runs of each paragraph still open (text boxes nest paragraphs)
+            paragraphs = []
+            for event, element in iterparse(xml_stream, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    depth += 1
+                    if tag == _DOCX_PARAGRAPH:
+                        paragraphs.append([])
+                    elif tag == _DOCX_FALLBACK:
+                        skipping += 1
+                    elif tag == _DOCX_BODY:
+                        body = element
+                    continue
+
+                depth -= 1
+                if tag == _DOCX_TEXT:
+                    if paragraphs and not skipping and element.text:
+                        paragraphs[-1].append(element.text)
+                elif tag == _DOCX_TAB:
+                    if paragraphs and not skipping:
+                        paragraphs[-1].append(' ')
+                elif tag in _DOCX_BREAKS:
+                    if paragraphs and not skipping:
+                        paragraphs[-1].append('\n')
+                elif tag == _DOCX_PARAGRAPH:
+                    runs = paragraphs.pop()
+                    if not skipping:
+                        for line in ''.join(runs).split('\n'):
+                            line = ' '.join(line.split())
+                            if line:
+                                yield line
+                elif tag == _DOCX_FALLBACK:
+                    skipping -= 1
+                if depth == 2 and body is not None:
+                    # A top-level block (paragraph or table) is done; free it
+                    body.clear()
+
+def parse_docx(docx_source, preserve_lines=False):
     """
     Extract text from DOCX file
     
     Args:
-        docx_path (str): Path to the DOCX file
+        docx_source (str | bytes | BytesIO): Path to the DOCX file or its content
+        preserve_lines (bool): Keep one line per paragraph
         
     Returns:
         str: Extracted text
     """
     try:
-        text = docx2txt.process(docx_path)
-        
-        # Clean up text
-        text = ' '.join(text.split())
-        return text
+        # Lines are already normalized, so no second whitespace pass is needed
+        return ('\n' if preserve_lines else ' ').join(iter_docx_lines(docx_source))
     except Exception as e:
         raise Exception(f"Error parsing DOCX: {str(e)}")
 
-def parse_txt(txt_path):
+def parse_txt(txt_source, preserve_lines=False):
     """
     Extract text from TXT file
     
     Args:
-        txt_path (str): Path to the TXT file
+        txt_source (str | bytes | BytesIO): Path to the TXT file or its content
+        preserve_lines (bool): Keep the file's line breaks
         
     Returns:
         str: Extracted text
     """
     try:
-        with open(txt_path, 'r', encoding='utf-8') as file:
-            text = file.read()
-            
-        # Clean up text
-        text = ' '.join(text.split())
-        return text
-    except UnicodeDecodeError:
-        # Try with different encoding if utf-8 fails
-        with open(txt_path, 'r', encoding='latin-1') as file:
-            text = file.read()
+        with _open_binary(txt_source) as file:
+            data = file.read()
+
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            # Try with different encoding if utf-8 fails
+            text = data.decode('latin-1')
             
         # Clean up text
-        text = ' '.join(text.split())
-        return text
+        return normalize_lines(text) if preserve_lines else normalize_whitespace(text)
     except Exception as e:
         raise Exception(f"Error parsing TXT: {str(e)}")
+
+# Canonical section name -> headings that introduce it (matched case-insensitively,
+# ignoring punctuation). Text before the first heading is the "contact" section.
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "career summary", "profile", "professional profile",
+                "objective", "career objective", "about", "about me", "overview"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    "skills": ["skills", "technical skills", "key skills", "core skills", "core competencies", "competencies",
+               "technologies", "tech stack", "tools and technologies", "skills and tools"],
+    "education": ["education", "academic background", "education and training", "academic qualifications",
+                  "qualifications"],
+    "projects": ["projects", "personal projects", "selected projects", "key projects", "side projects",
+                 "open source", "open source contributions"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications",
+                       "certifications and licenses", "courses", "training"],
+    "publications": ["publications", "selected publications", "papers", "research", "patents",
+                     "talks", "presentations"],
+    "awards": ["awards", "honors", "honours", "achievements", "honors and awards", "awards and honors"],
+    "volunteering": ["volunteering", "volunteer experience", "volunteer work", "community involvement",
+                     "leadership and activities", "activities"],
+    "languages": ["languages", "spoken languages"],
+    "interests": ["interests", "hobbies", "hobbies and interests", "personal interests"],
+    "references": ["references", "referees", "references available upon request"],
+}
+
+_HEADING_LOOKUP = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+_HEADING_MAX_WORDS = 5
+_HEADING_CLEAN = re.compile(r"[^a-z& ]+")
+
+class ResumeSection:
+    """One detected section; start and end are character offsets into the resume text"""
+
+    def __init__(self, name, heading, start, end, text):
+        self.name = name
+        self.heading = heading
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def __repr__(self):
+        return f"<ResumeSection(name='{self.name}', start={self.start}, end={self.end})>"
+
+class StructuredResume:
+    """
+    Resume text split into detected sections
+
+    The sections cover the text in order without gaps, so
+    text[section.start:section.end] == section.text for each of them. Text
+    under an unrecognized heading stays in the section before it.
+    """
+
+    def __init__(self, text, sections):
+        self.text = text
+        self.sections = sections
+
+    def section(self, name):
+        """
+        Get the first section with a canonical name
+
+        Args:
+            name (str): Key of SECTION_HEADINGS, "contact" or "other"
+
+        Returns:
+            ResumeSection: The section, or None if it was not detected
+        """
+        return next((section for section in self.sections if section.name == name), None)
+
+    def to_dict(self):
+        """
+        Plain representation, e.g. for JSON
+
+        Returns:
+            dict: "text" and a "sections" list of name/heading/start/end dicts
+        """
+        return {
+            "text": self.text,
+            "sections": [{"name": section.name, "heading": section.heading, "start": section.start,
+                          "end": section.end} for section in self.sections],
+        }
+
+def _match_heading(line):
+    """Canonical section name if the line is a section heading, else None"""
+    if not line or line[0] in "-*•·–":
+        # A bullet point, even one that reads like a heading
+        return None
+    # "Skills: Python, Go" starts a section too
+    label, colon, _ = line.partition(':')
+    cleaned = ' '.join(_HEADING_CLEAN.sub(' ', (label if colon else line).lower()).split()).replace('&', 'and')
+    if not cleaned or len(cleaned.split()) > _HEADING_MAX_WORDS:
+        return None
+    return _HEADING_LOOKUP.get(cleaned)
+
+def structure_resume(text):
+    """
+    Detect the sections of a resume
+
+    Works on text that keeps its line breaks (parse_resume(...,
+    preserve_lines=True)). Text collapsed onto one line comes back as a
+    single "other" section.
+
+    Args:
+        text (str): Resume text, one extracted line per line
+
+    Returns:
+        StructuredResume: The text and its sections
+    """
+    boundaries = []
+    offset = 0
+    for line in text.split('\n'):
+        name = _match_heading(line.strip())
+        if name is not None:
+            boundaries.append((offset, name, line.strip()))
+        offset += len(line) + 1
+
+    if not boundaries:
+        return StructuredResume(text, [ResumeSection("other", None, 0, len(text), text)] if text else [])
+    if boundaries[0][0] > 0:
+        boundaries.insert(0, (0, "contact", None))
+
+    sections = []
+    for index, (start, name, heading) in enumerate(boundaries):
+        end = boundaries[index + 1][0] - 1 if index + 1 < len(boundaries) else len(text)
+        sections.append(ResumeSection(name, heading, start, end, text[start:end]))
+    return StructuredResume(text, sections)
+
+def parse_resume_structured(source, file_format=None, use_cache=True):
+    """
+    Parse a resume and detect its sections
+
+    Args:
+        source (str | bytes | BytesIO | memoryview): Path to the resume file or its content in memory
+        file_format (str): Format hint such as "pdf" or ".docx"
+        use_cache (bool): Reuse previously parsed text for identical file content
+
+    Returns:
+        StructuredResume: The line-preserving text and its sections
+    """
+    return structure_resume(parse_resume(source, file_format=file_format, use_cache=use_cache, preserve_lines=True))
+
+class ParseTimeoutError(Exception):
+    """Raised inside a bulk-parse worker when a file exceeds its time budget"""
+
+def _raise_parse_timeout(signum, frame):
+    raise ParseTimeoutError("Parsing timed out")
+
+def _load_bulk_source(source):
+    """Resolve a bulk-parse task into something parse_resume accepts"""
+    if isinstance(source, tuple):
+        # Zip members are read inside the worker so the parent never holds the batch in memory
+        archive_path, member_name = source
+        with zipfile.ZipFile(archive_path) as archive:
+            data = archive.read(member_name)
+        return data, os.path.splitext(member_name)[1].lower()
+    return source, None
+
+def _parse_resume_with_timeout(source, timeout):
+    """
+    Parse a single resume inside a worker process, bounded by a wall-clock timeout
+
+    Args:
+        source (str | tuple): File path, or (zip path, member name) for archive members
+        timeout (float): Maximum seconds to spend on the file (None or 0 disables it)
+
+    Returns:
+        str: Extracted text from the resume
+    """
+    # SIGALRM is only available on POSIX; elsewhere the timeout is not enforced
+    use_alarm = bool(timeout) and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_parse_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        data, file_format = _load_bulk_source(source)
+        return parse_resume(data, file_format=file_format, use_cache=False)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+def _is_supported_resume(name):
+    base_name = os.path.basename(name)
+    if not base_name or base_name.startswith('.') or name.startswith('__MACOSX/'):
+        return False
+    return os.path.splitext(base_name)[1].lower() in SUPPORTED_EXTENSIONS
+
+def _collect_resume_files(paths_or_zip):
+    """
+    Expand the bulk-parse input into (display name, source) pairs
+
+    Args:
+        paths_or_zip (str | list): A zip archive, a directory, or an iterable of file paths
+
+    Returns:
+        list: List of (display name, file path or (zip path, member name)) tuples
+    """
+    if isinstance(paths_or_zip, (str, os.PathLike)):
+        source = os.fspath(paths_or_zip)
+        if zipfile.is_zipfile(source) and not source.lower().endswith('.docx'):
+            with zipfile.ZipFile(source) as archive:
+                return [
+                    (member.filename, (source, member.filename))
+                    for member in archive.infolist()
+                    if not member.is_dir() and _is_supported_resume(member.filename)
+                ]
+        if os.path.isdir(source):
+            files = []
+            for root, _, names in os.walk(source):
+                for name in sorted(names):
+                    if _is_supported_resume(name):
+                        path = os.path.join(root, name)
+                        files.append((os.path.relpath(path, source), path))
+            return files
+        return [(os.path.basename(source), source)]
+
+    return [(os.path.basename(os.fspath(path)), os.fspath(path)) for path in paths_or_zip]
+
+def parse_resumes(paths_or_zip, workers=None, timeout=DEFAULT_PARSE_TIMEOUT):
+    """
+    Parse a batch of resumes in parallel across a process pool
+
+    Results are yielded as soon as each file finishes, so the order does not
+    match the input order. A file that fails to parse or exceeds the timeout
+    is reported with its exception and does not stop the rest of the batch.
+
+    Args:
+        paths_or_zip (str | list): A zip archive, a directory, or an iterable of file paths
+        workers (int): Number of worker processes (defaults to the CPU count)
+        timeout (float): Per-file parse timeout in seconds (None disables it)
+
+    Yields:
+        tuple: (filename, text or Exception) for each resume in the batch
+    """
+    files = _collect_resume_files(paths_or_zip)
+    if not files:
+        return
+
+    max_workers = min(workers or os.cpu_count() or 1, len(files))
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(_parse_resume_with_timeout, source, timeout): name
+            for name, source in files
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                yield name, future.result()
+            except Exception as e:
+                yield name, e
+    finally:
+        # Drop queued work if the caller stops consuming results early
+        executor.shutdown(wait=True, cancel_futures=True)
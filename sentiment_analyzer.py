@@ -1,31 +1,62 @@
-import os
-import json
-import google.generativeai as genai
+import llm_cache
+import metrics
+from llm_client import get_model, chunk_text
+from llm_decoder import (DecodeError, DEFAULT_DECODE_RETRIES, coerce_result, decode_response, generate_json,
+                         generation_config, stats as decoder_stats)
+from streaming_json import StreamingJSONParser
+from llm_scheduler import get_scheduler, estimate_tokens
 
-# Get Google API key from environment variables
-GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("Google API key not found in environment variables.")
+MODEL_NAME = 'gemini-1.5-pro'
 
-# Configure the Gemini API
-genai.configure(api_key=GOOGLE_API_KEY)
+# Bump whenever the prompt or result format changes so cached results are not reused
+PROMPT_VERSION = "2"
 
-def analyze_sentiment(feedback_text):
+SENTIMENT_SCHEMA = {
+    "sentiment_score": {"type": "number", "minimum": 1, "maximum": 10},
+    "attrition_risk": {"type": "string", "enum": ["High", "Medium", "Low"]},
+    "summary": {"type": "string"},
+    "key_concerns": {"type": "array"},
+    "positive_aspects": {"type": "array"},
+    "retention_recommendations": {"type": "array"},
+}
+
+# Native JSON output; streamed calls skip the schema so fields keep the prompt's order
+GENERATION_CONFIG = generation_config(SENTIMENT_SCHEMA)
+STREAM_GENERATION_CONFIG = generation_config()
+
+def validate_sentiment_result(result):
     """
-    Analyze employee feedback for sentiment and predict attrition risk
-    
+    Check a parsed sentiment result against the schema, coercing near-miss types
+
+    Args:
+        result (dict): Parsed result from the model
+
+    Returns:
+        dict: The validated result
+    """
+    return coerce_result(result, SENTIMENT_SCHEMA)[0]
+
+def _generate_sentiment(prompt, lane, retries=DEFAULT_DECODE_RETRIES):
+    """Call Gemini for a complete analysis, regenerating only if the response cannot be decoded"""
+    return generate_json(
+        lambda: get_scheduler().call(get_model(MODEL_NAME).generate_content, prompt,
+                                     generation_config=GENERATION_CONFIG,
+                                     lane=lane, tokens=estimate_tokens(prompt)).text,
+        SENTIMENT_SCHEMA, retries=retries
+    )
+
+def build_sentiment_prompt(feedback_text):
+    """
+    Build the Gemini prompt for a sentiment analysis
+
     Args:
         feedback_text (str): The employee feedback text to analyze
-        
+
     Returns:
-        dict: A dictionary containing the sentiment analysis results
+        str: The prompt text
     """
-    try:
-        # Configure the model
-        model = genai.GenerativeModel('gemini-1.5-pro')
-        
-        # Prepare the prompt for the LLM
-        prompt = f"""
+    with metrics.span("prompt", operation="sentiment_analysis"):
+        return f"""
         You are an expert HR analyst specializing in employee sentiment analysis and retention strategies.
         Analyze the following employee feedback (which could be from a survey, exit interview, or other feedback form).
         Based on your analysis, provide a structured evaluation of the employee's sentiment and attrition risk.
@@ -37,48 +68,88 @@ def analyze_sentiment(feedback_text):
         {{
             "sentiment_score": (a number from 1 to 10, where 1 is extremely negative and 10 is extremely positive),
             "attrition_risk": "High / Medium / Low",
+            "summary": "A brief 2-3 sentence summary of the overall sentiment and main takeaways",
             "key_concerns": [array of main issues or concerns identified in the feedback],
             "positive_aspects": [array of positive aspects mentioned in the feedback],
-            "retention_recommendations": [array of 3-5 specific recommendations to improve engagement or reduce attrition risk],
-            "summary": "A brief 2-3 sentence summary of the overall sentiment and main takeaways"
+            "retention_recommendations": [array of 3-5 specific recommendations to improve engagement or reduce attrition risk]
         }}
         
         Be objective, data-driven, and precise in your analysis.
+        Output the fields in the order shown above.
         Make sure to format your response as a valid JSON object.
         """
+
+def analyze_sentiment(feedback_text, use_cache=True, lane="interactive"):
+    """
+    Analyze employee feedback for sentiment and predict attrition risk
+    
+    Args:
+        feedback_text (str): The employee feedback text to analyze
+        use_cache (bool): Return a cached result for identical inputs when available
+        lane (str): Scheduler priority lane for the API call
         
-        # Call the Gemini API
-        response = model.generate_content(prompt)
-        
-        # Parse the response to extract the JSON object
-        response_text = response.text
-        
-        # Handle potential markdown formatting in the response
-        if "```json" in response_text:
-            # Extract the JSON part from markdown code block
-            json_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            # Extract from generic code block
-            json_text = response_text.split("```")[1].split("```")[0].strip()
-        else:
-            # No code blocks, use the whole text
-            json_text = response_text
-        
-        # Parse the JSON
-        result = json.loads(json_text)
-        
-        # Validate the response structure
-        required_keys = ["sentiment_score", "attrition_risk", "key_concerns", "positive_aspects", 
-                         "retention_recommendations", "summary"]
+    Returns:
+        dict: A dictionary containing the sentiment analysis results
+    """
+    try:
+        cache_key = llm_cache.make_llm_cache_key("sentiment_analysis", MODEL_NAME, PROMPT_VERSION, feedback_text)
+        if use_cache:
+            cached_result = llm_cache.get_cached_result(cache_key)
+            if cached_result is not None:
+                return cached_result
         
-        for key in required_keys:
-            if key not in result:
-                raise ValueError(f"Missing required key in API response: {key}")
+        prompt = build_sentiment_prompt(feedback_text)
         
-        # Ensure sentiment_score is within the correct range
-        result["sentiment_score"] = max(1, min(10, result["sentiment_score"]))
+        # Call the Gemini API through the shared rate-limit scheduler and decode the JSON result
+        result = _generate_sentiment(prompt, lane)
         
+        llm_cache.store_result(cache_key, "sentiment_analysis", MODEL_NAME, PROMPT_VERSION, result)
         return result
         
     except Exception as e:
-        raise Exception(f"Error analyzing sentiment: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error analyzing sentiment: {str(e)}")
+
+def analyze_sentiment_stream(feedback_text, use_cache=True, lane="interactive"):
+    """
+    Analyze employee feedback, yielding partial results while the response streams in
+
+    Args:
+        feedback_text (str): The employee feedback text to analyze
+        use_cache (bool): Return a cached result for identical inputs when available
+        lane (str): Scheduler priority lane for the API call
+
+    Yields:
+        tuple: (result dict, final flag); partial dicts hold only the fields
+        received so far, and the last item is the validated result
+    """
+    try:
+        cache_key = llm_cache.make_llm_cache_key("sentiment_analysis", MODEL_NAME, PROMPT_VERSION, feedback_text)
+        if use_cache:
+            cached_result = llm_cache.get_cached_result(cache_key)
+            if cached_result is not None:
+                yield cached_result, True
+                return
+
+        prompt = build_sentiment_prompt(feedback_text)
+        parser = StreamingJSONParser()
+        response_text = []
+        for chunk in get_scheduler().stream(get_model(MODEL_NAME).generate_content, prompt, stream=True,
+                                            generation_config=STREAM_GENERATION_CONFIG,
+                                            lane=lane, tokens=estimate_tokens(prompt)):
+            text = chunk_text(chunk)
+            response_text.append(text)
+            if parser.feed(text):
+                yield parser.snapshot(), False
+
+        try:
+            result = decode_response(''.join(response_text), SENTIMENT_SCHEMA)
+        except DecodeError:
+            # Regenerate without streaming; the partial fields already shown are replaced
+            decoder_stats.increment("retries")
+            result = _generate_sentiment(prompt, lane, retries=DEFAULT_DECODE_RETRIES - 1)
+
+        llm_cache.store_result(cache_key, "sentiment_analysis", MODEL_NAME, PROMPT_VERSION, result)
+        yield result, True
+
+    except Exception as e:
+        raise Exception(f"Error analyzing sentiment: {str(e)}")
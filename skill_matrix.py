@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from skill_taxonomy import get_skill_taxonomy
+
+# Default weights for required vs nice-to-have skills in the coverage score
+REQUIRED_WEIGHT = 1.0
+NICE_TO_HAVE_WEIGHT = 0.5
+
+class CandidateSkillMatrix:
+    """
+    Sparse candidate x skill matrix for scoring a whole applicant pool at once
+
+    Row i is candidate i and column j is skill j; a cell is 1 when the
+    candidate's resume mentions the skill. Scores for every candidate are
+    computed with a single sparse matrix-vector product.
+    """
+
+    def __init__(self, candidate_ids, candidate_skills):
+        """
+        Args:
+            candidate_ids (list): Identifier for each candidate (e.g. file name or evaluation id)
+            candidate_skills (list): Canonical skill list for each candidate
+        """
+        self.candidate_ids = list(candidate_ids)
+        self.vocabulary = {}
+        rows, cols = [], []
+        for row, skills in enumerate(candidate_skills):
+            for skill in set(skills):
+                col = self.vocabulary.setdefault(skill, len(self.vocabulary))
+                rows.append(row)
+                cols.append(col)
+
+        self.skills = sorted(self.vocabulary, key=self.vocabulary.get)
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(self.candidate_ids), len(self.vocabulary))
+        )
+
+    @classmethod
+    def from_texts(cls, candidates):
+        """
+        Build the matrix by extracting skills from resume texts
+
+        Args:
+            candidates (dict | list): Mapping or (id, text) pairs of candidate resume texts
+
+        Returns:
+            CandidateSkillMatrix: The matrix for the pool
+        """
+        items = list(candidates.items()) if isinstance(candidates, dict) else list(candidates)
+        taxonomy = get_skill_taxonomy()
+        return cls([candidate_id for candidate_id, _ in items],
+                   [taxonomy.extract(text) for _, text in items])
+
+    def _canonical(self, skills):
+        taxonomy = get_skill_taxonomy()
+        return list(dict.fromkeys(taxonomy.canonicalize(skill) or skill.lower() for skill in skills))
+
+    def _columns(self, skills):
+        """Matrix columns for the given skills (-1 where no candidate has the skill)"""
+        return np.array([self.vocabulary.get(skill, -1) for skill in skills], dtype=np.int64)
+
+    def _presence(self, skills):
+        """Dense boolean (candidates x skills) block; absent skills are all False"""
+        columns = self._columns(skills)
+        presence = np.zeros((len(self.candidate_ids), len(skills)), dtype=bool)
+        known = columns >= 0
+        if known.any():
+            presence[:, known] = self.matrix[:, columns[known]].toarray() > 0
+        return presence
+
+    def score(self, required_skills, nice_to_have_skills=(), required_weight=REQUIRED_WEIGHT,
+              nice_to_have_weight=NICE_TO_HAVE_WEIGHT):
+        """
+        Compute weighted skill coverage for every candidate
+
+        Args:
+            required_skills (list): Must-have skills
+            nice_to_have_skills (list): Optional skills that add a smaller amount
+            required_weight (float): Weight of each required skill
+            nice_to_have_weight (float): Weight of each nice-to-have skill
+
+        Returns:
+            numpy.ndarray: Coverage percentage (0-100) per candidate
+        """
+        required = self._canonical(required_skills)
+        nice = [skill for skill in self._canonical(nice_to_have_skills) if skill not in required]
+        total_weight = required_weight * len(required) + nice_to_have_weight * len(nice)
+        if total_weight == 0:
+            return np.zeros(len(self.candidate_ids))
+
+        weights = np.zeros(len(self.vocabulary), dtype=np.float64)
+        for skills, weight in ((required, required_weight), (nice, nice_to_have_weight)):
+            columns = self._columns(skills)
+            weights[columns[columns >= 0]] = weight
+        return np.asarray(self.matrix @ weights).ravel() / total_weight * 100
+
+    def rank(self, required_skills, nice_to_have_skills=(), top_k=None, **weights):
+        """
+        Rank the pool by weighted coverage with a missing-skill report
+
+        Args:
+            required_skills (list): Must-have skills
+            nice_to_have_skills (list): Optional skills
+            top_k (int): Only return the best k candidates (None for all)
+            **weights: required_weight / nice_to_have_weight overrides
+
+        Returns:
+            pandas.DataFrame: One row per candidate, best first, with coverage,
+            required coverage, matched and missing skills
+        """
+        required = self._canonical(required_skills)
+        nice = [skill for skill in self._canonical(nice_to_have_skills) if skill not in required]
+        scores = self.score(required, nice, **weights)
+
+        count = len(scores) if top_k is None else min(top_k, len(scores))
+        if count == 0:
+            return pd.DataFrame(columns=["Candidate", "Coverage (%)", "Required Coverage (%)",
+                                         "Matched Skills", "Missing Required Skills", "Missing Nice-to-have Skills"])
+        # argpartition finds the top k in linear time; only those k are sorted
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        required_presence = self._presence(required)[top]
+        nice_presence = self._presence(nice)[top]
+        required_array = np.array(required, dtype=object)
+        nice_array = np.array(nice, dtype=object)
+        required_coverage = (required_presence.sum(axis=1) / len(required) * 100) if required else np.zeros(count)
+
+        return pd.DataFrame({
+            "Candidate": [self.candidate_ids[i] for i in top],
+            "Coverage (%)": np.round(scores[top], 1),
+            "Required Coverage (%)": np.round(required_coverage, 1),
+            "Matched Skills": [", ".join(list(required_array[mask]) + list(nice_array[nice_mask]))
+                               for mask, nice_mask in zip(required_presence, nice_presence)],
+            "Missing Required Skills": [", ".join(required_array[~mask]) for mask in required_presence],
+            "Missing Nice-to-have Skills": [", ".join(nice_array[~mask]) for mask in nice_presence],
+        })
+
+    def skill_frequency(self):
+        """
+        Count how many candidates mention each skill
+
+        Returns:
+            pandas.DataFrame: Skill and candidate count, most common first
+        """
+        counts = np.asarray(self.matrix.sum(axis=0)).ravel().astype(int)
+        return pd.DataFrame({"Skill": self.skills, "Candidates": counts}).sort_values(
+            "Candidates", ascending=False, ignore_index=True)
+
+    def to_dataframe(self):
+        """
+        Export the matrix as a dense 0/1 DataFrame (candidates x skills)
+
+        Returns:
+            pandas.DataFrame: Skill presence indexed by candidate id
+        """
+        return pd.DataFrame(self.matrix.toarray().astype(np.int8), index=self.candidate_ids, columns=self.skills)
+
+def rank_candidates(candidates, job_description, nice_to_have_skills=(), top_k=None):
+    """
+    Rank candidate resumes against the skills in a job description
+
+    Args:
+        candidates (dict | list): Mapping or (id, text) pairs of candidate resume texts
+        job_description (str): The job description text; its skills are treated as required
+        nice_to_have_skills (list): Optional skills that add a smaller amount
+        top_k (int): Only return the best k candidates (None for all)
+
+    Returns:
+        pandas.DataFrame: Ranked candidates (see CandidateSkillMatrix.rank)
+    """
+    matrix = CandidateSkillMatrix.from_texts(candidates)
+    required = get_skill_taxonomy().extract(job_description)
+    return matrix.rank(required, nice_to_have_skills, top_k=top_k)
@@ -0,0 +1,231 @@
+import os
+import json
+import threading
+from collections import deque
+
+# Skills file; each entry has a canonical name, a category and optional aliases.
+# "case_sensitive": true makes the canonical name match only with its exact
+# casing (for names that are also common words, e.g. "Go" or "REST"); aliases
+# always match case-insensitively.
+SKILLS_TAXONOMY_PATH = os.environ.get(
+    "SKILLS_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.json")
+)
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+def _is_token_boundary(text, start, end):
+    """
+    Check that text[start:end] is a whole token rather than part of a longer one
+
+    Unlike a regex \\b, this treats symbols as part of a token, so "C" does not
+    match inside "C++", "JS" does not match inside "Node.js" and "Java" does not
+    match inside "JavaScript", while "C#" and ".NET" still match on their own.
+    """
+    if start > 0:
+        before = text[start - 1]
+        if _is_word_char(before):
+            return False
+        # A dot preceded by a word character joins a dotted name such as "Node.js"
+        if before == '.' and start > 1 and _is_word_char(text[start - 2]):
+            return False
+    if end < len(text):
+        after = text[end]
+        if _is_word_char(after) or after in '+#':
+            return False
+        if after == '.' and end + 1 < len(text) and _is_word_char(text[end + 1]):
+            return False
+    return True
+
+def _lower_preserving_length(text):
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters expand when lowercased; keep them as-is so offsets line up
+    return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over lower-cased skill patterns
+
+    All patterns are found in a single pass over the text, so matching cost
+    does not grow with the number of skills in the taxonomy.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns (list): (pattern text, payload) pairs; payloads are returned on match
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+        self._payloads = []
+
+        for pattern, payload in patterns:
+            self._add(pattern.lower(), len(self._payloads))
+            self._payloads.append((pattern, payload))
+        self._build_failure_links()
+
+    def _add(self, pattern, pattern_id):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append(pattern_id)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                # Inherit matches that end at the failure state (suffix patterns)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def find(self, text):
+        """
+        Find every whole-token pattern occurrence in the text
+
+        Only whole-token matches are returned (see _is_token_boundary), which
+        lets patterns such as "C#", ".NET" and "Node.js" match where a regex
+        \\b boundary would not.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: (start, end, pattern text, payload) tuples
+        """
+        lowered = _lower_preserving_length(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matches = []
+        state = 0
+        for index, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in outputs[state]:
+                pattern, payload = self._payloads[pattern_id]
+                start = index - len(pattern) + 1
+                end = index + 1
+                if not _is_token_boundary(text, start, end):
+                    continue
+                matches.append((start, end, text[start:end], payload))
+        return matches
+
+class SkillTaxonomy:
+    """Canonical skills, their aliases, and a compiled matcher over both"""
+
+    def __init__(self, skills):
+        """
+        Args:
+            skills (list): Skill entries with "name", optional "category",
+                "aliases" and "case_sensitive" keys
+        """
+        self.skills = {}
+        self.aliases = {}
+        self._case_sensitive = {}
+        patterns = []
+
+        for entry in skills:
+            name = entry["name"]
+            canonical = name.lower()
+            self.skills[canonical] = {"name": name, "category": entry.get("category", "other")}
+            self.aliases[canonical] = canonical
+            patterns.append((name, canonical))
+            if entry.get("case_sensitive"):
+                self._case_sensitive[canonical] = name
+            for alias in entry.get("aliases", []):
+                self.aliases[alias.lower()] = canonical
+                patterns.append((alias, canonical))
+
+        self.matcher = SkillMatcher(patterns)
+
+    def canonicalize(self, skill):
+        """
+        Map a skill name or alias to its canonical (lower-case) name
+
+        Args:
+            skill (str): Skill name or alias
+
+        Returns:
+            str: Canonical skill name, or None if the skill is unknown
+        """
+        return self.aliases.get(' '.join(skill.split()).lower())
+
+    def find(self, text):
+        """
+        Find skill mentions in text
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: (start, end, canonical skill) tuples in text order
+        """
+        found = []
+        for start, end, matched, canonical in self.matcher.find(text):
+            exact_name = self._case_sensitive.get(canonical)
+            # Case-sensitive names only count with their exact casing; aliases never are
+            if exact_name is not None and matched.lower() == exact_name.lower() and matched != exact_name:
+                continue
+            found.append((start, end, canonical))
+        return found
+
+    def extract(self, text):
+        """
+        Extract the distinct canonical skills mentioned in text
+
+        Args:
+            text (str): Text to extract skills from
+
+        Returns:
+            list: Sorted list of lower-case canonical skill names
+        """
+        # Collapse whitespace so multi-word skills match across line breaks
+        return sorted({canonical for _, _, canonical in self.find(' '.join(text.split()))})
+
+def load_taxonomy(path=SKILLS_TAXONOMY_PATH):
+    """
+    Load a skill taxonomy from a JSON file
+
+    Args:
+        path (str): Path to the skills file
+
+    Returns:
+        SkillTaxonomy: The compiled taxonomy
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    return SkillTaxonomy(data["skills"])
+
+_taxonomy = None
+_taxonomy_lock = threading.Lock()
+
+def get_skill_taxonomy():
+    """
+    Get the process-wide skill taxonomy, loading and compiling it once
+
+    Returns:
+        SkillTaxonomy: The shared taxonomy
+    """
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = load_taxonomy()
+    return _taxonomy
@@ -0,0 +1,161 @@
+import json
+
+_WHITESPACE = " \t\r\n"
+
+class StreamingJSONParser:
+    """
+    Incremental parser for a JSON object that arrives in chunks
+
+    Top-level fields become available as soon as their value is complete,
+    and the items of a top-level array are available one by one while the
+    array is still streaming. Text before the opening brace (such as a
+    markdown code fence) is ignored. Each character is scanned once, so
+    feeding a whole response costs about the same as parsing it at the end.
+
+    Example:
+        parser = StreamingJSONParser()
+        for chunk in chunks:
+            if parser.feed(chunk):
+                render(parser.snapshot())
+    """
+
+    def __init__(self):
+        self.fields = {}  # completed top-level fields
+        self.partial = {}  # key -> completed items of a top-level array still streaming
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._state = "start"
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._is_array = False
+        self._item_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """
+        Consume the next chunk of the response
+
+        Args:
+            chunk (str): Response text
+
+        Returns:
+            bool: True if a field or array item was completed by this chunk
+        """
+        if self.done or not chunk:
+            return False
+        self._text += chunk
+        changed = False
+        text = self._text
+
+        while self._pos < len(text):
+            i = self._pos
+            char = text[i]
+            self._pos += 1
+            state = self._state
+
+            if state == "start":
+                if char == '{':
+                    self._state = "key"
+            elif state == "key":
+                if char == '"':
+                    self._key_start = i
+                    self._state = "key_string"
+                elif char == '}':
+                    self.done = True
+                    return changed
+            elif state == "key_string":
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._key = json.loads(text[self._key_start:i + 1])
+                    self._state = "colon"
+            elif state == "colon":
+                if char == ':':
+                    self._state = "value_start"
+            elif state == "value_start":
+                if char in _WHITESPACE:
+                    continue
+                self._value_start = i
+                self._is_array = char == '['
+                self._item_start = None
+                self._depth = 0
+                if self._is_array:
+                    self.partial[self._key] = []
+                self._state = "value"
+                # Let the value state see the first character too
+                self._pos = i
+            elif state == "value":
+                changed = self._scan_value(text, i, char) or changed
+                if self.done:
+                    return changed
+        return changed
+
+    def _scan_value(self, text, i, char):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+            return False
+
+        if self._is_array and self._depth == 1 and self._item_start is None and char not in _WHITESPACE + ',]':
+            self._item_start = i
+
+        if char == '"':
+            self._in_string = True
+        elif char in '[{':
+            self._depth += 1
+        elif char in ']}':
+            changed = False
+            if self._is_array and self._depth == 1 and char == ']':
+                changed = self._finish_item(text[self._item_start:i]) if self._item_start is not None else False
+            self._depth -= 1
+            if self._depth == 0:
+                return self._finish_field(text[self._value_start:i + 1]) or changed
+            if self._depth < 0:
+                # A scalar value closed by the end of the object
+                self.done = True
+                return self._finish_field(text[self._value_start:i])
+            return changed
+        elif char == ',':
+            if self._depth == 0:
+                return self._finish_field(text[self._value_start:i])
+            if self._is_array and self._depth == 1 and self._item_start is not None:
+                return self._finish_item(text[self._item_start:i])
+        return False
+
+    def _finish_item(self, item_text):
+        self._item_start = None
+        try:
+            self.partial[self._key].append(json.loads(item_text))
+        except ValueError:
+            return False
+        return True
+
+    def _finish_field(self, value_text):
+        self._state = "key"
+        self.partial.pop(self._key, None)
+        try:
+            self.fields[self._key] = json.loads(value_text)
+        except ValueError:
+            return False
+        return True
+
+    def snapshot(self):
+        """
+        Everything parsed so far
+
+        Returns:
+            dict: Completed fields plus the completed items of any array still streaming
+        """
+        current = {key: list(items) for key, items in self.partial.items()}
+        current.update(self.fields)
+        return current
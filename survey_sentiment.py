@@ -0,0 +1,347 @@
+import os
+import io
+import json
+import random
+import asyncio
+import llm_cache
+import metrics
+from llm_client import get_model, run_async
+from llm_scheduler import get_scheduler, estimate_tokens
+from llm_decoder import DecodeError, generation_config, parse_json, stats as decoder_stats
+from sentiment_analyzer import MODEL_NAME, PROMPT_VERSION, SENTIMENT_SCHEMA, validate_sentiment_result
+
+# Prompt tokens allowed per packed request, and the most responses packed into one
+SURVEY_PACK_TOKEN_BUDGET = int(os.environ.get("SURVEY_PACK_TOKEN_BUDGET", "6000"))
+SURVEY_PACK_MAX_ITEMS = int(os.environ.get("SURVEY_PACK_MAX_ITEMS", "20"))
+
+# Output tokens reserved per packed response
+RESPONSE_TOKENS_PER_ITEM = 300
+
+# Prompt overhead of each packed response (its id and JSON punctuation)
+ITEM_OVERHEAD_TOKENS = 8
+
+# Defaults for batch analysis
+DEFAULT_SURVEY_CONCURRENCY = 4
+DEFAULT_SURVEY_RETRIES = 2
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+# Native JSON output: an array of sentiment results, each tagged with its response id
+PACKED_GENERATION_CONFIG = generation_config(dict({"id": {"type": "integer"}}, **SENTIMENT_SCHEMA), as_array=True)
+
+# Column names tried, in order, when no text column is given
+TEXT_COLUMN_CANDIDATES = ["feedback", "response", "answer", "comment", "text"]
+
+PACKED_PROMPT_HEADER = """
+        You are an expert HR analyst specializing in employee sentiment analysis and retention strategies.
+        Analyze each of the following employee survey responses independently.
+        Based on your analysis, provide a structured evaluation of each employee's sentiment and attrition risk.
+
+        The responses are given as a JSON array of objects with an "id" and the response "text".
+
+        Return a JSON array with exactly one object per response, using this format:
+        [
+            {
+                "id": (the id of the response being analyzed),
+                "sentiment_score": (a number from 1 to 10, where 1 is extremely negative and 10 is extremely positive),
+                "attrition_risk": "High / Medium / Low",
+                "key_concerns": [array of main issues or concerns identified in the response],
+                "positive_aspects": [array of positive aspects mentioned in the response],
+                "retention_recommendations": [array of 1-3 specific recommendations to improve engagement or reduce attrition risk],
+                "summary": "A one sentence summary of the response"
+            }
+        ]
+
+        Be objective, data-driven, and precise in your analysis.
+        Make sure to format your response as a valid JSON array.
+
+        EMPLOYEE RESPONSES:
+        """
+
+def load_survey_responses(source, text_column=None, id_column=None, file_format=None):
+    """
+    Read free-text survey responses from a CSV or Parquet file
+
+    Args:
+        source (str | bytes | file-like): Path, raw bytes or file object
+        text_column (str): Column holding the responses (guessed from common names if None)
+        id_column (str): Column holding respondent ids (row numbers if None)
+        file_format (str): "csv" or "parquet" (taken from the file name if None)
+
+    Returns:
+        list: (response id, text) pairs, skipping blank responses
+    """
+    import pandas as pd
+
+    try:
+        if file_format is None:
+            name = source if isinstance(source, str) else getattr(source, 'name', '')
+            file_format = 'parquet' if str(name).lower().endswith(('.parquet', '.pq')) else 'csv'
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+
+        if file_format.lower().lstrip('.') in ('parquet', 'pq'):
+            frame = pd.read_parquet(source)
+        else:
+            frame = pd.read_csv(source)
+
+        if text_column is None:
+            lowered = {str(column).lower(): column for column in frame.columns}
+            text_column = next((lowered[name] for name in TEXT_COLUMN_CANDIDATES if name in lowered), None)
+            if text_column is None:
+                raise ValueError(f"No response column found; choose one of: {', '.join(map(str, frame.columns))}")
+
+        texts = frame[text_column]
+        ids = frame[id_column] if id_column is not None else frame.index
+        return [
+            (response_id.item() if hasattr(response_id, 'item') else response_id, str(text))
+            for response_id, text in zip(ids, texts)
+            if not pd.isna(text) and str(text).strip()
+        ]
+    except Exception as e:
+        raise Exception(f"Error loading survey responses: {str(e)}")
+
+def _item_tokens(text):
+    return estimate_tokens(text, response_tokens=0) + ITEM_OVERHEAD_TOKENS
+
+def pack_responses(texts, token_budget=SURVEY_PACK_TOKEN_BUDGET, max_items=SURVEY_PACK_MAX_ITEMS):
+    """
+    Group responses into packs that each fit one request
+
+    Responses are packed greedily in order. A response too long to share a
+    request with others is sent in a pack of its own.
+
+    Args:
+        texts (list): Response texts
+        token_budget (int): Prompt tokens allowed per request, including the instructions
+        max_items (int): Most responses per request
+
+    Returns:
+        list: Lists of indexes into texts, one list per request
+    """
+    available = max(1, token_budget - estimate_tokens(PACKED_PROMPT_HEADER, response_tokens=0))
+    packs = []
+    current, current_tokens = [], 0
+    for index, text in enumerate(texts):
+        tokens = _item_tokens(text)
+        if current and (current_tokens + tokens > available or len(current) >= max_items):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+def build_packed_prompt(texts):
+    """
+    Build the prompt for a pack of responses
+
+    Args:
+        texts (list): Response texts; their positions are used as ids
+
+    Returns:
+        str: The prompt text
+    """
+    with metrics.span("prompt", operation="survey_sentiment"):
+        items = [{"id": position, "text": text} for position, text in enumerate(texts)]
+        return PACKED_PROMPT_HEADER + json.dumps(items, ensure_ascii=False)
+
+def parse_packed_response(response_text, count):
+    """
+    Split a packed response into per-response results
+
+    The array is repaired locally if needed (see llm_decoder), then each
+    object is validated on its own, so one malformed entry only fails that
+    response.
+
+    Args:
+        response_text (str): Raw response text from the model
+        count (int): Number of responses in the pack
+
+    Returns:
+        dict: Position -> validated result dict or Exception; positions the
+        model skipped are missing
+    """
+    with metrics.span("decode", operation="survey_sentiment"):
+        decoder_stats.increment("responses")
+        try:
+            data, repaired = parse_json(response_text)
+            if isinstance(data, dict):
+                # Tolerate the array being wrapped in an object, e.g. {"results": [...]}
+                data = next((value for value in data.values() if isinstance(value, list)), None)
+            if not isinstance(data, list):
+                raise DecodeError("Expected a JSON array in API response")
+        except DecodeError:
+            decoder_stats.increment("failures")
+            raise
+        decoder_stats.increment("repaired" if repaired else "clean")
+
+        results = {}
+        for entry in data:
+            try:
+                position = int(entry.pop("id"))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= position < count or isinstance(results.get(position), dict):
+                continue
+            try:
+                results[position] = validate_sentiment_result(entry)
+            except Exception as e:
+                results[position] = e
+        return results
+
+async def _analyze_pack(texts, retries, use_cache, lane):
+    """
+    Analyze one pack, re-sending only the responses that failed
+
+    Returns:
+        list: Result dict or Exception for each text
+    """
+    results = [None] * len(texts)
+    cache_keys = [llm_cache.make_llm_cache_key("sentiment_analysis", MODEL_NAME, PROMPT_VERSION, text)
+                  for text in texts]
+    pending = list(range(len(texts)))
+    if use_cache:
+        # Cache lookups hit the database, so keep them off the event loop
+        cached = await asyncio.to_thread(lambda: [llm_cache.get_cached_result(key) for key in cache_keys])
+        for position, cached_result in enumerate(cached):
+            if cached_result is not None:
+                results[position] = cached_result
+        pending = [position for position in pending if results[position] is None]
+
+    attempt = 0
+    model = get_model(MODEL_NAME)
+    while pending:
+        prompt = build_packed_prompt([texts[position] for position in pending])
+        try:
+            response = await get_scheduler().call_async(
+                model.generate_content_async, prompt, generation_config=PACKED_GENERATION_CONFIG, lane=lane,
+                tokens=estimate_tokens(prompt, response_tokens=RESPONSE_TOKENS_PER_ITEM * len(pending))
+            )
+            parsed = parse_packed_response(response.text, len(pending))
+            call_error = None
+        except Exception as e:
+            parsed, call_error = {}, e
+
+        failed = []
+        stored = []
+        for pack_position, position in enumerate(pending):
+            outcome = parsed.get(pack_position)
+            if isinstance(outcome, dict):
+                results[position] = outcome
+                stored.append(position)
+            else:
+                failed.append(position)
+                results[position] = outcome or call_error or ValueError("Response missing from API output")
+        if stored:
+            await asyncio.to_thread(lambda: [
+                llm_cache.store_result(cache_keys[position], "sentiment_analysis", MODEL_NAME, PROMPT_VERSION,
+                                       results[position])
+                for position in stored
+            ])
+
+        if not failed or attempt >= retries:
+            break
+        pending = failed
+        decoder_stats.increment("retries")
+        # Exponential backoff with full jitter so retries from many packs don't align
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt))
+        await asyncio.sleep(random.uniform(0, delay))
+        attempt += 1
+
+    return [result if isinstance(result, dict) else Exception(f"Error analyzing sentiment: {str(result)}")
+            for result in results]
+
+async def analyze_survey_batch(responses, concurrency=DEFAULT_SURVEY_CONCURRENCY, retries=DEFAULT_SURVEY_RETRIES,
+                               token_budget=SURVEY_PACK_TOKEN_BUDGET, max_items=SURVEY_PACK_MAX_ITEMS,
+                               progress_callback=None, use_cache=True, store_results=True, lane="batch"):
+    """
+    Analyze many short survey responses with several responses per Gemini call
+
+    Identical responses (after whitespace normalization) are analyzed once.
+    The rest are packed into requests under the token budget, and at most
+    `concurrency` packed requests are in flight at once. Responses that are
+    missing or invalid in a packed answer are re-sent, up to `retries` times,
+    without repeating the ones that succeeded. Results are yielded as packs
+    complete and, if store_results is set, written to the database in
+    batches as they arrive.
+
+    Args:
+        responses (list): (response id, text) pairs, e.g. from load_survey_responses
+        concurrency (int): Maximum number of concurrent API calls
+        retries (int): Re-sends of failed responses after the first attempt
+        token_budget (int): Prompt tokens allowed per request
+        max_items (int): Most responses per request
+        progress_callback (callable): Called as progress_callback(completed, total) after each pack
+        use_cache (bool): Reuse cached results for identical responses when available
+        store_results (bool): Save successful results to the employee_sentiments table
+        lane (str): Scheduler priority lane for the API calls
+
+    Yields:
+        tuple: (index into responses, result dict or Exception)
+    """
+    from database import BulkWriter, store_sentiment_analyses_bulk
+
+    responses = list(responses)
+    total = len(responses)
+    groups = {}
+    for index, (_, text) in enumerate(responses):
+        groups.setdefault(llm_cache.normalize_text(text), []).append(index)
+    unique = list(groups.values())
+    unique_texts = [responses[indexes[0]][1] for indexes in unique]
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(pack):
+        async with semaphore:
+            return pack, await _analyze_pack([unique_texts[i] for i in pack], retries, use_cache, lane)
+
+    tasks = [asyncio.create_task(run(pack)) for pack in pack_responses(unique_texts, token_budget, max_items)]
+    writer = BulkWriter(store_sentiment_analyses_bulk, flush_interval=5.0) if store_results else None
+    completed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            pack, pack_results = await next_done
+            finished = []
+            for unique_index, result in zip(pack, pack_results):
+                for index in unique[unique_index]:
+                    finished.append((index, result))
+            if writer is not None:
+                stored = [(responses[index][1], result) for index, result in finished if isinstance(result, dict)]
+                # Database writes happen off the event loop
+                await asyncio.to_thread(lambda: [writer.add(text, result) for text, result in stored])
+
+            completed += len(finished)
+            if progress_callback is not None:
+                progress_callback(completed, total)
+            for index, result in finished:
+                yield index, result
+    finally:
+        for task in tasks:
+            task.cancel()
+        if writer is not None:
+            await asyncio.to_thread(writer.flush)
+
+def analyze_survey(responses, **kwargs):
+    """
+    Synchronous wrapper around analyze_survey_batch
+
+    Runs on the shared model event loop (llm_client.run_async), so it can be
+    called any number of times per process.
+
+    Args:
+        responses (list): (response id, text) pairs
+        **kwargs: Options passed to analyze_survey_batch
+
+    Returns:
+        list: Result dict or Exception for each response, in input order
+    """
+    async def collect():
+        results = [None] * len(responses)
+        async for index, result in analyze_survey_batch(responses, **kwargs):
+            results[index] = result
+        return results
+
+    responses = list(responses)
+    return run_async(collect())
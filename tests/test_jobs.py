@@ -0,0 +1,128 @@
+import pytest
+
+import database
+from database import (EmployeeSentiment, Job, ResumeEvaluation, claim_jobs, complete_job, enqueue_job, fail_job,
+                      get_document_text, get_job, session_scope)
+
+EVALUATION = {"overall_match_score": 8, "recommendation": "Strong Fit"}
+
+@pytest.fixture(autouse=True)
+def sqlite_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{tmp_path / 'jobs.db'}")
+    monkeypatch.setattr(database, "_engine", None)
+    database.migrate()
+    yield
+    database.get_engine().dispose()
+
+def evaluation_job(**payload):
+    payload.setdefault("resume_text", "Jane Doe\nPython developer")
+    payload.setdefault("job_description", "Senior Python engineer")
+    return enqueue_job("resume_evaluation", payload)
+
+def count(model):
+    with session_scope() as session:
+        return session.query(model).count()
+
+# Claiming
+
+def test_claimed_job_is_not_claimed_again():
+    job_id = evaluation_job()
+    jobs = claim_jobs("worker-a")
+    assert [job["id"] for job in jobs] == [job_id]
+    assert jobs[0]["status"] == "running"
+    assert jobs[0]["attempts"] == 1
+    assert claim_jobs("worker-b") == []
+    assert claim_jobs("worker-a") == []
+
+def test_claim_filters_by_kind():
+    enqueue_job("sentiment_analysis", {"feedback_text": "Great team"})
+    assert claim_jobs("worker-a", kinds=["resume_evaluation"]) == []
+    assert len(claim_jobs("worker-a", kinds=["sentiment_analysis"])) == 1
+
+def test_expired_lease_is_claimed_by_another_worker():
+    job_id = evaluation_job()
+    claim_jobs("worker-a", visibility_timeout=0)
+    jobs = claim_jobs("worker-b")
+    assert [job["id"] for job in jobs] == [job_id]
+    assert jobs[0]["attempts"] == 2
+
+# Failures
+
+def test_failed_job_is_requeued_until_max_attempts():
+    job_id = enqueue_job("resume_evaluation", {"resume_text": "r", "job_description": "j"}, max_attempts=3)
+    for attempt in range(1, 4):
+        jobs = claim_jobs("worker-a")
+        assert [job["attempts"] for job in jobs] == [attempt]
+        expected = "failed" if attempt == 3 else "queued"
+        assert fail_job(job_id, "worker-a", f"boom {attempt}") == expected
+    assert claim_jobs("worker-a") == []
+    job = get_job(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "boom 3"
+
+def test_retry_delay_postpones_the_next_claim():
+    job_id = evaluation_job()
+    claim_jobs("worker-a")
+    assert fail_job(job_id, "worker-a", "boom", retry_delay=60) == "queued"
+    assert claim_jobs("worker-a") == []
+
+def test_expired_lease_on_the_final_attempt_fails_the_job():
+    job_id = enqueue_job("resume_evaluation", {"resume_text": "r", "job_description": "j"}, max_attempts=1)
+    claim_jobs("worker-a", visibility_timeout=0)
+    assert claim_jobs("worker-b") == []
+    assert get_job(job_id)["status"] == "failed"
+
+def test_fail_job_without_the_lease_is_ignored():
+    job_id = evaluation_job()
+    claim_jobs("worker-a", visibility_timeout=0)
+    claim_jobs("worker-b")
+    assert fail_job(job_id, "worker-a", "boom") is None
+    assert get_job(job_id)["status"] == "running"
+
+# Completion
+
+def test_complete_job_stores_the_record_in_the_same_transaction():
+    job_id = evaluation_job()
+    claim_jobs("worker-a")
+    assert complete_job(job_id, "worker-a", EVALUATION)
+    job = get_job(job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"] == EVALUATION
+    with session_scope() as session:
+        evaluation = session.get(ResumeEvaluation, job["record_id"])
+        assert evaluation.result == EVALUATION
+        assert get_document_text(evaluation.resume_sha256) == "Jane Doe\nPython developer"
+
+def test_complete_sentiment_job_stores_the_analysis():
+    job_id = enqueue_job("sentiment_analysis", {"feedback_text": "Great team"})
+    claim_jobs("worker-a")
+    assert complete_job(job_id, "worker-a", {"sentiment_score": 8, "attrition_risk": "Low"})
+    with session_scope() as session:
+        sentiment = session.get(EmployeeSentiment, get_job(job_id)["record_id"])
+        assert sentiment.feedback_text == "Great team"
+
+def test_complete_job_without_the_lease_is_rejected():
+    job_id = evaluation_job()
+    claim_jobs("worker-a", visibility_timeout=0)
+    claim_jobs("worker-b")
+    assert not complete_job(job_id, "worker-a", EVALUATION)
+    job = get_job(job_id)
+    assert job["status"] == "running"
+    assert job["result"] is None
+    assert count(ResumeEvaluation) == 0
+    # The worker now holding the lease can still finish it
+    assert complete_job(job_id, "worker-b", EVALUATION)
+    assert count(ResumeEvaluation) == 1
+
+def test_failed_record_write_leaves_the_job_running():
+    # The payload lacks the job description, so storing the evaluation fails
+    job_id = enqueue_job("resume_evaluation", {"resume_text": "Jane Doe"})
+    claim_jobs("worker-a")
+    with pytest.raises(Exception, match="Error completing job"):
+        complete_job(job_id, "worker-a", EVALUATION)
+    job = get_job(job_id)
+    assert job["status"] == "running"
+    assert job["result"] is None
+    assert job["record_id"] is None
+    assert count(ResumeEvaluation) == 0
+    assert count(Job) == 1
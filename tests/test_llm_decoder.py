@@ -0,0 +1,157 @@
+import pytest
+
+from llm_decoder import (DEFAULT_DECODE_RETRIES, DecodeError, coerce_result, decode_response, extract_json_text,
+                         generate_json, parse_json, repair_json, stats)
+
+SCHEMA = {
+    "score": {"type": "number", "minimum": 0, "maximum": 10},
+    "recommendation": {"type": "string", "enum": ["Strong Fit", "Moderate Fit", "Weak Fit"]},
+    "skills": {"type": "array"},
+}
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    stats.reset()
+    yield
+    stats.reset()
+
+# parse_json / repair_json
+
+def test_clean_json_needs_no_repair():
+    assert parse_json('{"a": 1, "b": [true, null]}') == ({"a": 1, "b": [True, None]}, False)
+
+def test_fences_and_prose_are_stripped_without_repair():
+    response = 'Here is the result:\n```json\n{"a": 1}\n```\nLet me know if you need more.'
+    assert extract_json_text(response) == '{"a": 1}'
+    assert parse_json(response) == ({"a": 1}, False)
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ("{'a': 'x', 'b': 'y'}", {"a": "x", "b": "y"}),
+    ('{"a": True, "b": False, "c": None}', {"a": True, "b": False, "c": None}),
+    ('{a: 1, b_2: "x"}', {"a": 1, "b_2": "x"}),
+    ('{“a”: “x”}', {"a": "x"}),
+    ('{"a": "line one\nline two\tend"}', {"a": "line one\nline two\tend"}),
+    ("{'a': 'it\\'s'}", {"a": "it's"}),
+    ("{'a': 'say \"hi\"'}", {"a": 'say "hi"'}),
+])
+def test_near_json_is_repaired(text, expected):
+    assert parse_json(text) == (expected, True)
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": "trunc', {"a": "trunc"}),
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": {"b": 1', {"a": {"b": 1}}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": 1, "b":', {"a": 1}),
+    ('{"a": 1, "b": [', {"a": 1, "b": []}),
+])
+def test_truncated_output_is_closed(text, expected):
+    assert parse_json(text) == (expected, True)
+
+def test_truncation_after_an_inner_bracket_keeps_the_outer_object():
+    value, repaired = parse_json('{"a": [1, 2], "b": "x')
+    assert value == {"a": [1, 2], "b": "x"}
+    assert repaired
+
+def test_repair_json_leaves_valid_json_alone():
+    assert repair_json('{"a": [1, "x, y"]}') == '{"a": [1, "x, y"]}'
+
+def test_unrecoverable_text_raises():
+    with pytest.raises(DecodeError):
+        parse_json("I cannot help with that.")
+
+# coerce_result
+
+def test_valid_result_is_not_coerced():
+    result = {"score": 7, "recommendation": "Strong Fit", "skills": ["Python"]}
+    assert coerce_result(dict(result), SCHEMA) == (result, False)
+
+@pytest.mark.parametrize("value, expected", [("7", 7.0), ("7.5/10", 7.5), ("Score: 8", 8.0), (14, 10), (-3, 0)])
+def test_numbers_are_parsed_and_clamped(value, expected):
+    result, coerced = coerce_result({"score": value, "recommendation": "Weak Fit", "skills": []}, SCHEMA)
+    assert result["score"] == expected
+    assert coerced
+
+def test_integer_fields_are_rounded():
+    result, _ = coerce_result({"n": 6.6}, {"n": {"type": "integer"}})
+    assert result["n"] == 7
+
+@pytest.mark.parametrize("value", [True, "n/a", None])
+def test_non_numbers_are_rejected(value):
+    with pytest.raises(DecodeError):
+        coerce_result({"score": value, "recommendation": "Weak Fit", "skills": []}, SCHEMA)
+
+@pytest.mark.parametrize("value, expected", [
+    ("strong fit", "Strong Fit"),
+    ("  Moderate   FIT ", "Moderate Fit"),
+    ("Strong", "Strong Fit"),
+    ("weak fit.", "Weak Fit"),
+    ("Weak Fit - lacks experience", "Weak Fit"),
+])
+def test_enum_values_are_matched(value, expected):
+    result, _ = coerce_result({"score": 5, "recommendation": value, "skills": []}, SCHEMA)
+    assert result["recommendation"] == expected
+
+@pytest.mark.parametrize("value", ["Excellent", "", "Fit"])
+def test_unknown_or_ambiguous_enum_values_are_rejected(value):
+    with pytest.raises(DecodeError):
+        coerce_result({"score": 5, "recommendation": value, "skills": []}, SCHEMA)
+
+def test_enum_prefix_matching_to_two_choices_is_rejected():
+    with pytest.raises(DecodeError):
+        coerce_result({"risk": "h"}, {"risk": {"type": "string", "enum": ["High", "Highest", "Low"]}})
+
+def test_string_fields_accept_lists_and_scalars():
+    schema = {"summary": {"type": "string"}}
+    assert coerce_result({"summary": ["a", "b"]}, schema)[0] == {"summary": "a b"}
+    assert coerce_result({"summary": 3}, schema)[0] == {"summary": "3"}
+
+@pytest.mark.parametrize("value, expected", [
+    ("- Python\n- Go; SQL\n\n", ["Python", "Go", "SQL"]),
+    (None, []),
+    ("Python", ["Python"]),
+    (5, ["5"]),
+    (["a", 1, {"k": "v"}], ["a", "1", '{"k": "v"}']),
+])
+def test_arrays_are_coerced_to_lists_of_strings(value, expected):
+    result, _ = coerce_result({"score": 5, "recommendation": "Weak Fit", "skills": value}, SCHEMA)
+    assert result["skills"] == expected
+
+@pytest.mark.parametrize("value, expected", [(True, True), ("yes", True), ("1", True), ("false", False), (0, False)])
+def test_booleans_are_coerced(value, expected):
+    assert coerce_result({"flag": value}, {"flag": {"type": "boolean"}})[0]["flag"] is expected
+
+def test_missing_keys_and_non_objects_are_rejected():
+    with pytest.raises(DecodeError):
+        coerce_result({"score": 5, "skills": []}, SCHEMA)
+    with pytest.raises(DecodeError):
+        coerce_result([1, 2], SCHEMA)
+
+# decode_response / generate_json
+
+def test_decode_response_counts_outcomes():
+    decode_response('{"score": 5, "recommendation": "Weak Fit", "skills": []}', SCHEMA)
+    decode_response("{'score': '5', 'recommendation': 'weak', 'skills': 'Python',}", SCHEMA)
+    with pytest.raises(DecodeError):
+        decode_response("no json here", SCHEMA)
+    counts = stats.snapshot()
+    assert (counts["responses"], counts["clean"], counts["repaired"], counts["coerced"], counts["failures"]) == \
+        (3, 1, 1, 1, 1)
+
+def test_generate_json_regenerates_only_after_a_decode_failure():
+    responses = iter(["garbage", '{"score": 9, "recommendation": "Strong Fit", "skills": ["Go"]}'])
+    result = generate_json(lambda: next(responses), SCHEMA)
+    assert result == {"score": 9, "recommendation": "Strong Fit", "skills": ["Go"]}
+    assert stats.snapshot()["retries"] == 1
+
+def test_generate_json_gives_up_after_the_default_retries():
+    calls = []
+
+    def call():
+        calls.append(1)
+        return "garbage"
+
+    with pytest.raises(DecodeError):
+        generate_json(call, SCHEMA)
+    assert len(calls) == DEFAULT_DECODE_RETRIES + 1
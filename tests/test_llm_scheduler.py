@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import llm_scheduler
+from llm_scheduler import RequestScheduler
+
+class ResourceExhausted(Exception):
+    """Stands in for the SDK's HTTP 429 exception"""
+
+def make_scheduler(max_concurrency=4):
+    return RequestScheduler(requests_per_minute=6000, tokens_per_minute=10_000_000, max_concurrency=max_concurrency)
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+# Admission order
+
+def test_interactive_lane_is_admitted_before_batch():
+    scheduler = make_scheduler(max_concurrency=1)
+    scheduler.acquire("batch")
+    admitted = []
+
+    def request(lane):
+        scheduler.acquire(lane)
+        admitted.append(lane)
+        scheduler.release()
+
+    # The batch request queues first, yet the interactive one gets the freed slot
+    threads = []
+    for index, lane in enumerate(["batch", "screening", "interactive"]):
+        threads.append(threading.Thread(target=request, args=(lane,)))
+        threads[-1].start()
+        wait_for(lambda: len(scheduler._waiters) == index + 1)
+    scheduler.release()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert admitted == ["interactive", "screening", "batch"]
+
+def test_same_lane_is_first_come_first_served():
+    scheduler = make_scheduler(max_concurrency=1)
+    scheduler.acquire("batch")
+    admitted = []
+
+    def request(name):
+        scheduler.acquire("batch")
+        admitted.append(name)
+        scheduler.release()
+
+    threads = []
+    for index, name in enumerate(["first", "second", "third"]):
+        threads.append(threading.Thread(target=request, args=(name,)))
+        threads[-1].start()
+        wait_for(lambda: len(scheduler._waiters) == index + 1)
+    scheduler.release()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert admitted == ["first", "second", "third"]
+
+# AIMD
+
+def test_success_grows_the_limit_additively():
+    scheduler = make_scheduler(max_concurrency=8)
+    scheduler.concurrency_limit = 2.0
+    assert scheduler.call(lambda: "ok") == "ok"
+    assert scheduler.concurrency_limit == pytest.approx(2.5)
+    assert scheduler.in_flight == 0
+
+def test_limit_never_exceeds_max_concurrency():
+    scheduler = make_scheduler(max_concurrency=2)
+    for _ in range(10):
+        scheduler.call(lambda: "ok")
+    assert scheduler.concurrency_limit == 2
+
+def test_quota_error_halves_the_limit_and_pauses_admission(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "QUOTA_RETRIES", 0)
+    monkeypatch.setattr(llm_scheduler, "QUOTA_COOLDOWN_SECONDS", 0.3)
+    scheduler = make_scheduler(max_concurrency=8)
+
+    def rejected():
+        raise ResourceExhausted("429 Resource has been exhausted")
+
+    with pytest.raises(ResourceExhausted):
+        scheduler.call(rejected)
+    assert scheduler.quota_errors == 1
+    assert scheduler.concurrency_limit == 4
+    assert scheduler.in_flight == 0
+    assert scheduler._paused_until > time.monotonic()
+
+    # Nothing is admitted until the cooldown has passed
+    start = time.monotonic()
+    scheduler.acquire("interactive")
+    assert time.monotonic() - start >= 0.2
+    scheduler.release()
+
+def test_quota_errors_never_drop_below_min_concurrency(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "QUOTA_COOLDOWN_SECONDS", 0)
+    scheduler = RequestScheduler(requests_per_minute=6000, tokens_per_minute=10_000_000, max_concurrency=8,
+                                 min_concurrency=2)
+    for _ in range(5):
+        scheduler.acquire()
+        scheduler.release(error=ResourceExhausted("quota exceeded"))
+    assert scheduler.concurrency_limit == 2
+
+def test_quota_error_is_retried_after_the_cooldown(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "QUOTA_COOLDOWN_SECONDS", 0.05)
+    scheduler = make_scheduler()
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ResourceExhausted("429")
+        return "ok"
+
+    assert scheduler.call(flaky) == "ok"
+    assert len(calls) == 2
+    assert scheduler.quota_errors == 1
+
+def test_other_errors_leave_the_limit_alone():
+    scheduler = make_scheduler()
+    scheduler.concurrency_limit = 3.0
+
+    def broken():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.call(broken)
+    assert scheduler.concurrency_limit == 3.0
+    assert scheduler.quota_errors == 0
+    assert scheduler.in_flight == 0
+
+# Streaming
+
+def test_stream_holds_its_slot_until_exhausted():
+    scheduler = make_scheduler()
+    scheduler.concurrency_limit = 2.0
+    stream = scheduler.stream(lambda: iter(["a", "b", "c"]))
+    assert next(stream) == "a"
+    assert scheduler.in_flight == 1
+    assert next(stream) == "b"
+    assert scheduler.in_flight == 1
+    assert list(stream) == ["c"]
+    assert scheduler.in_flight == 0
+    assert scheduler.concurrency_limit == pytest.approx(2.5)
+
+def test_closed_stream_releases_its_slot_without_growing_the_limit():
+    scheduler = make_scheduler()
+    scheduler.concurrency_limit = 2.0
+    stream = scheduler.stream(lambda: iter(["a", "b", "c"]))
+    assert next(stream) == "a"
+    stream.close()
+    assert scheduler.in_flight == 0
+    assert scheduler.concurrency_limit == 2.0
+
+def test_quota_error_after_first_chunk_is_not_retried(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "QUOTA_COOLDOWN_SECONDS", 0)
+    scheduler = make_scheduler()
+    calls = []
+
+    def chunks():
+        calls.append(1)
+        yield "a"
+        raise ResourceExhausted("429")
+
+    stream = scheduler.stream(chunks)
+    assert next(stream) == "a"
+    with pytest.raises(ResourceExhausted):
+        next(stream)
+    assert len(calls) == 1
+    assert scheduler.in_flight == 0
+
+# Async
+
+def test_cancelled_async_call_releases_its_slot_without_growing_the_limit():
+    scheduler = make_scheduler()
+    scheduler.concurrency_limit = 2.0
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.ensure_future(scheduler.call_async(slow))
+        await asyncio.sleep(0.05)
+        assert scheduler.in_flight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert scheduler.in_flight == 0
+    assert scheduler.concurrency_limit == 2.0
@@ -1,51 +1,19 @@
-import re
-import pandas as pd
+from skill_taxonomy import get_skill_taxonomy
 
 def extract_skills(text):
     """
-    Extract potential skills from text using a simple regex-based approach
+    Extract skills from text using the shared skill taxonomy
+    
+    Skill names and aliases (e.g. "k8s", "Postgres", "golang") are matched in
+    a single pass and reported under their canonical names.
     
     Args:
         text (str): Text to extract skills from
         
     Returns:
-        list: List of potential skills
+        list: Sorted list of lower-case canonical skill names
     """
-    # Common programming languages
-    programming_languages = [
-        "Python", "Java", "JavaScript", "C\\+\\+", "C#", "Ruby", "PHP", 
-        "Swift", "Kotlin", "Go", "Rust", "TypeScript", "Scala", "Perl",
-        "R", "MATLAB", "SQL", "HTML", "CSS", "Bash", "Shell"
-    ]
-    
-    # Common frameworks and libraries
-    frameworks = [
-        "React", "Angular", "Vue", "Django", "Flask", "Spring", "Express", 
-        "Node\\.js", "TensorFlow", "PyTorch", "Keras", "Pandas", "NumPy",
-        "Scikit-learn", "Laravel", "Ruby on Rails", "ASP\\.NET", ".NET"
-    ]
-    
-    # Common tools and technologies
-    tools = [
-        "Git", "Docker", "Kubernetes", "AWS", "Azure", "GCP", "Jenkins", 
-        "CI/CD", "REST", "GraphQL", "Microservices", "Agile", "Scrum",
-        "JIRA", "Confluence", "Linux", "Windows", "MacOS", "MongoDB",
-        "PostgreSQL", "MySQL", "Oracle", "Redis", "Elasticsearch"
-    ]
-    
-    # Combine all keywords
-    keywords = programming_languages + frameworks + tools
-    
-    # Create a regex pattern
-    pattern = r'\b(' + '|'.join(keywords) + r')\b'
-    
-    # Find all matches
-    matches = re.findall(pattern, text, re.IGNORECASE)
-    
-    # Remove duplicates and sort
-    skills = sorted(list(set([match.lower() for match in matches])))
-    
-    return skills
+    return get_skill_taxonomy().extract(text)
 
 def create_skills_dataframe(resume_skills, job_skills):
     """
@@ -58,6 +26,9 @@ def create_skills_dataframe(resume_skills, job_skills):
     Returns:
         pandas.DataFrame: DataFrame with skill matching information
     """
+    # Imported here so the skill helpers don't pull pandas in at startup
+    import pandas as pd
+    
     # Create sets for comparison
     resume_set = set(resume_skills)
     job_set = set(job_skills)
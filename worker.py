@@ -0,0 +1,184 @@
+"""
+Background job worker
+
+Drains the jobs table that the app fills when USE_JOB_QUEUE is on, running
+each job's LLM call outside the Streamlit script thread and storing its
+result (and the matching history record) in the database. Any number of
+workers can run side by side, on one machine or several:
+
+    python worker.py --concurrency 4
+
+Claimed jobs are leased for JOB_VISIBILITY_TIMEOUT seconds and the lease is
+renewed while the job runs, so a job whose worker dies is picked up again by
+another worker. Failed attempts are retried with exponential backoff up to
+JOB_MAX_ATTEMPTS. SIGINT / SIGTERM stop claiming new jobs and let running
+ones finish.
+"""
+import os
+import sys
+import time
+import random
+import signal
+import socket
+import argparse
+import threading
+import database
+import metrics
+
+# Jobs processed in parallel per worker process
+JOB_WORKER_CONCURRENCY = int(os.environ.get("JOB_WORKER_CONCURRENCY", "4"))
+# Seconds an idle worker thread waits before looking for new jobs
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1.0"))
+JOB_RETRY_BASE_DELAY = 5.0
+JOB_RETRY_MAX_DELAY = 300.0
+
+def run_resume_evaluation(payload):
+    """Evaluate a resume, pre-screening it first if the payload has a threshold"""
+    if payload.get("prescreen_threshold") is not None:
+        from prescreen import evaluate_resume_with_prescreen
+        # The reject is stored by complete_job like any other result
+        return evaluate_resume_with_prescreen(payload["resume_text"], payload["job_description"],
+                                              threshold=payload["prescreen_threshold"], store_rejects=False)
+    from resume_evaluator import evaluate_resume
+    return evaluate_resume(payload["resume_text"], payload["job_description"])
+
+def run_sentiment_analysis(payload):
+    """Analyze one piece of employee feedback"""
+    from sentiment_analyzer import analyze_sentiment
+    return analyze_sentiment(payload["feedback_text"])
+
+HANDLERS = {
+    "resume_evaluation": run_resume_evaluation,
+    "sentiment_analysis": run_sentiment_analysis,
+}
+
+def retry_delay(attempts):
+    """Exponential backoff with full jitter after the given number of failed attempts"""
+    return random.uniform(0, min(JOB_RETRY_MAX_DELAY, JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1)))
+
+class Worker:
+    """
+    Pool of threads claiming and running jobs
+
+    Args:
+        concurrency (int): Worker threads
+        kinds (list): Job kinds to claim (None for every kind in HANDLERS)
+        poll_interval (float): Idle wait between claims, in seconds
+        visibility_timeout (int): Lease length in seconds
+        worker_id (str): Lease owner name (defaults to host:pid)
+    """
+
+    def __init__(self, concurrency=JOB_WORKER_CONCURRENCY, kinds=None, poll_interval=JOB_POLL_INTERVAL,
+                 visibility_timeout=database.JOB_VISIBILITY_TIMEOUT, worker_id=None):
+        self.concurrency = concurrency
+        self.kinds = list(kinds) if kinds else list(HANDLERS)
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = threading.Event()
+        # Separate from _stopping so leases keep being renewed while running jobs drain
+        self._heartbeat_stopping = threading.Event()
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def stop(self):
+        """Stop claiming jobs; running jobs are finished"""
+        self._stopping.set()
+
+    def run(self, burst=False):
+        """
+        Process jobs until stop() is called
+
+        Args:
+            burst (bool): Return once no runnable job is left instead of polling
+        """
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._loop, args=(burst,), name=f"job-worker-{index}")
+                   for index in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._stopping.set()
+        self._heartbeat_stopping.set()
+        heartbeat.join()
+
+    def _loop(self, burst):
+        while not self._stopping.is_set():
+            try:
+                jobs = database.claim_jobs(self.worker_id, limit=1, visibility_timeout=self.visibility_timeout,
+                                           kinds=self.kinds)
+            except Exception as e:
+                # The database may be restarting; keep polling
+                print(f"[{self.worker_id}] {e}", file=sys.stderr)
+                jobs = []
+            if not jobs:
+                if burst:
+                    return
+                self._stopping.wait(self.poll_interval)
+                continue
+            self._process(jobs[0])
+
+    def _process(self, job):
+        with self._lock:
+            self._active.add(job["id"])
+        start = time.perf_counter()
+        detail = ""
+        try:
+            with metrics.span("job", kind=job["kind"]):
+                handler = HANDLERS.get(job["kind"])
+                if handler is None:
+                    raise ValueError(f"No handler for job kind '{job['kind']}'")
+                result = handler(job["payload"])
+            outcome = "succeeded" if database.complete_job(job["id"], self.worker_id, result) else "lease_lost"
+        except Exception as e:
+            detail = f": {e}"
+            try:
+                outcome = database.fail_job(job["id"], self.worker_id, str(e), retry_delay(job["attempts"])) \
+                    or "lease_lost"
+            except Exception as db_error:
+                # The lease runs out and another worker retries the job
+                outcome = "unrecorded"
+                detail += f" (not recorded: {db_error})"
+        finally:
+            with self._lock:
+                self._active.discard(job["id"])
+        metrics.registry.increment("jobs_total", kind=job["kind"], outcome=outcome)
+        print(f"[{self.worker_id}] job {job['id']} ({job['kind']}, attempt {job['attempts']}) "
+              f"{outcome} in {time.perf_counter() - start:.2f}s{detail}", file=sys.stderr)
+
+    def _heartbeat(self):
+        # Renew leases well before they expire
+        while not self._heartbeat_stopping.wait(max(1.0, self.visibility_timeout / 3)):
+            with self._lock:
+                active = list(self._active)
+            for job_id in active:
+                try:
+                    database.extend_job_lease(job_id, self.worker_id, self.visibility_timeout)
+                except Exception as e:
+                    print(f"[{self.worker_id}] {e}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY, help="jobs run in parallel")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(HANDLERS), help="only run these job kinds")
+    parser.add_argument("--burst", action="store_true", help="exit once the queue is empty")
+    parser.add_argument("--metrics-port", type=int, default=metrics.METRICS_PORT,
+                        help="serve Prometheus metrics on this port (0 disables; defaults to METRICS_PORT)")
+    args = parser.parse_args()
+
+    try:
+        metrics.start_metrics_server(port=args.metrics_port)
+    except OSError as e:
+        # The app or another worker on this host already has the port
+        print(f"Metrics endpoint disabled: {e}", file=sys.stderr)
+    worker = Worker(concurrency=args.concurrency, kinds=args.kinds)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: worker.stop())
+    print(f"[{worker.worker_id}] processing {', '.join(worker.kinds)} jobs with {args.concurrency} threads",
+          file=sys.stderr)
+    worker.run(burst=args.burst)
+
+if __name__ == "__main__":
+    main()